@@ -0,0 +1,120 @@
+"""
+Índice de endereços em memória do bot CEPzinho
+
+Construído a partir da base local de CEPs, particionado por (UF, cidade).
+Cada partição guarda uma lista ordenada de palavras dos logradouros, já sem
+acentos e em minúsculas, de modo que a busca por prefixo é uma busca binária.
+"""
+
+import unicodedata
+from bisect import bisect_left
+from time import perf_counter
+from typing import Dict, List, Tuple
+from logs import get_logger
+
+logger = get_logger(__name__)
+
+MAX_RESULTS = 50
+
+
+def fold(text: str) -> str:
+    """Remove acentos, converte para minúsculas e normaliza os espaços"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().replace(",", " ").split())
+
+
+class _Partition:
+    """Logradouros de uma cidade: nomes normalizados e palavras ordenadas"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.positions: List[int] = []
+        self.tokens: List[str] = []
+        self.token_entries: List[int] = []
+
+    def add(self, name: str, position: int) -> None:
+        self.names.append(name)
+        self.positions.append(position)
+
+    def freeze(self) -> None:
+        """Ordena as palavras de todos os nomes para permitir busca por prefixo"""
+        pairs = sorted(
+            (token, entry)
+            for entry, name in enumerate(self.names)
+            for token in set(name.split())
+        )
+        self.tokens = [token for token, _ in pairs]
+        self.token_entries = [entry for _, entry in pairs]
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self.tokens, prefix)
+        hi = bisect_left(self.tokens, prefix + "\uffff", lo)
+        return lo, hi
+
+
+class AddressIndex:
+    def __init__(self, cep_index):
+        """Indexa os logradouros da base local (CepIndex) por UF e cidade"""
+        self.cep_index = cep_index
+        self._partitions: Dict[Tuple[str, str], _Partition] = {}
+
+        start = perf_counter()
+        for position in range(len(cep_index)):
+            record = cep_index.record_at(position)
+            name = fold(record.get("logradouro"))
+            if not name:
+                continue
+
+            key = (fold(record.get("uf")), fold(record.get("localidade")))
+            partition = self._partitions.get(key)
+            if partition is None:
+                partition = self._partitions[key] = _Partition()
+            partition.add(name, position)
+
+        for partition in self._partitions.values():
+            partition.freeze()
+
+        logger.info(
+            "Índice de endereços criado: %s cidades em %.1fs",
+            len(self._partitions),
+            perf_counter() - start,
+        )
+
+    def search(
+        self, uf: str, cidade: str, logradouro: str, limit: int = MAX_RESULTS
+    ) -> List[Dict]:
+        """Busca logradouros cujas palavras começam com as palavras da consulta"""
+        partition = self._partitions.get((fold(uf), fold(cidade)))
+        query = fold(logradouro)
+        if partition is None or not query:
+            return []
+
+        words = query.split()
+
+        # Parte da palavra com menos candidatos e filtra pelas demais
+        ranges = [partition.prefix_range(word) for word in words]
+        lo, hi = min(ranges, key=lambda r: r[1] - r[0])
+        candidates = set(partition.token_entries[lo:hi])
+
+        ranked = []
+        for entry in candidates:
+            name = partition.names[entry]
+            tokens = name.split()
+            if not all(any(t.startswith(w) for t in tokens) for w in words):
+                continue
+
+            if name == query:
+                rank = 0
+            elif name.startswith(query):
+                rank = 1
+            elif tokens[0].startswith(words[0]):
+                rank = 2
+            else:
+                rank = 3
+            ranked.append((rank, len(name), name, partition.positions[entry]))
+
+        ranked.sort()
+        return [
+            self.cep_index.record_at(position) for _, _, _, position in ranked[:limit]
+        ]
@@ -0,0 +1,152 @@
+"""
+Arquivamento (retenção) do histórico de consultas do CEPzinho
+
+Consultas com mais de QUERY_RETENTION_DAYS dias saem da tabela `queries` e
+vão para arquivos mensais somente-anexação em QUERY_ARCHIVE_DIR
+(`queries-AAAA-MM.jsonl.gz`, uma consulta JSON por linha). Cada lote é
+anexado como um novo membro gzip e só depois removido do banco; se o processo
+cair entre as duas etapas, o lote é regravado na execução seguinte e a
+leitura descarta as linhas repetidas pelo id.
+
+Os agregados diários (`statistics*`) não são arquivados, então o /stats
+continua respondendo qualquer período sem ler os arquivos. Para ler as
+consultas arquivadas, use `python manage.py dump-archive`.
+"""
+
+import asyncio
+import glob
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+from logs import get_logger
+from metrics import HANDLER_ERRORS
+from config import (
+    QUERY_ARCHIVE_BATCH_SIZE,
+    QUERY_ARCHIVE_DIR,
+    QUERY_ARCHIVE_INTERVAL,
+    QUERY_RETENTION_DAYS,
+)
+
+logger = get_logger(__name__)
+
+
+class QueryArchive:
+    def __init__(
+        self,
+        db,
+        archive_dir: str = QUERY_ARCHIVE_DIR,
+        retention_days: int = QUERY_RETENTION_DAYS,
+        batch_size: int = QUERY_ARCHIVE_BATCH_SIZE,
+    ):
+        """Inicializa o arquivamento das consultas do banco `db` (Database)"""
+        self.db = db
+        self.archive_dir = archive_dir
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+
+    def cutoff(self) -> str:
+        """Início (UTC) do dia mais antigo mantido na tabela queries"""
+        day = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        return day.strftime("%Y-%m-%d 00:00:00")
+
+    def path(self, month: str) -> str:
+        """Caminho do arquivo de um mês (AAAA-MM)"""
+        return os.path.join(self.archive_dir, f"queries-{month}.jsonl.gz")
+
+    def run(self) -> int:
+        """Arquiva as consultas fora da janela de retenção
+
+        Roda de forma síncrona (chame em uma thread); cada lote usa uma
+        leitura, uma escrita por mês tocado e uma transação de remoção.
+        Retorna quantas consultas foram arquivadas.
+        """
+        if self.retention_days <= 0:
+            return 0
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        cutoff = self.cutoff()
+        archived = 0
+
+        while True:
+            queries = self.db.get_queries_before(cutoff, self.batch_size)
+            if not queries:
+                break
+
+            self._append(queries)
+            deleted = self.db.delete_queries([query["id"] for query in queries])
+            archived += deleted
+
+            if deleted < len(queries) or len(queries) < self.batch_size:
+                break
+
+        if archived:
+            logger.info(
+                "%s consultas anteriores a %s arquivadas", archived, cutoff[:10]
+            )
+        return archived
+
+    def schedule(self, job_queue) -> None:
+        """Agenda run() a cada QUERY_ARCHIVE_INTERVAL segundos no JobQueue
+        do bot, se a retenção estiver ativa"""
+        if self.retention_days <= 0:
+            return
+        if job_queue is None:
+            logger.warning(
+                "JobQueue indisponível (instale python-telegram-bot[job-queue]); "
+                "arquivamento de consultas desativado"
+            )
+            return
+        job_queue.run_repeating(self._job, interval=QUERY_ARCHIVE_INTERVAL, first=60)
+
+    async def _job(self, context) -> None:
+        """Tarefa periódica: arquiva as consultas em uma thread, sem bloquear
+        os handlers"""
+        try:
+            await asyncio.to_thread(self.run)
+        except Exception as e:
+            HANDLER_ERRORS.inc("archive")
+            logger.error("Erro ao arquivar consultas: %s", e)
+
+    def _append(self, queries: List[Dict]) -> None:
+        """Anexa um lote aos arquivos mensais, um membro gzip por mês"""
+        months: Dict[str, List[str]] = {}
+        for query in queries:
+            line = json.dumps(query, ensure_ascii=False, separators=(",", ":"))
+            months.setdefault(query["created_at"][:7], []).append(line)
+
+        for month, lines in months.items():
+            with open(self.path(month), "ab") as file:
+                file.write(gzip.compress(("\n".join(lines) + "\n").encode()))
+                file.flush()
+                os.fsync(file.fileno())
+
+    def months(self) -> List[str]:
+        """Meses (AAAA-MM) com consultas arquivadas, em ordem"""
+        paths = glob.glob(os.path.join(self.archive_dir, "queries-*.jsonl.gz"))
+        return sorted(os.path.basename(path)[8:15] for path in paths)
+
+    def iter_queries(
+        self, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """Percorre as consultas arquivadas com since <= created_at < until"""
+        for month in self.months():
+            if since and month < since[:7]:
+                continue
+            if until and month > until[:7]:
+                break
+
+            seen = set()
+            with gzip.open(self.path(month), "rt", encoding="utf-8") as file:
+                for line in file:
+                    query = json.loads(line)
+                    if query["id"] in seen:
+                        continue
+                    seen.add(query["id"])
+
+                    if since and query["created_at"] < since:
+                        continue
+                    if until and query["created_at"] >= until:
+                        continue
+                    yield query
@@ -0,0 +1,124 @@
+"""
+Circuit breaker para o provedor de CEPs do CEPzinho
+
+Fechado, o circuito deixa as requisições passarem e acompanha as últimas
+BREAKER_WINDOW chamadas; uma chamada conta como falha se der erro (exceção,
+timeout, HTTP 5xx) ou demorar mais que BREAKER_SLOW_CALL segundos. Quando a
+taxa de falhas chega a BREAKER_FAILURE_RATE (com pelo menos
+BREAKER_MIN_CALLS chamadas), o circuito abre: as requisições falham na hora,
+sem esperar o provedor. Após BREAKER_OPEN_SECONDS, o circuito fica meio
+aberto e deixa passar uma requisição de teste; se ela funcionar o circuito
+fecha, senão volta a abrir.
+"""
+
+from collections import deque
+from time import monotonic
+from typing import Dict
+from logs import get_logger
+from config import (
+    BREAKER_FAILURE_RATE,
+    BREAKER_SLOW_CALL,
+    BREAKER_WINDOW,
+    BREAKER_MIN_CALLS,
+    BREAKER_OPEN_SECONDS,
+)
+
+logger = get_logger(__name__)
+
+CLOSED = "fechado"
+OPEN = "aberto"
+HALF_OPEN = "meio aberto"
+
+
+class CircuitOpenError(Exception):
+    """O circuito está aberto: a requisição nem chegou ao provedor"""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        slow_call: float = BREAKER_SLOW_CALL,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+    ):
+        """Inicializa o circuito (fechado) do provedor `name`"""
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._calls = deque(maxlen=window)  # True = falha
+        self._opened_at = 0.0
+        self._probing = False
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        """Indica se uma requisição pode ir ao provedor agora"""
+        if self.state == OPEN:
+            if monotonic() - self._opened_at < self.open_seconds:
+                self.stats["rejected"] += 1
+                return False
+            self._transition(HALF_OPEN)
+
+        if self.state == HALF_OPEN:
+            if self._probing:
+                self.stats["rejected"] += 1
+                return False
+            self._probing = True
+
+        return True
+
+    def record(self, success: bool, latency: float) -> None:
+        """Registra o resultado de uma requisição liberada por allow()"""
+        failed = not success or latency > self.slow_call
+
+        if self.state == HALF_OPEN:
+            self._probing = False
+            self._transition(OPEN if failed else CLOSED)
+            return
+
+        if self.state == CLOSED:
+            self._calls.append(failed)
+            if (
+                len(self._calls) >= self.min_calls
+                and self.current_failure_rate() >= self.failure_rate
+            ):
+                self._transition(OPEN)
+
+    def release(self) -> None:
+        """Libera uma requisição cancelada sem registrar resultado"""
+        if self.state == HALF_OPEN:
+            self._probing = False
+
+    def current_failure_rate(self) -> float:
+        """Fração de falhas nas últimas chamadas"""
+        return sum(self._calls) / len(self._calls) if self._calls else 0.0
+
+    def _transition(self, state: str) -> None:
+        previous, self.state = self.state, state
+
+        if state == OPEN:
+            self._opened_at = monotonic()
+            self.stats["opened"] += 1
+        if state == CLOSED:
+            self._calls.clear()
+
+        logger.warning(
+            "Circuito do provedor %s: %s -> %s (falhas recentes: %.0f%%)",
+            self.name,
+            previous,
+            state,
+            self.current_failure_rate() * 100,
+        )
+
+    def get_stats(self) -> Dict:
+        """Estado do circuito e contadores, para o /stats"""
+        return {
+            "breaker_state": self.state,
+            "failure_rate": self.current_failure_rate() * 100,
+            **self.stats,
+        }
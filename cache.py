@@ -0,0 +1,265 @@
+"""
+Cache de consultas de CEP do bot CEPzinho
+
+Dois níveis: um LRU em memória com TTL (por processo) e a tabela `cep_cache`
+do SQLite, que sobrevive a reinicializações do bot.
+
+Entradas vencidas continuam guardadas por mais `stale_ttl` segundos: lookup()
+as devolve marcadas como antigas, para o bot responder na hora enquanto
+atualiza o CEP em segundo plano (stale-while-revalidate) ou enquanto o
+provedor está fora do ar.
+
+Os dados ficam em memória como CepRecord, que guarda junto do registro as
+mensagens já formatadas (veja messages.render_cep): um acerto no cache
+devolve o mesmo objeto e as mensagens não são formatadas de novo.
+
+O SQLite não é acessado dentro do event loop: alookup() e apreload() leem o
+disco em uma thread (asyncio.to_thread) e a gravação vai para uma thread
+própria (uma só, para manter a ordem das gravações); flush() aguarda as
+pendentes. lookup() e preload() são as versões síncronas, para uso fora do
+event loop.
+"""
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+from typing import Dict, Optional, Set, Tuple
+from config import CACHE_MAX_ENTRIES, CACHE_TTL, CACHE_NEGATIVE_TTL, CACHE_STALE_TTL
+
+
+class CepRecord(dict):
+    """Dados de um CEP guardados no cache em memória
+
+    `rendered` (messages.RenderedCep) e `article` (resultado inline) são
+    preenchidos na primeira vez que o registro é formatado.
+    """
+
+    __slots__ = ("rendered", "article")
+
+    def __reduce__(self):
+        # Entre processos (workers) vai só o dicionário, sem as mensagens
+        return dict, (dict(self),)
+
+
+class CepCache:
+    def __init__(
+        self,
+        db=None,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: int = CACHE_TTL,
+        negative_ttl: int = CACHE_NEGATIVE_TTL,
+        stale_ttl: int = CACHE_STALE_TTL,
+    ):
+        """Inicializa o cache; `db` (Database) habilita o nível persistente"""
+        self.db = db
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._writes: Set[asyncio.Future] = set()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expired": 0,
+            "stale_hits": 0,
+        }
+
+    def get(self, cep: str) -> Optional[Dict]:
+        """Retorna os dados do CEP em cache ou None se ausente/expirado"""
+        found = self.lookup(cep, allow_stale=False)
+        return found[0] if found is not None else None
+
+    def lookup(self, cep: str, allow_stale: bool = True) -> Optional[Tuple[Dict, bool]]:
+        """Retorna (dados, antigo) ou None se ausente
+
+        `antigo` indica que o TTL venceu mas a entrada ainda está dentro da
+        janela `stale_ttl`; com allow_stale=False essas entradas contam como
+        expiradas.
+        """
+        now = time()
+        found = self._from_memory(cep, allow_stale, now)
+        if found is None and self.db is not None:
+            found = self._from_disk(cep, self.db.get_cached_cep(cep), allow_stale, now)
+        return self._count_miss(found)
+
+    async def alookup(
+        self, cep: str, allow_stale: bool = True
+    ) -> Optional[Tuple[Dict, bool]]:
+        """Versão de lookup() para o event loop: a leitura do disco roda em
+        uma thread"""
+        now = time()
+        found = self._from_memory(cep, allow_stale, now)
+        if found is None and self.db is not None:
+            cached = await asyncio.to_thread(self.db.get_cached_cep, cep)
+            found = self._from_disk(cep, self._newest(cep, cached), allow_stale, now)
+        return self._count_miss(found)
+
+    def preload(self, cep: str) -> bool:
+        """Deixa o CEP no LRU em memória, trazendo do disco se preciso
+
+        Usado pelo aquecimento do cache; não conta nas estatísticas. Retorna
+        False se o CEP não está em cache ou já venceu.
+        """
+        if self._is_fresh(cep):
+            return True
+        if self.db is None:
+            return False
+        return self._preload_from_disk(cep, self.db.get_cached_cep(cep))
+
+    async def apreload(self, cep: str) -> bool:
+        """Versão de preload() para o event loop: a leitura do disco roda em
+        uma thread"""
+        if self._is_fresh(cep):
+            return True
+        if self.db is None:
+            return False
+        cached = await asyncio.to_thread(self.db.get_cached_cep, cep)
+        return self._preload_from_disk(cep, self._newest(cep, cached))
+
+    def _from_memory(
+        self, cep: str, allow_stale: bool, now: float
+    ) -> Optional[Tuple[Dict, bool]]:
+        """Consulta o LRU em memória, descartando a entrada se já passou da
+        janela `stale_ttl`"""
+        entry = self._entries.get(cep)
+        if entry is None:
+            return None
+
+        expires_at, data = entry
+        if expires_at > now:
+            self._entries.move_to_end(cep)
+            self.stats["memory_hits"] += 1
+            return data, False
+
+        if allow_stale and expires_at + self.stale_ttl > now:
+            self._entries.move_to_end(cep)
+            self.stats["stale_hits"] += 1
+            return data, True
+
+        if expires_at + self.stale_ttl <= now:
+            del self._entries[cep]
+        self.stats["expired"] += 1
+        return None
+
+    def _from_disk(
+        self,
+        cep: str,
+        cached: Optional[Tuple[Dict, float]],
+        allow_stale: bool,
+        now: float,
+    ) -> Optional[Tuple[Dict, bool]]:
+        """Promove para a memória o (dados, expires_at) lido do SQLite"""
+        if cached is None:
+            return None
+
+        data, expires_at = cached
+        if expires_at > now:
+            self.stats["disk_hits"] += 1
+            return self._store(cep, data, expires_at), False
+
+        if allow_stale and expires_at + self.stale_ttl > now:
+            self.stats["stale_hits"] += 1
+            return self._store(cep, data, expires_at), True
+
+        self.stats["expired"] += 1
+        return None
+
+    def _count_miss(
+        self, found: Optional[Tuple[Dict, bool]]
+    ) -> Optional[Tuple[Dict, bool]]:
+        if found is None:
+            self.stats["misses"] += 1
+        return found
+
+    def _newest(
+        self, cep: str, cached: Optional[Tuple[Dict, float]]
+    ) -> Optional[Tuple[Dict, float]]:
+        """Entre o lido do disco e o que foi gravado em memória enquanto a
+        leitura rodava, fica o mais novo"""
+        entry = self._entries.get(cep)
+        if entry is not None and (cached is None or entry[0] >= cached[1]):
+            return entry[1], entry[0]
+        return cached
+
+    def _is_fresh(self, cep: str) -> bool:
+        entry = self._entries.get(cep)
+        return entry is not None and entry[0] > time()
+
+    def _preload_from_disk(
+        self, cep: str, cached: Optional[Tuple[Dict, float]]
+    ) -> bool:
+        if cached is None or cached[1] <= time():
+            return False
+        self._store(cep, *cached)
+        return True
+
+    def set(self, cep: str, data: Dict) -> "CepRecord":
+        """Armazena o resultado nos dois níveis; respostas de erro usam TTL menor
+
+        Retorna o registro guardado em memória, que deve ser o repassado
+        adiante para aproveitar as mensagens memoizadas.
+        """
+        ttl = self.negative_ttl if data.get("erro") else self.ttl
+        expires_at = time() + ttl
+
+        record = self._store(cep, data, expires_at)
+
+        if self.db is not None:
+            self._persist(cep, data, expires_at)
+
+        return record
+
+    def _persist(self, cep: str, data: Dict, expires_at: float) -> None:
+        """Grava no SQLite; com um event loop rodando, fora dele"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.db.set_cached_cep(cep, data, expires_at)
+            return
+
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(1, thread_name_prefix="cep-cache")
+        write = loop.run_in_executor(
+            self._writer, self.db.set_cached_cep, cep, data, expires_at
+        )
+        self._writes.add(write)
+        write.add_done_callback(self._writes.discard)
+
+    async def flush(self) -> None:
+        """Aguarda as gravações pendentes no SQLite e encerra a thread de
+        gravação (recriada na próxima gravação)"""
+        while self._writes:
+            await asyncio.gather(*self._writes)
+        if self._writer is not None:
+            self._writer.shutdown()
+            self._writer = None
+
+    def _store(self, cep: str, data: Dict, expires_at: float) -> "CepRecord":
+        """Insere no LRU em memória, descartando o item menos recente se cheio"""
+        record = data if isinstance(data, CepRecord) else CepRecord(data)
+        self._entries[cep] = (expires_at, record)
+        self._entries.move_to_end(cep)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+        return record
+
+    def get_stats(self) -> Dict:
+        """Retorna contadores de acertos, falhas e descartes do cache"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+
+        return {
+            **self.stats,
+            "hits": hits,
+            "hit_rate": (hits / lookups * 100) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
@@ -1,27 +1,682 @@
+import asyncio
+import re
+from abc import ABC, abstractmethod
+import threading
+from collections import deque
+from time import monotonic, perf_counter
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+from httpx import AsyncClient, Limits, Timeout
 from requests import get
-from logperformance import LogPerformance
-from config import CEP_API_URL
+from logs import get_logger
+from address_index import AddressIndex, fold
+from breaker import CLOSED, CircuitBreaker, CircuitOpenError
+from metrics import LOOKUP_SECONDS, UPSTREAM_REQUESTS, UPSTREAM_SECONDS
+from config import (
+    CEP_PATTERN,
+    CEP_API_URL,
+    ADDRESS_API_URL,
+    CEP_MIRROR_URL,
+    ADDRESS_MIRROR_URL,
+    BRASILAPI_CEP_URL,
+    CEP_PROVIDERS,
+    CEP_HEDGE,
+    CEP_HEDGE_DELAY,
+    CEP_LOCAL_FALLBACK,
+    HTTP_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_MAX_CONCURRENCY,
+    CEP_BATCH_CONCURRENCY,
+    CEP_BATCH_RATE,
+)
+
+logger = get_logger(__name__)
+
+# Amostras de latência guardadas por provedor e mínimo para usar o p95
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+
+
+class CepProvider(ABC):
+    """Provedor de CEPs; as subclasses traduzem as respostas para o formato do
+    ViaCEP, que é o que o restante do bot (format_cep_response, cache,
+    histórico) consome"""
+
+    name = "provedor"
+
+    def __init__(
+        self,
+        cep_url: str,
+        address_url: Optional[str] = None,
+        name: Optional[str] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """`address_url` ausente indica que o provedor não busca por endereço"""
+        self.name = name or self.name
+        self.cep_url = cep_url
+        self.address_url = address_url
+        self.breaker = breaker or CircuitBreaker(self.name)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @abstractmethod
+    def parse_cep(self, response) -> dict:
+        """Converte a resposta HTTP de uma consulta de CEP"""
+
+    def parse_address(self, response) -> list:
+        """Converte a resposta HTTP de uma busca por endereço; sem
+        `address_url` o provedor não busca por endereço e não acha nada"""
+        return []
+
+    def p95(self) -> Optional[float]:
+        """Latência p95 (segundos) das últimas respostas, se houver amostras"""
+        if len(self.latencies) < LATENCY_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def hedge_delay(self) -> float:
+        """Quanto esperar por este provedor antes de consultar o próximo"""
+        p95 = self.p95()
+        return CEP_HEDGE_DELAY if p95 is None else p95
+
+    def get_stats(self) -> dict:
+        """Estado do circuito e latência, para o /stats"""
+        p95 = self.p95()
+        return {
+            "name": self.name,
+            "p95": p95 * 1000 if p95 is not None else 0.0,
+            **self.breaker.get_stats(),
+        }
+
+
+class ViaCepProvider(CepProvider):
+    """ViaCEP ou um espelho com as mesmas rotas e o mesmo formato"""
+
+    name = "ViaCEP"
+
+    def parse_cep(self, response) -> dict:
+        return response.json()
+
+    def parse_address(self, response) -> list:
+        result = response.json()
+        return result if isinstance(result, list) else []
+
+
+class BrasilApiProvider(CepProvider):
+    """BrasilAPI (/api/cep/v1/{cep}); não tem busca por endereço"""
+
+    name = "BrasilAPI"
+
+    def parse_cep(self, response) -> dict:
+        # 404 (CEP inexistente) e 400 (CEP malformado) não têm endereço; os
+        # demais erros sobem para o circuit breaker e o próximo provedor
+        if 400 <= response.status_code < 500:
+            return {"erro": True}
+        response.raise_for_status()
+
+        data = response.json()
+        cep = re.sub(CEP_PATTERN, "", data.get("cep", ""))
+        return {
+            "cep": f"{cep[:5]}-{cep[5:]}",
+            "logradouro": data.get("street") or "",
+            "complemento": "",
+            "bairro": data.get("neighborhood") or "",
+            "localidade": data.get("city") or "",
+            "uf": data.get("state") or "",
+            "ibge": "",
+            "gia": "",
+            "ddd": "",
+            "siafi": "",
+        }
+
+
+def build_providers(names: str = CEP_PROVIDERS) -> List[CepProvider]:
+    """Monta a lista de provedores, em ordem de preferência, a partir de
+    nomes separados por vírgula (viacep, espelho, brasilapi)"""
+    factories = {
+        "viacep": lambda: ViaCepProvider(CEP_API_URL, ADDRESS_API_URL),
+        "espelho": lambda: ViaCepProvider(
+            CEP_MIRROR_URL, ADDRESS_MIRROR_URL or None, name="espelho"
+        ),
+        "brasilapi": lambda: BrasilApiProvider(BRASILAPI_CEP_URL),
+    }
+
+    choices = ", ".join(factories)
+    providers = []
+    for name in filter(None, (n.strip().lower() for n in names.split(","))):
+        if name not in factories:
+            raise ValueError(
+                f"Provedor de CEP desconhecido: {name} (opções: {choices})"
+            )
+        providers.append(factories[name]())
+    if not providers:
+        raise ValueError(f"Nenhum provedor de CEP configurado (opções: {choices})")
+    return providers
 
 
 class Cep:
+    # Provedores em ordem de preferência; o primeiro é o principal
+    providers: List[CepProvider] = build_providers()
+    hedge = CEP_HEDGE
+
+    # Sessão HTTP compartilhada por todas as instâncias (keep-alive + pool)
+    _client: Optional[AsyncClient] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+
+    # Requisições em andamento por chave normalizada (single-flight)
+    _inflight: Dict[tuple, asyncio.Task] = {}
+    upstream_stats = {
+        "requests": 0,
+        "coalesced": 0,
+        "stale_served": 0,
+        "hedged": 0,
+        "hedge_wins": 0,
+    }
+
+    # Próximo horário (monotonic) livre para uma consulta de lote: os lotes
+    # em andamento dividem o mesmo limite de requisições por segundo
+    _batch_next_start = 0.0
+
+    # Atualizações de cache em segundo plano (stale-while-revalidate)
+    _revalidating: set = set()
+
+    # Cache de CEPs compartilhado (CepCache), configurado pelo bot
+    cache = None
+
+    # Base local de CEPs (CepIndex); com ela o ViaCEP só é usado em caso de falta
+    local_index = None
+    local_fallback = CEP_LOCAL_FALLBACK
+
+    # Índice de endereços (AddressIndex) da base local, construído em uma
+    # thread na primeira busca por endereço; até ficar pronto, a busca vai ao
+    # provedor
+    address_index = None
+    _address_index_source = None
+    _address_index_lock = threading.Lock()
+
     def __init__(self, cep: str = None):
         self.cep = cep
 
     def get_cep(self) -> dict:
         """Busca informações de um CEP específico"""
-        LogPerformance().warning(f"Buscando CEP {self.cep}")
-        response = get(CEP_API_URL.format(cep=self.cep))
-        LogPerformance().warning(f"CEP {self.cep} encontrado: {response.json()}")
-        return response.json()
+        local = self._from_local()
+        if local is not None:
+            return local
+
+        cached = self._from_cache()
+        if cached is not None:
+            return cached
+
+        logger.debug("Buscando CEP %s", self.cep)
+        cep = self._cache_key()
+
+        def request(provider: CepProvider) -> dict:
+            response = self._request(provider, provider.cep_url.format(cep=cep))
+            return provider.parse_cep(response)
+
+        result = self._failover(self.providers, request)
+        logger.debug("CEP %s encontrado: %s", self.cep, result)
+
+        return self._to_cache(result)
 
     def search_address(self, uf: str, cidade: str, logradouro: str) -> list:
         """Busca CEPs por endereço"""
-        LogPerformance().warning(f"Buscando endereço: {logradouro}, {cidade}/{uf}")
+        start = perf_counter()
+        local = self._search_local(uf, cidade, logradouro)
+        if local is not None:
+            LOOKUP_SECONDS.observe(perf_counter() - start, "local_address")
+            return local
 
-        search_url = f"https://viacep.com.br/ws/{uf}/{cidade}/{logradouro}/json/"
+        logger.debug("Buscando endereço: %s, %s/%s", logradouro, cidade, uf)
 
-        response = get(search_url)
-        result = response.json()
+        def request(provider: CepProvider) -> list:
+            search_url = provider.address_url.format(
+                uf=uf, cidade=cidade, logradouro=logradouro
+            )
+            return provider.parse_address(self._request(provider, search_url))
 
-        LogPerformance().warning(f"Endereço encontrado: {len(result)} resultados")
-        return result if isinstance(result, list) else []
+        result = self._failover(self._address_providers(), request)
+
+        logger.debug("Endereço encontrado: %s resultados", len(result))
+        return result
+
+    async def aget_cep(self) -> dict:
+        """Busca informações de um CEP específico sem bloquear o event loop
+
+        Uma entrada vencida do cache é devolvida na hora e o CEP é atualizado
+        em segundo plano; com o circuito do provedor aberto, só o cache e a
+        base local respondem (CircuitOpenError se nenhum tiver o CEP).
+        """
+        start = perf_counter()
+        local = self._from_local()
+        if local is not None:
+            LOOKUP_SECONDS.observe(perf_counter() - start, "local")
+            return local
+
+        cached = await self.cache.alookup(self._cache_key()) if self.cache else None
+        if cached is not None:
+            data, stale = cached
+            if stale:
+                self.upstream_stats["stale_served"] += 1
+                self._revalidate()
+            LOOKUP_SECONDS.observe(perf_counter() - start, "cache")
+            return data
+
+        with LOOKUP_SECONDS.time("upstream"):
+            return await self._coalesce(("cep", self._cache_key()), self._afetch_cep)
+
+    @classmethod
+    async def aget_many(
+        cls,
+        ceps: Iterable[str],
+        concurrency: int = CEP_BATCH_CONCURRENCY,
+        rate: float = CEP_BATCH_RATE,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, Optional[dict]]:
+        """Busca vários CEPs de uma vez (ex.: /lote)
+
+        Os CEPs são normalizados e deduplicados; os que estão na base local
+        ou no cache são respondidos na hora e as faltas são consultadas no
+        provedor por `concurrency` tarefas, iniciando no máximo `rate`
+        requisições por segundo somando todos os lotes em andamento. Retorna {CEP (só dígitos): dados} na ordem
+        de entrada, com None para os CEPs cuja consulta falhou.
+        `on_progress(respondidos, total)` é chamado a cada CEP respondido.
+        """
+        keys = list(dict.fromkeys(cls(cep)._cache_key() for cep in ceps))
+        results: Dict[str, Optional[dict]] = dict.fromkeys(keys)
+        done = 0
+
+        def answer(key: str, data: Optional[dict]) -> None:
+            nonlocal done
+            results[key] = data
+            done += 1
+            if on_progress is not None:
+                on_progress(done, len(keys))
+
+        async def from_cache(cep: "Cep") -> Optional[dict]:
+            data = cep._from_local()
+            if data is None and cls.cache is not None:
+                cached = await cls.cache.alookup(cep.cep)
+                if cached is not None:
+                    data, stale = cached
+                    if stale:
+                        cls.upstream_stats["stale_served"] += 1
+                        cep._revalidate()
+            return data
+
+        ceps = [cls(key) for key in keys]
+        pending = deque()
+        for cep, data in zip(ceps, await asyncio.gather(*map(from_cache, ceps))):
+            if data is None:
+                pending.append(cep)
+            else:
+                answer(cep.cep, data)
+
+        misses = len(pending)
+        interval = 1 / rate if rate > 0 else 0.0
+
+        async def worker():
+            while pending:
+                cep = pending.popleft()
+                if interval:
+                    now = monotonic()
+                    start = max(cls._batch_next_start, now)
+                    cls._batch_next_start = start + interval
+                    if start > now:
+                        await asyncio.sleep(start - now)
+                try:
+                    data = await cep.aget_cep()
+                except Exception as e:
+                    logger.warning("Falha ao buscar CEP %s do lote: %r", cep.cep, e)
+                    data = None
+                answer(cep.cep, data)
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, misses))))
+        logger.debug("Lote de %s CEPs: %s consultados no provedor", len(keys), misses)
+        return results
+
+    @classmethod
+    def get_many(cls, ceps: Iterable[str], **kwargs) -> Dict[str, Optional[dict]]:
+        """Versão síncrona de aget_many, para scripts fora do event loop"""
+
+        async def run():
+            try:
+                return await cls.aget_many(ceps, **kwargs)
+            finally:
+                await cls.aclose()
+
+        return asyncio.run(run())
+
+    async def awarm(self) -> str:
+        """Carrega o CEP no cache (aquecimento) sem contar nas estatísticas
+
+        Retorna de onde o CEP veio: "local" (base local, que não usa o cache),
+        "cached" (já estava em cache) ou "fetched" (consultado no provedor).
+        """
+        if self._from_local() is not None:
+            return "local"
+        if self.cache is not None and await self.cache.apreload(self._cache_key()):
+            return "cached"
+
+        await self._coalesce(("cep", self._cache_key()), self._afetch_cep)
+        return "fetched"
+
+    def _revalidate(self) -> None:
+        """Atualiza o CEP no cache em segundo plano (stale-while-revalidate)"""
+        key = ("cep", self._cache_key())
+        if key in self._inflight:
+            return
+        if all(provider.breaker.state != CLOSED for provider in self.providers):
+            return
+
+        task = asyncio.ensure_future(self._coalesce(key, self._afetch_cep))
+        self._revalidating.add(task)
+        task.add_done_callback(self._end_revalidation)
+
+    @classmethod
+    def _end_revalidation(cls, task: asyncio.Task) -> None:
+        cls._revalidating.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                "Falha ao atualizar CEP em segundo plano: %r", task.exception()
+            )
+
+    async def _afetch_cep(self) -> dict:
+        """Consulta o CEP no provedor e guarda o resultado no cache"""
+        logger.debug("Buscando CEP %s", self.cep)
+        cep = self._cache_key()
+
+        async def request(provider: CepProvider) -> dict:
+            response = await self._arequest(provider, provider.cep_url.format(cep=cep))
+            return provider.parse_cep(response)
+
+        result = await self._ahedged(self.providers, request)
+        logger.debug("CEP %s encontrado: %s", self.cep, result)
+
+        return self._to_cache(result)
+
+    async def asearch_address(self, uf: str, cidade: str, logradouro: str) -> list:
+        """Busca CEPs por endereço sem bloquear o event loop"""
+        start = perf_counter()
+        local = self._search_local(uf, cidade, logradouro)
+        if local is not None:
+            LOOKUP_SECONDS.observe(perf_counter() - start, "local_address")
+            return local
+
+        async def request(provider: CepProvider) -> list:
+            search_url = provider.address_url.format(
+                uf=uf, cidade=cidade, logradouro=logradouro
+            )
+            return provider.parse_address(await self._arequest(provider, search_url))
+
+        async def fetch() -> list:
+            logger.debug("Buscando endereço: %s, %s/%s", logradouro, cidade, uf)
+            result = await self._ahedged(self._address_providers(), request)
+            logger.debug("Endereço encontrado: %s resultados", len(result))
+            return result
+
+        key = ("address", fold(uf), fold(cidade), fold(logradouro))
+        with LOOKUP_SECONDS.time("upstream_address"):
+            return await self._coalesce(key, fetch)
+
+    def _from_local(self) -> Optional[dict]:
+        """Consulta a base local; sem fallback, uma falta vira CEP inexistente"""
+        if self.local_index is None:
+            return None
+
+        record = self.local_index.get(self.cep)
+        if record is None and not self.local_fallback:
+            return {"erro": True}
+        return record
+
+    def _search_local(self, uf: str, cidade: str, logradouro: str) -> Optional[list]:
+        """Busca no índice de endereços; None indica que o ViaCEP deve ser consultado"""
+        address_index = self._get_address_index()
+        if address_index is None:
+            return None
+
+        result = address_index.search(uf, cidade, logradouro)
+        if not result and self.local_fallback:
+            return None
+        return result
+
+    @classmethod
+    def _get_address_index(cls) -> Optional[AddressIndex]:
+        """Retorna o índice de endereços; se ainda não existe, inicia sua
+        construção em segundo plano e retorna None"""
+        if cls.address_index is None and cls.local_index is not None:
+            with cls._address_index_lock:
+                if cls._address_index_source is not cls.local_index:
+                    cls._address_index_source = cls.local_index
+                    threading.Thread(
+                        target=cls._build_address_index,
+                        args=(cls.local_index,),
+                        name="cepzinho-address-index",
+                        daemon=True,
+                    ).start()
+        return cls.address_index
+
+    @classmethod
+    def _build_address_index(cls, local_index) -> None:
+        """Constrói o índice de endereços da base `local_index` (CepIndex)"""
+        try:
+            address_index = AddressIndex(local_index)
+        except Exception as e:
+            logger.error("Erro ao criar índice de endereços: %s", e)
+            return
+
+        if cls.local_index is local_index:
+            cls.address_index = address_index
+
+    def _cache_key(self) -> str:
+        """Normaliza o CEP para a chave do cache (apenas dígitos)"""
+        return re.sub(CEP_PATTERN, "", self.cep or "")
+
+    def _from_cache(self) -> Optional[dict]:
+        """Consulta o cache compartilhado, se configurado"""
+        if self.cache is None:
+            return None
+        return self.cache.get(self._cache_key())
+
+    def _to_cache(self, result: dict) -> dict:
+        """Armazena o resultado no cache compartilhado, se configurado, e
+        retorna o registro guardado (com as mensagens memoizadas)"""
+        if self.cache is not None and isinstance(result, dict):
+            return self.cache.set(self._cache_key(), result)
+        return result
+
+    @classmethod
+    async def _coalesce(cls, key: tuple, fetch: Callable[[], Awaitable]):
+        """Single-flight: chamadas concorrentes com a mesma chave compartilham
+        uma única requisição ao provedor
+
+        A requisição roda em uma tarefa própria, então cancelar um dos
+        chamadores (ex.: consulta inline substituída) não cancela os demais.
+        """
+        task = cls._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            cls.upstream_stats["requests"] += 1
+            task = asyncio.ensure_future(fetch())
+            cls._inflight[key] = task
+            task.add_done_callback(lambda done: cls._end_flight(key, done))
+        else:
+            cls.upstream_stats["coalesced"] += 1
+
+        return await asyncio.shield(task)
+
+    @classmethod
+    def _end_flight(cls, key: tuple, task: asyncio.Task) -> None:
+        """Remove a requisição concluída da tabela de requisições em andamento"""
+        if cls._inflight.get(key) is task:
+            del cls._inflight[key]
+        if not task.cancelled():
+            task.exception()  # marca a exceção como lida se nenhum chamador restou
+
+    @classmethod
+    def _get_client(cls) -> AsyncClient:
+        """Retorna a sessão HTTP assíncrona compartilhada, criando-a se necessário"""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = AsyncClient(
+                timeout=Timeout(HTTP_TIMEOUT),
+                limits=Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                ),
+            )
+            cls._semaphore = asyncio.Semaphore(HTTP_MAX_CONCURRENCY)
+        return cls._client
+
+    @classmethod
+    def _address_providers(cls) -> List[CepProvider]:
+        """Provedores que fazem busca por endereço"""
+        providers = [p for p in cls.providers if p.address_url]
+        if not providers:
+            raise ValueError("Nenhum provedor de CEP configurado busca por endereço")
+        return providers
+
+    @classmethod
+    async def _ahedged(
+        cls, providers: List[CepProvider], request: Callable[[CepProvider], Awaitable]
+    ):
+        """Consulta os provedores em ordem, com hedging
+
+        Se o provedor atual não responder dentro do p95 da sua latência, o
+        próximo também é consultado e vale a primeira resposta; em caso de
+        erro (ou circuito aberto) o próximo é consultado na hora.
+        """
+        remaining = list(providers)
+        pending: Dict[asyncio.Task, CepProvider] = {}
+        error: Optional[BaseException] = None
+
+        def start_next() -> None:
+            provider = remaining.pop(0)
+            if pending:
+                cls.upstream_stats["hedged"] += 1
+            pending[asyncio.ensure_future(request(provider))] = provider
+
+        start_next()
+        try:
+            while pending:
+                current = list(pending.values())[-1]
+                delay = current.hedge_delay() if cls.hedge and remaining else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        if provider is not providers[0]:
+                            cls.upstream_stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+                    logger.warning("Falha no provedor %s: %r", provider.name, error)
+
+                if remaining and (not done or not pending):
+                    start_next()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise error
+
+    @classmethod
+    def _failover(
+        cls, providers: List[CepProvider], request: Callable[[CepProvider], object]
+    ):
+        """Versão síncrona de _ahedged, sem hedging: consulta os provedores em
+        ordem até um responder"""
+        error: Optional[BaseException] = None
+        for provider in providers:
+            try:
+                return request(provider)
+            except Exception as e:
+                error = e
+                logger.warning("Falha no provedor %s: %r", provider.name, e)
+
+        raise error
+
+    @classmethod
+    def _request(cls, provider: CepProvider, url: str):
+        """Versão síncrona de _arequest, para scripts fora do event loop: o
+        mesmo circuit breaker e as mesmas métricas, com timeout de
+        HTTP_TIMEOUT segundos"""
+        cls._allow(provider)
+
+        start = perf_counter()
+        try:
+            response = get(url, timeout=HTTP_TIMEOUT)
+            if response.status_code >= 500:
+                response.raise_for_status()
+        except Exception:
+            cls._record(provider, perf_counter() - start, False)
+            raise
+
+        cls._record(provider, perf_counter() - start, True)
+        return response
+
+    @classmethod
+    async def _arequest(cls, provider: CepProvider, url: str):
+        """Faz um GET na sessão compartilhada respeitando o limite de concorrência
+
+        Erros, timeouts, HTTP 5xx e respostas lentas alimentam o circuit
+        breaker do provedor; com o circuito aberto a requisição falha sem ir
+        ao provedor.
+        """
+        cls._allow(provider)
+
+        client = cls._get_client()
+        try:
+            async with cls._semaphore:
+                start = perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code >= 500:
+                        response.raise_for_status()
+                except Exception:
+                    cls._record(provider, perf_counter() - start, False)
+                    raise
+        except asyncio.CancelledError:
+            # Cancelada na fila do semáforo ou durante o GET (ex.: a perna
+            # perdedora do hedge): libera a requisição de teste do circuito
+            provider.breaker.release()
+            raise
+
+        cls._record(provider, perf_counter() - start, True)
+        return response
+
+    @staticmethod
+    def _allow(provider: CepProvider) -> None:
+        """Falha na hora (CircuitOpenError) se o circuito do provedor está aberto"""
+        if not provider.breaker.allow():
+            UPSTREAM_REQUESTS.inc(provider.name, "rejected")
+            raise CircuitOpenError(f"Circuito do {provider.name} aberto")
+
+    @staticmethod
+    def _record(provider: CepProvider, latency: float, success: bool) -> None:
+        """Registra o resultado da requisição no circuito e nas métricas"""
+        provider.breaker.record(success, latency)
+        UPSTREAM_SECONDS.observe(latency, provider.name)
+        UPSTREAM_REQUESTS.inc(provider.name, "ok" if success else "error")
+        if success:
+            provider.latencies.append(latency)
+
+    @classmethod
+    def get_upstream_stats(cls) -> dict:
+        """Contadores das requisições e estado de cada provedor, para o /stats"""
+        return {
+            **cls.upstream_stats,
+            "providers": [provider.get_stats() for provider in cls.providers],
+        }
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Fecha a sessão HTTP compartilhada e aguarda as gravações do cache"""
+        for task in list(cls._revalidating):
+            task.cancel()
+        if cls.cache is not None:
+            await cls.cache.flush()
+        if cls._client is not None:
+            await cls._client.aclose()
+        cls._client = None
+        cls._semaphore = None
@@ -0,0 +1,184 @@
+"""
+Base local de CEPs do bot CEPzinho (modo offline)
+
+O arquivo é gerado uma única vez a partir de um CSV e depois aberto via mmap,
+então vários workers compartilham as mesmas páginas do page cache do sistema.
+
+Layout (little-endian):
+
+    cabeçalho  32 bytes   magic, versão, quantidade, tamanho do payload, crc32
+    chaves     4 * n      CEPs como inteiros de 8 dígitos, em ordem crescente
+    offsets    4 * (n+1)  início de cada registro no bloco de textos
+    textos     ...        campos UTF-8 separados por \\x1f
+
+A busca é uma busca binária sobre o vetor de chaves.
+"""
+
+import csv
+import mmap
+import os
+import re
+import struct
+import zlib
+from bisect import bisect_left
+from typing import Dict, Iterator, Optional
+from config import CEP_LENGTH, CEP_PATTERN
+
+MAGIC = b"CEPZIDX\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQI4x")
+
+# Campos do ViaCEP guardados no arquivo (o próprio CEP vem da chave)
+FIELDS = (
+    "logradouro",
+    "complemento",
+    "bairro",
+    "localidade",
+    "uf",
+    "ibge",
+    "gia",
+    "ddd",
+    "siafi",
+)
+SEPARATOR = "\x1f"
+
+
+class CepIndexError(Exception):
+    """Arquivo da base local inválido, corrompido ou de versão incompatível"""
+
+
+def format_cep(key: int) -> str:
+    """Converte a chave inteira no CEP formatado (ex: 01310-100)"""
+    digits = f"{key:08d}"
+    return f"{digits[:5]}-{digits[5:]}"
+
+
+def build_index(csv_path: str, output_path: str) -> int:
+    """Gera o arquivo da base local a partir de um CSV; retorna a quantidade de CEPs"""
+    records: Dict[int, bytes] = {}
+
+    with open(csv_path, newline="", encoding="utf-8") as csv_file:
+        for row in csv.DictReader(csv_file):
+            digits = re.sub(CEP_PATTERN, "", row.get("cep") or "")
+            if len(digits) != CEP_LENGTH:
+                continue
+
+            values = [(row.get(field) or "").strip() for field in FIELDS]
+            records[int(digits)] = SEPARATOR.join(values).encode("utf-8")
+
+    keys = sorted(records)
+    offsets = [0]
+    for key in keys:
+        offsets.append(offsets[-1] + len(records[key]))
+
+    payload = (
+        struct.pack(f"<{len(keys)}I", *keys)
+        + struct.pack(f"<{len(offsets)}I", *offsets)
+        + b"".join(records[key] for key in keys)
+    )
+    header = HEADER.pack(MAGIC, VERSION, len(keys), len(payload), zlib.crc32(payload))
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as output:
+        output.write(header)
+        output.write(payload)
+    os.replace(tmp_path, output_path)
+
+    return len(keys)
+
+
+class CepIndex:
+    def __init__(self, path: str, verify: bool = True):
+        """Abre a base local via mmap, validando cabeçalho e checksum"""
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise CepIndexError(f"Arquivo vazio: {path}")
+
+        try:
+            self._load(verify)
+        except Exception:
+            self.close()
+            raise
+
+    def _load(self, verify: bool) -> None:
+        if len(self._mmap) < HEADER.size:
+            raise CepIndexError(f"Arquivo truncado: {self.path}")
+
+        magic, version, count, payload_size, checksum = HEADER.unpack_from(
+            self._mmap, 0
+        )
+
+        if magic != MAGIC:
+            raise CepIndexError(f"Arquivo não é uma base de CEPs: {self.path}")
+        if version != VERSION:
+            raise CepIndexError(
+                f"Versão {version} da base não suportada (esperada {VERSION})"
+            )
+        if len(self._mmap) != HEADER.size + payload_size:
+            raise CepIndexError(f"Tamanho do arquivo inconsistente: {self.path}")
+        if verify and self._checksum(payload_size) != checksum:
+            raise CepIndexError(f"Checksum inválido: {self.path}")
+
+        keys_start = HEADER.size
+        offsets_start = keys_start + 4 * count
+        self._texts_start = offsets_start + 4 * (count + 1)
+
+        view = memoryview(self._mmap)
+        self._keys = view[keys_start:offsets_start].cast("I")
+        self._offsets = view[offsets_start : self._texts_start].cast("I")
+        self.count = count
+
+    def _checksum(self, payload_size: int, chunk: int = 1 << 20) -> int:
+        """Calcula o crc32 do payload em blocos, sem copiar o arquivo inteiro"""
+        crc = 0
+        position = HEADER.size
+        end = HEADER.size + payload_size
+        while position < end:
+            crc = zlib.crc32(self._mmap[position : min(position + chunk, end)], crc)
+            position += chunk
+        return crc
+
+    def record_at(self, position: int) -> Dict:
+        """Decodifica o registro na posição informada no formato do ViaCEP"""
+        start = self._texts_start + self._offsets[position]
+        end = self._texts_start + self._offsets[position + 1]
+        values = self._mmap[start:end].decode("utf-8").split(SEPARATOR)
+
+        record = {"cep": format_cep(self._keys[position])}
+        record.update(zip(FIELDS, values))
+        return record
+
+    def get(self, cep: str) -> Optional[Dict]:
+        """Busca um CEP (com ou sem máscara); retorna None se não existir"""
+        digits = re.sub(CEP_PATTERN, "", cep or "")
+        if len(digits) != CEP_LENGTH:
+            return None
+
+        key = int(digits)
+        position = bisect_left(self._keys, key)
+        if position < self.count and self._keys[position] == key:
+            return self.record_at(position)
+
+        return None
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Percorre todos os registros em ordem de CEP"""
+        for position in range(self.count):
+            yield self.record_at(position)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """Libera o mmap e o arquivo"""
+        for attr in ("_keys", "_offsets"):
+            view = getattr(self, attr, None)
+            if view is not None:
+                view.release()
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
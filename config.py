@@ -8,10 +8,128 @@ from dotenv import load_dotenv
 load_dotenv()
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org/bot")
 
-CEP_API_URL = "https://viacep.com.br/ws/{cep}/json/"
+# Modo de recebimento das atualizações: "polling" ou "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling")
 
-LOG_LEVEL = "INFO"
+# Webhook: o bot escuta em WEBHOOK_LISTEN:WEBHOOK_PORT/WEBHOOK_PATH e registra
+# WEBHOOK_URL/WEBHOOK_PATH no Telegram (normalmente atrás de um proxy HTTPS)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+
+# Processos worker que tratam as atualizações (0 = tudo em um único processo).
+# O processo principal recebe as atualizações e grava no banco; os workers
+# recebem as atualizações de cada chat sempre na mesma ordem
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "0"))
+
+# Provedores de CEP, em ordem de preferência: viacep, espelho (mirror interno
+# com as rotas do ViaCEP) e brasilapi (só consulta por CEP)
+CEP_PROVIDERS = os.getenv("CEP_PROVIDERS", "viacep")
+CEP_API_URL = os.getenv("CEP_API_URL", "https://viacep.com.br/ws/{cep}/json/")
+ADDRESS_API_URL = os.getenv(
+    "ADDRESS_API_URL", "https://viacep.com.br/ws/{uf}/{cidade}/{logradouro}/json/"
+)
+CEP_MIRROR_URL = os.getenv("CEP_MIRROR_URL", "")
+ADDRESS_MIRROR_URL = os.getenv("ADDRESS_MIRROR_URL", "")
+BRASILAPI_CEP_URL = os.getenv(
+    "BRASILAPI_CEP_URL", "https://brasilapi.com.br/api/cep/v1/{cep}"
+)
+
+# Hedging: se um provedor não responder dentro do p95 da sua latência, o
+# próximo também é consultado e vale a primeira resposta. CEP_HEDGE_DELAY
+# (segundos) é usado enquanto ainda não há amostras suficientes
+CEP_HEDGE = os.getenv("CEP_HEDGE", "True") == "True"
+CEP_HEDGE_DELAY = float(os.getenv("CEP_HEDGE_DELAY", "0.5"))
+
+# Cliente HTTP assíncrono (pool compartilhado entre todos os handlers)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_MAX_CONCURRENCY = int(os.getenv("HTTP_MAX_CONCURRENCY", "20"))
+
+# Banco de dados SQLite (conexões persistentes em modo WAL)
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+DB_BUSY_TIMEOUT = int(os.getenv("DB_BUSY_TIMEOUT", "5000"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+
+# Cache de CEPs (LRU em memória + tabela cep_cache no SQLite)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL = int(os.getenv("CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_NEGATIVE_TTL = int(os.getenv("CACHE_NEGATIVE_TTL", "3600"))
+# Por quanto tempo (segundos) após vencer uma entrada ainda pode ser servida
+# enquanto o CEP é atualizado em segundo plano ou o provedor está fora do ar
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", str(30 * 24 * 3600)))
+
+# Aquecimento do cache na inicialização: carrega os CACHE_WARMUP_TOP_N CEPs
+# mais consultados nos últimos CACHE_WARMUP_DAYS dias (0 desativa). O bot
+# espera no máximo CACHE_WARMUP_BUDGET segundos; o restante continua em
+# segundo plano enquanto as atualizações já são recebidas
+CACHE_WARMUP_TOP_N = int(os.getenv("CACHE_WARMUP_TOP_N", "1000"))
+CACHE_WARMUP_DAYS = int(os.getenv("CACHE_WARMUP_DAYS", "30"))
+CACHE_WARMUP_CONCURRENCY = int(os.getenv("CACHE_WARMUP_CONCURRENCY", "10"))
+CACHE_WARMUP_BUDGET = float(os.getenv("CACHE_WARMUP_BUDGET", "5"))
+
+# Circuit breaker do provedor de CEPs: abre quando BREAKER_FAILURE_RATE das
+# últimas BREAKER_WINDOW requisições falharam ou passaram de BREAKER_SLOW_CALL
+# segundos; aberto, responde só com cache/base local por BREAKER_OPEN_SECONDS
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL = float(os.getenv("BREAKER_SLOW_CALL", "2"))
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+# Base local de CEPs (modo offline), gerada com: python manage.py import-ceps
+CEP_LOCAL_DATASET = os.getenv("CEP_LOCAL_DATASET", "ceps.idx")
+CEP_LOCAL_FALLBACK = os.getenv("CEP_LOCAL_FALLBACK", "True") == "True"
+
+# Prazo total (segundos) para responder uma consulta inline
+INLINE_DEADLINE = float(os.getenv("INLINE_DEADLINE", "3"))
+
+# Espera (segundos) antes de processar uma consulta inline; consultas mais
+# novas do mesmo usuário dentro dessa janela cancelam a anterior
+INLINE_DEBOUNCE = float(os.getenv("INLINE_DEBOUNCE", "0.3"))
+
+# Gravação em lote do histórico de consultas (write-behind)
+QUERY_LOG_BATCH_SIZE = int(os.getenv("QUERY_LOG_BATCH_SIZE", "100"))
+QUERY_LOG_FLUSH_INTERVAL = float(os.getenv("QUERY_LOG_FLUSH_INTERVAL", "1"))
+QUERY_LOG_MAX_PENDING = int(os.getenv("QUERY_LOG_MAX_PENDING", "10000"))
+
+# Retenção do histórico: consultas com mais de QUERY_RETENTION_DAYS dias vão
+# para arquivos mensais compactados em QUERY_ARCHIVE_DIR (0 desativa)
+QUERY_RETENTION_DAYS = int(os.getenv("QUERY_RETENTION_DAYS", "90"))
+QUERY_ARCHIVE_DIR = os.getenv("QUERY_ARCHIVE_DIR", "archive")
+QUERY_ARCHIVE_INTERVAL = float(os.getenv("QUERY_ARCHIVE_INTERVAL", str(24 * 3600)))
+QUERY_ARCHIVE_BATCH_SIZE = int(os.getenv("QUERY_ARCHIVE_BATCH_SIZE", "5000"))
+
+# Consulta em lote (/lote e Cep.get_many): CEPs fora do cache e da base local
+# são consultados por CEP_BATCH_CONCURRENCY tarefas, com no máximo
+# CEP_BATCH_RATE requisições iniciadas por segundo (0 = sem limite)
+CEP_BATCH_CONCURRENCY = int(os.getenv("CEP_BATCH_CONCURRENCY", "10"))
+CEP_BATCH_RATE = float(os.getenv("CEP_BATCH_RATE", "20"))
+LOTE_MAX_CEPS = int(os.getenv("LOTE_MAX_CEPS", "1000"))
+LOTE_MAX_FILE_SIZE = int(os.getenv("LOTE_MAX_FILE_SIZE", str(1024 * 1024)))
+LOTE_PROGRESS_INTERVAL = float(os.getenv("LOTE_PROGRESS_INTERVAL", "2"))
+
+# Exportação do histórico (/export): consultas lidas do banco por lote e
+# tamanho máximo do arquivo enviado (limite de upload da Bot API)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_MAX_FILE_SIZE = int(os.getenv("EXPORT_MAX_FILE_SIZE", str(50 * 1024 * 1024)))
+
+# Nível mínimo das mensagens de log; abaixo dele nada é formatado
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Endpoint local das métricas (formato Prometheus) em
+# METRICS_LISTEN:METRICS_PORT/metrics (0 desativa)
+METRICS_LISTEN = os.getenv("METRICS_LISTEN", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+# Com workers, intervalo (segundos) entre os envios das métricas de cada
+# worker ao processo principal, que as soma às suas no endpoint
+METRICS_FORWARD_INTERVAL = float(os.getenv("METRICS_FORWARD_INTERVAL", "5"))
 
 CEP_LENGTH = 8
 CEP_PATTERN = r"[^\d]"
@@ -19,15 +137,15 @@ CEP_PATTERN = r"[^\d]"
 LOG_MESSAGES = {
     "start": "Iniciando o programa",
     "bot_started": "Bot iniciado e aguardando mensagens...",
-    "user_started": "Usuário {user_id} iniciou o bot",
-    "user_help": "Usuário {user_id} solicitou ajuda",
-    "user_message": "Usuário {user_id} enviou: {message}",
-    "cep_processed": "CEP {cep} processado com sucesso para usuário {user_id}",
-    "cep_error": "Erro ao processar CEP {cep}: {error}",
-    "address_processed": "Endereço '{address}' processado para usuário {user_id}",
-    "address_error": "Erro ao processar endereço '{address}': {error}",
-    "inline_query": "Consulta inline de usuário {user_id}: {query}",
-    "inline_cep_error": "Erro na consulta inline CEP: {error}",
-    "inline_address_error": "Erro na consulta inline endereço: {error}",
+    "user_started": "Usuário %(user_id)s iniciou o bot",
+    "user_help": "Usuário %(user_id)s solicitou ajuda",
+    "user_message": "Usuário %(user_id)s enviou: %(message)s",
+    "cep_processed": "CEP %(cep)s processado com sucesso para usuário %(user_id)s",
+    "cep_error": "Erro ao processar CEP %(cep)s: %(error)s",
+    "address_processed": "Endereço '%(address)s' processado para usuário %(user_id)s",
+    "address_error": "Erro ao processar endereço '%(address)s': %(error)s",
+    "inline_query": "Consulta inline de usuário %(user_id)s: %(query)s",
+    "inline_cep_error": "Erro na consulta inline CEP: %(error)s",
+    "inline_address_error": "Erro na consulta inline endereço: %(error)s",
     "token_error": "Token do Telegram não encontrado no arquivo .env",
 }
@@ -4,21 +4,392 @@ Sistema de banco de dados para o bot CEPzinho
 
 import sqlite3
 import json
-from datetime import datetime
-from typing import List, Dict, Optional
-from logperformance import LogPerformance
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from queue import Queue
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, List, Dict, Mapping, Optional, Tuple
+from logs import get_logger
+from metrics import DB_WRITE_SECONDS, timed
+from config import DB_READ_POOL_SIZE, DB_BUSY_TIMEOUT, DB_MMAP_SIZE
+
+logger = get_logger(__name__)
+
+# Recalcula os agregados diários (statistics*) a partir da tabela queries.
+# Dias anteriores à consulta mais antiga (já arquivados) são preservados.
+REBUILD_STATISTICS = [
+    "DELETE FROM statistics WHERE date >= (SELECT date(MIN(created_at)) FROM queries)",
+    """
+    DELETE FROM statistics_by_type
+    WHERE date >= (SELECT date(MIN(created_at)) FROM queries)
+    """,
+    """
+    DELETE FROM statistics_users
+    WHERE date >= (SELECT date(MIN(created_at)) FROM queries)
+    """,
+    """
+    INSERT INTO statistics_users (date, user_id)
+    SELECT DISTINCT date(created_at), user_id FROM queries
+    """,
+    """
+    INSERT INTO statistics_by_type (date, query_type, count)
+    SELECT date(created_at), query_type, COUNT(*) FROM queries GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO statistics (date, total_queries, successful_queries,
+                            failed_queries, unique_users)
+    SELECT date(created_at), COUNT(*), SUM(success = 1), SUM(success != 1),
+           COUNT(DISTINCT user_id)
+    FROM queries
+    GROUP BY 1
+    """,
+]
+
+
+def _is_cep_record(value: Any) -> bool:
+    """Indica se `value` é um registro de CEP resolvido (e não um erro)"""
+    return isinstance(value, dict) and "cep" in value and not value.get("erro")
+
+
+def _record_id(cursor: sqlite3.Cursor, record: Dict, record_ids: Dict[int, int]) -> int:
+    """Retorna o id do registro em cep_records, gravando-o se for novo
+
+    Registros idênticos são deduplicados pelo hash do JSON canônico;
+    `record_ids` guarda os hashes já resolvidos na mesma transação.
+    """
+    data = json.dumps(record, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    digest = int.from_bytes(
+        hashlib.blake2b(data.encode(), digest_size=8).digest(), "big", signed=True
+    )
+
+    if digest not in record_ids:
+        cursor.execute(
+            """
+            INSERT INTO cep_records (digest, data) VALUES (?, ?)
+            ON CONFLICT (digest) DO UPDATE SET digest = digest
+            RETURNING id
+        """,
+            (digest, data),
+        )
+        record_ids[digest] = cursor.fetchone()[0]
+
+    return record_ids[digest]
+
+
+def _encode_result(
+    cursor: sqlite3.Cursor, result_data: Optional[Dict], record_ids: Dict[int, int]
+) -> Tuple[Optional[str], Optional[str]]:
+    """Converte `result_data` em (result_ref, result_data) para a tabela queries
+
+    Um CEP vira o id do seu registro em cep_records e uma lista de endereços
+    (`{"results": [...]}`) vira a lista JSON dos ids. Qualquer outro formato é
+    gravado como JSON em result_data, como antes.
+    """
+    if not result_data:
+        return None, None
+
+    if _is_cep_record(result_data):
+        return str(_record_id(cursor, result_data, record_ids)), None
+
+    results = result_data.get("results") if isinstance(result_data, dict) else None
+    if (
+        list(result_data) == ["results"]
+        and isinstance(results, list)
+        and all(_is_cep_record(record) for record in results)
+    ):
+        ids = [_record_id(cursor, record, record_ids) for record in results]
+        return json.dumps(ids, separators=(",", ":")), None
+
+    return None, json.dumps(result_data)
+
+
+def _decode_result(ref: Any, records: Dict[int, Dict]) -> Optional[Dict]:
+    """Monta o result_data a partir de um result_ref e dos registros lidos"""
+    if isinstance(ref, int):
+        return records.get(ref)
+    return {"results": [records[i] for i in ref if i in records]}
+
+
+# Consultas convertidas por transação em _compact_result_data
+COMPACT_BATCH_SIZE = 1000
+
+
+def _compact_result_data(conn: sqlite3.Connection) -> None:
+    """Move o result_data em JSON das consultas antigas para cep_records
+
+    As consultas são percorridas em faixas de id de COMPACT_BATCH_SIZE linhas,
+    com um commit por faixa, para não carregar a tabela inteira na memória
+    nem segurar uma transação longa. Se for interrompida, a migração roda de
+    novo e só encontra as linhas que ainda não foram convertidas.
+    """
+    cursor = conn.cursor()
+    last_id = 0
+
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, result_data FROM queries
+            WHERE id > ? AND result_data IS NOT NULL
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, COMPACT_BATCH_SIZE),
+        ).fetchall()
+        if not rows:
+            break
+
+        record_ids: Dict[int, int] = {}
+        for query_id, result_data in rows:
+            result_ref, result_data = _encode_result(
+                cursor, json.loads(result_data), record_ids
+            )
+            if result_ref is not None:
+                cursor.execute(
+                    "UPDATE queries SET result_ref = ?, result_data = NULL WHERE id = ?",
+                    (result_ref, query_id),
+                )
+        conn.commit()
+        last_id = rows[-1][0]
+
+
+# Migrações do esquema, aplicadas em ordem. A versão já aplicada fica em
+# PRAGMA user_version; cada migração roda em uma única transação. Um passo
+# pode ser SQL ou uma função que recebe a conexão (para migrar dados); uma
+# função que confirma em lotes precisa poder ser executada de novo.
+MIGRATIONS = [
+    (
+        1,
+        "Índices de queries para consultas recentes, por usuário e estatísticas",
+        [
+            # get_recent_queries (ORDER BY created_at) e get_statistics
+            # (intervalo em created_at, cobrindo success/user_id/query_type)
+            """
+            CREATE INDEX IF NOT EXISTS idx_queries_created_at
+            ON queries (created_at, success, user_id, query_type)
+            """,
+            # get_user_queries (WHERE user_id ORDER BY created_at)
+            """
+            CREATE INDEX IF NOT EXISTS idx_queries_user_id_created_at
+            ON queries (user_id, created_at)
+            """,
+            # get_summary_users (GROUP BY user_id, cobrindo os nomes)
+            """
+            CREATE INDEX IF NOT EXISTS idx_queries_user_id_names
+            ON queries (user_id, user_name, user_full_name)
+            """,
+        ],
+    ),
+    (
+        2,
+        "Agregados diários por tipo de consulta e usuários únicos por dia",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS statistics_by_type (
+                date DATE NOT NULL,
+                query_type TEXT NOT NULL,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (date, query_type)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS statistics_users (
+                date DATE NOT NULL,
+                user_id INTEGER NOT NULL,
+                PRIMARY KEY (date, user_id)
+            ) WITHOUT ROWID
+            """,
+            *REBUILD_STATISTICS,
+        ],
+    ),
+    (
+        3,
+        "Registros de CEP deduplicados referenciados pelas consultas",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS cep_records (
+                id INTEGER PRIMARY KEY,
+                digest INTEGER NOT NULL UNIQUE,
+                data TEXT NOT NULL
+            )
+            """,
+            # Id do registro (CEP) ou lista JSON de ids (endereços)
+            "ALTER TABLE queries ADD COLUMN result_ref TEXT",
+        ],
+    ),
+    (
+        4,
+        "Compactação do result_data das consultas antigas em cep_records",
+        # Confirma em lotes (e pode ser retomada), por isso fica separada da
+        # criação da tabela e da coluna
+        [_compact_result_data],
+    ),
+]
+
+
+# Colunas de `queries` lidas por Database._decode_rows, nesta ordem
+QUERY_COLUMNS = (
+    "id, user_id, user_name, user_full_name, query_type, query_text, "
+    "result_ref, result_data, success, created_at"
+)
+
+
+def utc_now() -> str:
+    """Data/hora atual em UTC no mesmo formato de CURRENT_TIMESTAMP"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class QueryRecord(dict):
+    """Consulta do histórico cujo `result_data` só é lido e decodificado
+    quando acessado
+
+    Além do acesso à chave, qualquer operação que percorra a consulta inteira
+    (iteração, len, keys, items, values, dict(), json.dumps, comparação)
+    decodifica o result_data antes, para que ele nunca fique de fora.
+    """
+
+    def __init__(self, fields: Dict, load_result: Callable[[], Optional[Dict]]):
+        super().__init__(fields)
+        self._load_result = load_result
+
+    def _resolve(self) -> None:
+        """Decodifica o result_data, se ainda não foi decodificado"""
+        if self._load_result is not None:
+            load_result, self._load_result = self._load_result, None
+            super().__setitem__("result_data", load_result())
+
+    def __missing__(self, key: str) -> Any:
+        if key != "result_data" or self._load_result is None:
+            raise KeyError(key)
+        self._resolve()
+        return super().__getitem__(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "result_data":
+            self._load_result = None
+        super().__setitem__(key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return (
+            key == "result_data" and self._load_result is not None
+        ) or super().__contains__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def __iter__(self) -> Iterator[str]:
+        self._resolve()
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        self._resolve()
+        return super().__len__()
+
+    def keys(self):
+        self._resolve()
+        return super().keys()
+
+    def items(self):
+        self._resolve()
+        return super().items()
+
+    def values(self):
+        self._resolve()
+        return super().values()
+
+    def copy(self) -> Dict:
+        self._resolve()
+        return dict(super().items())
+
+    def __eq__(self, other: object) -> bool:
+        self._resolve()
+        if isinstance(other, QueryRecord):
+            other._resolve()
+        return super().__eq__(other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __repr__(self) -> str:
+        self._resolve()
+        return super().__repr__()
 
 
 class Database:
-    def __init__(self, db_path: str = "cepzinho.db"):
-        """Inicializa a conexão com o banco de dados"""
+    def __init__(
+        self,
+        db_path: str = "cepzinho.db",
+        read_pool_size: int = None,
+        read_only: bool = False,
+    ):
+        """Inicializa as conexões com o banco de dados
+
+        Mantém uma única conexão de escrita (serializada por lock) e um pequeno
+        pool de conexões de leitura, todas em modo WAL, para que leituras não
+        esperem por escritas.
+
+        Com `read_only`, abre só o pool de leitura (com PRAGMA query_only) e
+        não cria tabelas nem aplica migrações: o banco já deve ter sido
+        preparado por quem grava nele (ex.: os workers, cujo processo
+        principal é o único escritor).
+        """
         self.db_path = db_path
-        self._create_tables()
+        self.read_only = read_only
+        self._write_lock = threading.Lock()
+        self._writer = None if read_only else self._connect()
+        self._readers: Queue = Queue()
+        for _ in range(read_pool_size or DB_READ_POOL_SIZE):
+            self._readers.put(self._connect())
+        if not read_only:
+            self._create_tables()
+            self._migrate()
+        self._authorized: Mapping[int, str] = MappingProxyType({})
+        self._load_authorized_users()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre uma conexão de longa duração já configurada"""
+        conn = sqlite3.connect(
+            self.db_path, timeout=DB_BUSY_TIMEOUT / 1000, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT}")
+        conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+        if self.read_only:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Transação na conexão de escrita (commit ao sair, rollback em erro)"""
+        if self._writer is None:
+            raise sqlite3.OperationalError("Banco aberto somente para leitura")
+        with self._write_lock:
+            with self._writer:
+                yield self._writer
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """Empresta uma conexão do pool de leitura"""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def close(self) -> None:
+        """Fecha todas as conexões"""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
 
     def _create_tables(self):
         """Cria as tabelas necessárias"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._write() as conn:
                 cursor = conn.cursor()
 
                 # Tabela de consultas
@@ -68,12 +439,57 @@ class Database:
                 """
                 )
 
-                conn.commit()
-                LogPerformance().info("Tabelas do banco de dados criadas com sucesso")
+                # Cache persistente de CEPs consultados
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS cep_cache (
+                        cep TEXT PRIMARY KEY,
+                        data TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """
+                )
+
+                logger.info("Tabelas do banco de dados criadas com sucesso")
 
         except Exception as e:
-            LogPerformance().error(f"Erro ao criar tabelas: {e}")
+            logger.error("Erro ao criar tabelas: %s", e)
+
+    def schema_version(self) -> int:
+        """Retorna a versão do esquema (última migração aplicada)"""
+        with self._read() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
 
+    def _migrate(self) -> None:
+        """Aplica as migrações pendentes, cada uma em sua própria transação"""
+        current = self.schema_version()
+
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+
+            with self._write_lock:
+                conn = self._writer
+                try:
+                    conn.execute("BEGIN")
+                    for statement in statements:
+                        if callable(statement):
+                            statement(conn)
+                        else:
+                            conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {version}")
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(
+                        "Erro ao aplicar migração %s (%s): %s", version, description, e
+                    )
+                    raise
+
+            logger.info("Migração %s aplicada: %s", version, description)
+
+    @timed(DB_WRITE_SECONDS, "add_query")
     def add_query(
         self,
         user_id: int,
@@ -86,42 +502,165 @@ class Database:
     ) -> bool:
         """Adiciona uma nova consulta ao banco de dados"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-
-                cursor.execute(
-                    """
-                    INSERT INTO queries (user_id, user_name, user_full_name, query_type, 
-                                       query_text, result_data, success)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        user_id,
-                        user_name,
-                        user_full_name,
-                        query_type,
-                        query_text,
-                        json.dumps(result_data) if result_data else None,
-                        success,
-                    ),
+            with self._write() as conn:
+                self._insert_queries(
+                    conn.cursor(),
+                    [
+                        (
+                            user_id,
+                            user_name,
+                            user_full_name,
+                            query_type,
+                            query_text,
+                            result_data,
+                            success,
+                            utc_now(),
+                        )
+                    ],
                 )
 
-                conn.commit()
-                LogPerformance().info(
-                    f"Consulta salva no banco: {query_type} - {query_text}"
+                logger.debug("Consulta salva no banco: %s - %s", query_type, query_text)
+                return True
+
+        except Exception as e:
+            logger.error("Erro ao salvar consulta: %s", e)
+            return False
+
+    @timed(DB_WRITE_SECONDS, "add_queries")
+    def add_queries(self, queries: List[Tuple]) -> bool:
+        """Grava um lote de consultas em uma única transação
+
+        Cada item é (user_id, user_name, user_full_name, query_type, query_text,
+        result_data, success, created_at).
+        """
+        try:
+            with self._write() as conn:
+                self._insert_queries(conn.cursor(), queries)
+
+                logger.debug("Lote de %s consultas salvo no banco", len(queries))
+                return True
+
+        except Exception as e:
+            logger.error("Erro ao salvar lote de consultas: %s", e)
+            return False
+
+    def _insert_queries(self, cursor: sqlite3.Cursor, queries: List[Tuple]) -> None:
+        """Insere consultas, seus registros de CEP e atualiza os agregados"""
+        record_ids: Dict[int, int] = {}
+        rows = []
+
+        for (
+            user_id,
+            user_name,
+            user_full_name,
+            query_type,
+            query_text,
+            result_data,
+            success,
+            created_at,
+        ) in queries:
+            result_ref, result_data = _encode_result(cursor, result_data, record_ids)
+            rows.append(
+                (
+                    user_id,
+                    user_name,
+                    user_full_name,
+                    query_type,
+                    query_text,
+                    result_ref,
+                    result_data,
+                    success,
+                    created_at or utc_now(),
                 )
+            )
+
+        cursor.executemany(
+            """
+            INSERT INTO queries (user_id, user_name, user_full_name, query_type,
+                                 query_text, result_ref, result_data, success,
+                                 created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            rows,
+        )
+        self._update_rollups(cursor, [(row[0], row[3], row[7], row[8]) for row in rows])
+
+    def _update_rollups(self, cursor: sqlite3.Cursor, rows: List[Tuple]) -> None:
+        """Atualiza os agregados diários com novas consultas
+
+        Cada item é (user_id, query_type, success, created_at). Roda na mesma
+        transação da inserção em queries, então os agregados nunca divergem.
+        """
+        days: Dict[str, List[int]] = {}
+        types: Dict[Tuple[str, str], int] = {}
+        users: Dict[str, set] = {}
+
+        for user_id, query_type, success, created_at in rows:
+            date = created_at[:10]
+            totals = days.setdefault(date, [0, 0])
+            totals[0] += 1
+            totals[1] += 1 if success else 0
+            types[(date, query_type)] = types.get((date, query_type), 0) + 1
+            users.setdefault(date, set()).add(user_id)
+
+        new_users: Dict[str, int] = {}
+        for date, day_users in users.items():
+            cursor.executemany(
+                "INSERT OR IGNORE INTO statistics_users (date, user_id) VALUES (?, ?)",
+                [(date, user_id) for user_id in day_users],
+            )
+            new_users[date] = cursor.rowcount
+
+        cursor.executemany(
+            """
+            INSERT INTO statistics (date, total_queries, successful_queries,
+                                    failed_queries, unique_users)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (date) DO UPDATE SET
+                total_queries = total_queries + excluded.total_queries,
+                successful_queries = successful_queries + excluded.successful_queries,
+                failed_queries = failed_queries + excluded.failed_queries,
+                unique_users = unique_users + excluded.unique_users
+        """,
+            [
+                (date, total, successful, total - successful, new_users[date])
+                for date, (total, successful) in days.items()
+            ],
+        )
+
+        cursor.executemany(
+            """
+            INSERT INTO statistics_by_type (date, query_type, count)
+            VALUES (?, ?, ?)
+            ON CONFLICT (date, query_type) DO UPDATE SET
+                count = count + excluded.count
+        """,
+            [(date, query_type, count) for (date, query_type), count in types.items()],
+        )
+
+    def rebuild_statistics(self) -> bool:
+        """Recalcula todos os agregados diários a partir do histórico de consultas"""
+        try:
+            with self._write() as conn:
+                cursor = conn.cursor()
+
+                for statement in REBUILD_STATISTICS:
+                    cursor.execute(statement)
+
+                logger.info("Agregados diários recalculados")
                 return True
 
         except Exception as e:
-            LogPerformance().error(f"Erro ao salvar consulta: {e}")
+            logger.error("Erro ao recalcular agregados diários: %s", e)
             return False
 
+    @timed(DB_WRITE_SECONDS, "add_authorized_user")
     def add_authorized_user(
         self, user_id: int, user_name: str, user_full_name: str, role: str = "admin"
     ) -> bool:
         """Adiciona um usuário autorizado"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._write() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute(
@@ -132,41 +671,69 @@ class Database:
                     (user_id, user_name, user_full_name, role),
                 )
 
-                conn.commit()
-                LogPerformance().info(f"Usuário autorizado adicionado: {user_id}")
-                return True
+            logger.info("Usuário autorizado adicionado: %s", user_id)
+            self._load_authorized_users()
+            return True
 
         except Exception as e:
-            LogPerformance().error(f"Erro ao adicionar usuário autorizado: {e}")
+            logger.error("Erro ao adicionar usuário autorizado: %s", e)
             return False
 
-    def is_authorized(self, user_id: int) -> bool:
-        """Verifica se um usuário está autorizado"""
+    @timed(DB_WRITE_SECONDS, "remove_authorized_user")
+    def remove_authorized_user(self, user_id: int) -> bool:
+        """Remove um usuário autorizado; retorna False se ele não existir"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._write() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute(
-                    "SELECT id FROM authorized_users WHERE user_id = ?", (user_id,)
+                    "DELETE FROM authorized_users WHERE user_id = ?", (user_id,)
                 )
-                result = cursor.fetchone()
+                removed = cursor.rowcount > 0
 
-                return result is not None
+            if removed:
+                logger.info("Usuário autorizado removido: %s", user_id)
+                self._load_authorized_users()
+            return removed
 
         except Exception as e:
-            LogPerformance().error(f"Erro ao verificar autorização: {e}")
+            logger.error("Erro ao remover usuário autorizado: %s", e)
             return False
 
+    def _load_authorized_users(self) -> None:
+        """Carrega em memória o mapa user_id -> role dos usuários autorizados
+
+        O mapa é imutável e trocado por inteiro a cada alteração, então as
+        verificações de autorização não fazem I/O nem precisam de lock.
+        """
+        try:
+            with self._read() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("SELECT user_id, role FROM authorized_users")
+                self._authorized = MappingProxyType(dict(cursor.fetchall()))
+
+        except Exception as e:
+            logger.error("Erro ao carregar usuários autorizados: %s", e)
+
+    def is_authorized(self, user_id: int) -> bool:
+        """Verifica se um usuário está autorizado (em memória, O(1))"""
+        return user_id in self._authorized
+
+    def get_role(self, user_id: int) -> Optional[str]:
+        """Retorna o papel de um usuário autorizado, ou None"""
+        return self._authorized.get(user_id)
+
     def get_recent_queries(self, limit: int = 50) -> List[Dict]:
         """Retorna as consultas mais recentes"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._read() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute(
                     """
                     SELECT user_id, user_name, user_full_name, query_type, query_text, 
-                           result_data, success, created_at
+                           result_ref, result_data, success, created_at
                     FROM queries 
                     ORDER BY created_at DESC 
                     LIMIT ?
@@ -177,33 +744,36 @@ class Database:
                 results = []
                 for row in cursor.fetchall():
                     results.append(
-                        {
-                            "user_id": row[0],
-                            "user_name": row[1],
-                            "user_full_name": row[2],
-                            "query_type": row[3],
-                            "query_text": row[4],
-                            "result_data": json.loads(row[5]) if row[5] else None,
-                            "success": bool(row[6]),
-                            "created_at": row[7],
-                        }
+                        QueryRecord(
+                            {
+                                "user_id": row[0],
+                                "user_name": row[1],
+                                "user_full_name": row[2],
+                                "query_type": row[3],
+                                "query_text": row[4],
+                                "success": bool(row[7]),
+                                "created_at": row[8],
+                            },
+                            self._result_loader(row[5], row[6]),
+                        )
                     )
 
                 return results
 
         except Exception as e:
-            LogPerformance().error(f"Erro ao buscar consultas recentes: {e}")
+            logger.error("Erro ao buscar consultas recentes: %s", e)
             return []
 
     def get_user_queries(self, user_id: int, limit: int = 20) -> List[Dict]:
         """Retorna as consultas de um usuário específico"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._read() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute(
                     """
-                    SELECT query_type, query_text, result_data, success, created_at
+                    SELECT query_type, query_text, result_ref, result_data, success,
+                           created_at
                     FROM queries 
                     WHERE user_id = ?
                     ORDER BY created_at DESC 
@@ -215,52 +785,233 @@ class Database:
                 results = []
                 for row in cursor.fetchall():
                     results.append(
-                        {
-                            "query_type": row[0],
-                            "query_text": row[1],
-                            "result_data": json.loads(row[2]) if row[2] else None,
-                            "success": bool(row[3]),
-                            "created_at": row[4],
-                        }
+                        QueryRecord(
+                            {
+                                "query_type": row[0],
+                                "query_text": row[1],
+                                "success": bool(row[4]),
+                                "created_at": row[5],
+                            },
+                            self._result_loader(row[2], row[3]),
+                        )
                     )
 
                 return results
 
         except Exception as e:
-            LogPerformance().error(f"Erro ao buscar consultas do usuário: {e}")
+            logger.error("Erro ao buscar consultas do usuário: %s", e)
+            return []
+
+    def _result_loader(
+        self, result_ref: Optional[str], result_data: Optional[str]
+    ) -> Callable[[], Optional[Dict]]:
+        """Cria a função que decodifica o result_data de uma consulta"""
+        if result_ref is None:
+            return lambda: json.loads(result_data) if result_data else None
+        return lambda: self._load_result(json.loads(result_ref))
+
+    def _load_result(self, ref: Any) -> Optional[Dict]:
+        """Reconstrói o result_data a partir dos ids em cep_records"""
+        ids = [ref] if isinstance(ref, int) else ref
+        try:
+            records = self._load_records(ids)
+        except Exception as e:
+            logger.error("Erro ao carregar resultado da consulta: %s", e)
+            return None
+
+        return _decode_result(ref, records)
+
+    def _load_records(
+        self, ids: List[int], conn: Optional[sqlite3.Connection] = None
+    ) -> Dict[int, Dict]:
+        """Lê e decodifica os registros de cep_records com os ids dados
+
+        Sem `conn`, empresta uma conexão do pool de leitura.
+        """
+        if conn is None:
+            with self._read() as conn:
+                return self._load_records(ids, conn)
+
+        ids = list(set(ids))
+        records = {}
+        cursor = conn.cursor()
+
+        for chunk in range(0, len(ids), 500):
+            batch = ids[chunk : chunk + 500]
+            cursor.execute(
+                "SELECT id, data FROM cep_records WHERE id IN (%s)"
+                % ",".join("?" * len(batch)),
+                batch,
+            )
+            for record_id, data in cursor.fetchall():
+                records[record_id] = json.loads(data)
+
+        return records
+
+    def _decode_rows(
+        self, rows: List[Tuple], conn: Optional[sqlite3.Connection] = None
+    ) -> List[Dict]:
+        """Monta as consultas completas a partir de linhas de `queries`
+        (colunas de QUERY_COLUMNS), com uma única leitura de cep_records"""
+        refs = {row[0]: json.loads(row[6]) for row in rows if row[6] is not None}
+        ids = [
+            i for ref in refs.values() for i in ([ref] if isinstance(ref, int) else ref)
+        ]
+        records = self._load_records(ids, conn) if ids else {}
+
+        results = []
+        for row in rows:
+            if row[0] in refs:
+                result_data = _decode_result(refs[row[0]], records)
+            else:
+                result_data = json.loads(row[7]) if row[7] else None
+
+            results.append(
+                {
+                    "id": row[0],
+                    "user_id": row[1],
+                    "user_name": row[2],
+                    "user_full_name": row[3],
+                    "query_type": row[4],
+                    "query_text": row[5],
+                    "result_data": result_data,
+                    "success": bool(row[8]),
+                    "created_at": row[9],
+                }
+            )
+        return results
+
+    def get_queries_before(self, before: str, limit: int) -> List[Dict]:
+        """Retorna as consultas mais antigas que `before` (UTC), em ordem
+
+        O result_data já vem resolvido, com uma única leitura de cep_records
+        para todo o lote.
+        """
+        try:
+            with self._read() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(
+                    f"""
+                    SELECT {QUERY_COLUMNS}
+                    FROM queries
+                    WHERE created_at < ?
+                    ORDER BY created_at
+                    LIMIT ?
+                """,
+                    (before, limit),
+                )
+                rows = cursor.fetchall()
+
+            return self._decode_rows(rows)
+
+        except Exception as e:
+            logger.error("Erro ao buscar consultas antigas: %s", e)
             return []
 
+    def iter_queries(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        user_id: Optional[int] = None,
+        query_type: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict]:
+        """Percorre as consultas com since <= created_at < until, em ordem,
+        opcionalmente de um usuário e/ou de um tipo
+
+        As linhas são lidas do cursor em lotes de `batch_size` (fetchmany),
+        cada lote com uma leitura de cep_records, então a memória usada não
+        depende do total de consultas. A conexão de leitura fica emprestada
+        até o fim da iteração; erros são propagados.
+        """
+        conditions, params = [], []
+        for condition, value in (
+            ("created_at >= ?", since),
+            ("created_at < ?", until),
+            ("user_id = ?", user_id),
+            ("query_type = ?", query_type),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._read() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {QUERY_COLUMNS} FROM queries {where} ORDER BY created_at, id",
+                params,
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from self._decode_rows(rows, conn)
+
+    @timed(DB_WRITE_SECONDS, "delete_queries")
+    def delete_queries(self, ids: List[int]) -> int:
+        """Remove consultas pelo id; retorna quantas foram removidas
+
+        Os agregados diários e os registros de cep_records são mantidos.
+        """
+        try:
+            with self._write() as conn:
+                cursor = conn.cursor()
+
+                cursor.executemany(
+                    "DELETE FROM queries WHERE id = ?", [(i,) for i in ids]
+                )
+                return cursor.rowcount
+
+        except Exception as e:
+            logger.error("Erro ao remover consultas: %s", e)
+            return 0
+
     def get_statistics(self, days: int = 7) -> Dict:
-        """Retorna estatísticas dos últimos dias"""
+        """Retorna estatísticas dos últimos dias (incluindo hoje)
+
+        Lê apenas os agregados diários; usuários únicos do período vêm da
+        união dos conjuntos diários de statistics_users.
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._read() as conn:
                 cursor = conn.cursor()
+                since = (f"-{days} days",)
 
                 # Total de consultas
                 cursor.execute(
                     """
-                    SELECT COUNT(*) as total, 
-                           SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful,
-                           COUNT(DISTINCT user_id) as unique_users
-                    FROM queries 
-                    WHERE created_at >= datetime('now', '-{} days')
-                """.format(
-                        days
-                    )
+                    SELECT SUM(total_queries), SUM(successful_queries)
+                    FROM statistics
+                    WHERE date > date('now', ?)
+                """,
+                    since,
                 )
 
                 stats = cursor.fetchone()
 
+                # Usuários únicos no período
+                cursor.execute(
+                    """
+                    SELECT COUNT(DISTINCT user_id)
+                    FROM statistics_users
+                    WHERE date > date('now', ?)
+                """,
+                    since,
+                )
+
+                unique_users = cursor.fetchone()[0]
+
                 # Consultas por tipo
                 cursor.execute(
                     """
-                    SELECT query_type, COUNT(*) as count
-                    FROM queries 
-                    WHERE created_at >= datetime('now', '-{} days')
+                    SELECT query_type, SUM(count)
+                    FROM statistics_by_type
+                    WHERE date > date('now', ?)
                     GROUP BY query_type
-                """.format(
-                        days
-                    )
+                """,
+                    since,
                 )
 
                 query_types = dict(cursor.fetchall())
@@ -269,19 +1020,61 @@ class Database:
                     "total_queries": stats[0] or 0,
                     "successful_queries": stats[1] or 0,
                     "failed_queries": (stats[0] or 0) - (stats[1] or 0),
-                    "unique_users": stats[2] or 0,
+                    "unique_users": unique_users or 0,
                     "query_types": query_types,
                     "period_days": days,
                 }
 
         except Exception as e:
-            LogPerformance().error(f"Erro ao buscar estatísticas: {e}")
+            logger.error("Erro ao buscar estatísticas: %s", e)
             return {}
 
+    def get_top_ceps(self, limit: int, days: int) -> Tuple[List[Tuple[str, int]], int]:
+        """Retorna os `limit` CEPs mais consultados nos últimos `days` dias
+        como (cep, consultas), e o total de consultas de CEP do período
+
+        O texto digitado é normalizado (sem hífen, ponto ou espaço) para que
+        "01310-100" e "01310100" contem como o mesmo CEP.
+        """
+        try:
+            with self._read() as conn:
+                cursor = conn.cursor()
+                since = (f"-{days} days",)
+
+                cursor.execute(
+                    """
+                    SELECT replace(replace(replace(query_text, '-', ''), '.', ''),
+                                   ' ', '') AS cep,
+                           COUNT(*)
+                    FROM queries
+                    WHERE created_at >= datetime('now', ?) AND query_type = 'cep'
+                          AND success = 1
+                    GROUP BY cep
+                    ORDER BY 2 DESC
+                    LIMIT ?
+                """,
+                    since + (limit,),
+                )
+                top = cursor.fetchall()
+
+                cursor.execute(
+                    """
+                    SELECT COUNT(*) FROM queries
+                    WHERE created_at >= datetime('now', ?) AND query_type = 'cep'
+                """,
+                    since,
+                )
+
+                return top, cursor.fetchone()[0]
+
+        except Exception as e:
+            logger.error("Erro ao buscar CEPs mais consultados: %s", e)
+            return [], 0
+
     def get_authorized_users(self) -> List[Dict]:
         """Retorna lista de usuários autorizados"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._read() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute(
@@ -307,13 +1100,54 @@ class Database:
                 return results
 
         except Exception as e:
-            LogPerformance().error(f"Erro ao buscar usuários autorizados: {e}")
+            logger.error("Erro ao buscar usuários autorizados: %s", e)
             return []
 
+    def get_cached_cep(self, cep: str) -> Optional[Tuple[Dict, float]]:
+        """Retorna (dados, expires_at) de um CEP do cache persistente"""
+        try:
+            with self._read() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(
+                    "SELECT data, expires_at FROM cep_cache WHERE cep = ?", (cep,)
+                )
+                row = cursor.fetchone()
+
+                if row is None:
+                    return None
+
+                return json.loads(row[0]), row[1]
+
+        except Exception as e:
+            logger.error("Erro ao buscar CEP no cache: %s", e)
+            return None
+
+    @timed(DB_WRITE_SECONDS, "set_cached_cep")
+    def set_cached_cep(self, cep: str, data: Dict, expires_at: float) -> bool:
+        """Grava (ou substitui) um CEP no cache persistente"""
+        try:
+            with self._write() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(
+                    """
+                    INSERT OR REPLACE INTO cep_cache (cep, data, expires_at)
+                    VALUES (?, ?, ?)
+                """,
+                    (cep, json.dumps(data), expires_at),
+                )
+
+                return True
+
+        except Exception as e:
+            logger.error("Erro ao salvar CEP no cache: %s", e)
+            return False
+
     def get_summary_users(self) -> List[Dict]:
         """Retorna resumo de usuários"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._read() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute(
@@ -336,5 +1170,5 @@ class Database:
                     )
                 return results
         except Exception as e:
-            LogPerformance().error(f"Erro ao buscar resumo de usuários: {e}")
+            logger.error("Erro ao buscar resumo de usuários: %s", e)
             return [{}]
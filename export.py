@@ -0,0 +1,119 @@
+"""
+Exportação do histórico de consultas do CEPzinho (/export)
+
+As consultas são lidas do banco em lotes (Database.iter_queries) e escritas
+aos poucos em um arquivo compactado com gzip, em CSV ou NDJSON (uma consulta
+JSON por linha, o mesmo formato do arquivamento). A memória usada não depende
+do número de consultas exportadas.
+"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Dict, List, Optional
+from config import EXPORT_BATCH_SIZE
+
+FORMATS = ("csv", "ndjson")
+
+# Mesmo formato de created_at (UTC)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Colunas do CSV; result_data vai como JSON
+FIELDS = (
+    "id",
+    "created_at",
+    "user_id",
+    "user_name",
+    "user_full_name",
+    "query_type",
+    "query_text",
+    "success",
+    "result_data",
+)
+
+
+def export_queries(
+    db,
+    file: BinaryIO,
+    fmt: str = "csv",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    user_id: Optional[int] = None,
+    query_type: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> int:
+    """Escreve em `file` (binário) as consultas do banco `db` (Database)
+    filtradas, compactadas com gzip; retorna quantas foram exportadas
+
+    Roda de forma síncrona (chame em uma thread). O arquivo não é fechado.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+    queries = db.iter_queries(since, until, user_id, query_type, batch_size)
+    count = 0
+
+    with gzip.GzipFile(fileobj=file, mode="wb") as compressed:
+        text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+        if fmt == "csv":
+            writer = csv.DictWriter(text, FIELDS)
+            writer.writeheader()
+            for query in queries:
+                result_data = query["result_data"]
+                query["result_data"] = (
+                    json.dumps(result_data, ensure_ascii=False)
+                    if result_data is not None
+                    else ""
+                )
+                writer.writerow(query)
+                count += 1
+        else:
+            for query in queries:
+                text.write(json.dumps(query, ensure_ascii=False, separators=(",", ":")))
+                text.write("\n")
+                count += 1
+
+        text.flush()
+        text.detach()  # o GzipFile é fechado pelo with, não pelo TextIOWrapper
+
+    return count
+
+
+def parse_filters(args: List[str]) -> Dict:
+    """Converte os argumentos do /export (chave=valor) nos parâmetros de
+    export_queries; ValueError se algum for inválido
+
+    Chaves: desde=AAAA-MM-DD, ate=AAAA-MM-DD (inclusive), dias=N,
+    usuario=ID, tipo=TIPO e formato=csv|ndjson.
+    """
+    options: Dict = {"fmt": "csv"}
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Argumento inválido: {arg}")
+
+        key = key.lower()
+        if key == "desde":
+            options["since"] = _day(value).strftime(TIMESTAMP_FORMAT)
+        elif key == "ate":
+            options["until"] = (_day(value) + timedelta(days=1)).strftime(
+                TIMESTAMP_FORMAT
+            )
+        elif key == "dias":
+            since = datetime.now(timezone.utc) - timedelta(days=int(value))
+            options["since"] = since.strftime(TIMESTAMP_FORMAT)
+        elif key == "usuario":
+            options["user_id"] = int(value)
+        elif key == "tipo":
+            options["query_type"] = value
+        elif key == "formato" and value.lower() in FORMATS:
+            options["fmt"] = value.lower()
+        else:
+            raise ValueError(f"Argumento inválido: {arg}")
+    return options
+
+
+def _day(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
@@ -4,7 +4,9 @@ Script para inicializar o banco de dados do CEPzinho
 """
 
 from database import Database
-from logperformance import LogPerformance
+from logs import get_logger
+
+logger = get_logger(__name__)
 
 
 def init_database():
@@ -57,7 +59,7 @@ def init_database():
 
     except Exception as e:
         print(f"❌ Erro ao inicializar banco de dados: {e}")
-        LogPerformance().error(f"Erro ao inicializar banco de dados: {e}")
+        logger.error("Erro ao inicializar banco de dados: %s", e)
 
 
 def show_help():
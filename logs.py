@@ -0,0 +1,81 @@
+"""
+Logging do CEPzinho
+
+Cada módulo cria seu logger uma única vez (`logger = get_logger(__name__)`)
+e registra mensagens com formatação preguiçosa
+(`logger.debug("CEP %s encontrado: %s", cep, dados)`): o nível é conferido
+antes de qualquer formatação, então mensagens abaixo de LOG_LEVEL custam só
+uma comparação.
+
+As mensagens passam por uma fila (QueueHandler) e são escritas no console e
+no arquivo de log (os mesmos handlers do LogPerformance) por uma thread
+própria (QueueListener), fora do event loop.
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+from logperformance import LogPerformance
+from config import LOG_LEVEL
+
+ROOT = "cepzinho"
+
+# Prefixos usados pelo LogPerformance, mantidos para o log continuar igual
+PREFIXES = {logging.INFO: "🙂 ", logging.ERROR: "❗ "}
+
+_listener: Optional[QueueListener] = None
+
+
+class _PrefixHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Formata a mensagem (na thread de quem registrou) com o prefixo do nível"""
+        record = super().prepare(record)
+        record.msg = PREFIXES.get(record.levelno, "") + record.msg
+        return record
+
+
+def setup(
+    handlers: Optional[List[logging.Handler]] = None, level: str = LOG_LEVEL
+) -> QueueListener:
+    """Configura o logger raiz do CEPzinho com a fila e a thread de escrita
+
+    Sem `handlers`, usa o console colorido e o arquivo configurados pelo
+    LogPerformance. Pode ser chamado de novo (ex.: benchmarks) para trocar os
+    handlers.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    if handlers is None:
+        handlers = list(LogPerformance().logger.handlers)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger(ROOT)
+    root.handlers = [_PrefixHandler(log_queue)]
+    root.setLevel(level)
+    root.propagate = False
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown() -> None:
+    """Escreve as mensagens pendentes e encerra a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger de um módulo, filho do logger raiz do CEPzinho"""
+    if _listener is None:
+        setup()
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+atexit.register(shutdown)
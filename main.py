@@ -1,13 +1,20 @@
-from logperformance import LogPerformance
+from logs import get_logger
 from cep import Cep
 from telegram import Update, InlineQueryResultArticle, InputTextMessageContent
+from telegram.error import TelegramError
 from telegram.ext import (
     Application,
     CommandHandler,
     InlineQueryHandler,
+    MessageHandler,
     ContextTypes,
+    filters,
 )
+import asyncio
+import os
 import re
+import tempfile
+from time import perf_counter
 from functools import wraps
 from messages import (
     WELCOME_MESSAGE,
@@ -18,31 +25,69 @@ from messages import (
     CEP_USAGE_MESSAGE,
     RUA_USAGE_MESSAGE,
     INLINE_QUERY_PLACEHOLDER,
-    INLINE_RESULT_TITLE_CEP,
     INLINE_RESULT_TITLE_ADDRESS,
-    INLINE_RESULT_DESCRIPTION_CEP,
     INLINE_RESULT_DESCRIPTION_ADDRESS,
     INLINE_NO_RESULTS,
     NOT_AUTHORIZED_MESSAGE,
     ADMIN_HELP_MESSAGE,
     USER_ADDED_MESSAGE,
     USER_REMOVED_MESSAGE,
+    USER_NOT_FOUND_MESSAGE,
+    LOTE_USAGE_MESSAGE,
+    LOTE_TOO_MANY_MESSAGE,
+    LOTE_FILE_TYPE_MESSAGE,
+    LOTE_FILE_TOO_LARGE_MESSAGE,
+    LOTE_PROGRESS_MESSAGE,
+    LOTE_DONE_MESSAGE,
+    EXPORT_USAGE_MESSAGE,
+    EXPORT_EMPTY_MESSAGE,
+    EXPORT_TOO_LARGE_MESSAGE,
+    EXPORT_DONE_MESSAGE,
     format_cep_response,
     format_address_response,
-    format_inline_cep_result,
+    render_cep,
     format_stats_message,
     format_recent_queries_message,
     format_authorized_users_message,
     format_summary_users_message,
+    format_metrics_message,
+    format_lote_csv,
+    lote_status,
 )
 from config import (
     TELEGRAM_TOKEN,
+    TELEGRAM_API_URL,
+    BOT_MODE,
+    WEBHOOK_URL,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PORT,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_MAX_CONNECTIONS,
     CEP_LENGTH,
     CEP_PATTERN,
     LOG_MESSAGES,
+    CEP_LOCAL_DATASET,
+    INLINE_DEADLINE,
+    INLINE_DEBOUNCE,
+    BOT_WORKERS,
+    LOTE_MAX_CEPS,
+    LOTE_MAX_FILE_SIZE,
+    LOTE_PROGRESS_INTERVAL,
+    EXPORT_MAX_FILE_SIZE,
 )
-from database import Database
-from typing import Callable
+from database import Database, utc_now
+from cache import CepCache
+from query_log import QueryLogger
+from archive import QueryArchive
+from warmup import CacheWarmup
+from export import export_queries, parse_filters
+import metrics
+from metrics import HANDLER_ERRORS, HANDLER_SECONDS, MetricsServer, TimedRequest, timed
+from cep_index import CepIndex, CepIndexError
+from typing import Callable, Optional
+
+logger = get_logger(__name__)
 
 
 def require_authorization(func: Callable) -> Callable:
@@ -61,43 +106,165 @@ def require_authorization(func: Callable) -> Callable:
     return wrapper
 
 
+def webhook_settings() -> dict:
+    """Parâmetros do servidor de webhook (`Updater.start_webhook`)
+
+    Sem WEBHOOK_URL o python-telegram-bot registraria o endereço local do
+    servidor, que o Telegram não alcança, então o bot falha já na partida.
+    """
+    if not WEBHOOK_URL:
+        raise ValueError(
+            "WEBHOOK_URL não definido: defina a URL pública (HTTPS) do webhook"
+        )
+
+    return {
+        "listen": WEBHOOK_LISTEN,
+        "port": WEBHOOK_PORT,
+        "url_path": WEBHOOK_PATH,
+        "webhook_url": f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+        "secret_token": WEBHOOK_SECRET or None,
+        "max_connections": WEBHOOK_MAX_CONNECTIONS,
+        "allowed_updates": Update.ALL_TYPES,
+    }
+
+
+def run_application(application: Application) -> None:
+    """Recebe as atualizações em modo polling ou webhook (BOT_MODE)
+
+    Nos dois modos, SIGINT/SIGTERM encerram o bot de forma ordenada: o
+    servidor para de aceitar atualizações, as pendentes são processadas e
+    o post_shutdown libera os recursos (e grava o histórico pendente).
+    """
+    if BOT_MODE == "webhook":
+        if not WEBHOOK_SECRET:
+            logger.warning(
+                "WEBHOOK_SECRET não definido: o webhook aceitará qualquer requisição"
+            )
+        application.run_webhook(**webhook_settings())
+    else:
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
+
+
 class CEPzinho:
-    def __init__(self) -> None:
-        LogPerformance().warning(LOG_MESSAGES["start"])
-        self.app = Application.builder().token(TELEGRAM_TOKEN).build()
-        self.db = Database()
+    def __init__(self, db: Optional[Database] = None, worker: bool = False) -> None:
+        """Monta o bot
+
+        Em modo worker (veja workers.py) o bot não recebe atualizações do
+        Telegram, e sim do processo principal, que também roda o arquivamento.
+        Os workers também não aquecem o cache: o cache em disco é
+        compartilhado e cada worker aqueceria os mesmos CEPs. As métricas são
+        por processo e o endpoint /metrics só sobe no processo principal.
+        """
+        logger.warning(LOG_MESSAGES["start"])
+        builder = (
+            Application.builder()
+            .token(TELEGRAM_TOKEN)
+            .base_url(TELEGRAM_API_URL)
+            .request(TimedRequest(connection_pool_size=256))
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+        )
+        if worker:
+            builder = builder.updater(None)
+        self.app = builder.build()
+        self.db = db or Database()
+        self.query_log = QueryLogger(self.db)
+        self.archive = QueryArchive(self.db)
+        if worker:
+            self.archive.retention_days = 0  # o processo principal arquiva
+        self.inline_deadline = INLINE_DEADLINE
+        self.inline_debounce = INLINE_DEBOUNCE
+        self.lote_progress_interval = LOTE_PROGRESS_INTERVAL
+        self._inline_tasks = {}
+        self.inline_stats = {
+            "received": 0,
+            "superseded": 0,
+            "avoided": 0,
+            "cancelled": 0,
+        }
+        self.cache = CepCache(self.db)
+        Cep.cache = self.cache
+        metrics.register_cache(self.cache)
+        self.metrics_server = MetricsServer()
+        if worker:
+            self.metrics_server.port = 0
+        self.warmup = CacheWarmup(self.db, self.cache)
+        if worker:
+            self.warmup.top_n = 0
+        Cep.local_index = self._load_local_index()
+        Cep.address_index = None  # construído na primeira busca por endereço
         self._setup_handlers()
 
+    def _load_local_index(self):
+        """Abre a base local de CEPs (modo offline), se o arquivo existir"""
+        if not os.path.exists(CEP_LOCAL_DATASET):
+            return None
+
+        try:
+            index = CepIndex(CEP_LOCAL_DATASET)
+            logger.info(
+                "Base local de CEPs carregada: %s CEPs (%s)",
+                len(index),
+                CEP_LOCAL_DATASET,
+            )
+            return index
+        except (OSError, CepIndexError) as e:
+            logger.error("Erro ao carregar base local de CEPs: %s", e)
+            return None
+
     def _setup_handlers(self):
         """Configura os handlers do bot"""
-        self.app.add_handler(CommandHandler("start", self.start_command))
-        self.app.add_handler(CommandHandler("help", self.help_command))
-        self.app.add_handler(CommandHandler("cep", self.cep_command))
-        self.app.add_handler(CommandHandler("rua", self.rua_command))
-
-        self.app.add_handler(CommandHandler("admin", self.admin_command))
-        self.app.add_handler(CommandHandler("stats", self.stats_command))
-        self.app.add_handler(CommandHandler("recent", self.recent_command))
-        self.app.add_handler(CommandHandler("users", self.users_command))
+        commands = {
+            "start": self.start_command,
+            "help": self.help_command,
+            "cep": self.cep_command,
+            "rua": self.rua_command,
+            "admin": self.admin_command,
+            "stats": self.stats_command,
+            "recent": self.recent_command,
+            "users": self.users_command,
+            "summary_users": self.summary_users_command,
+            "adduser": self.adduser_command,
+            "removeuser": self.removeuser_command,
+            "metrics": self.metrics_command,
+        }
+        for command, callback in commands.items():
+            callback = timed(HANDLER_SECONDS, command)(callback)
+            self.app.add_handler(CommandHandler(command, callback))
+
+        # /lote (no texto ou na legenda de um arquivo CSV/TXT) e /export podem
+        # levar minutos; block=False para não segurar as demais atualizações
+        export = timed(HANDLER_SECONDS, "export")(self.export_command)
+        self.app.add_handler(CommandHandler("export", export, block=False))
+        lote = timed(HANDLER_SECONDS, "lote")(self.lote_command)
+        self.app.add_handler(CommandHandler("lote", lote, block=False))
         self.app.add_handler(
-            CommandHandler("summary_users", self.summary_users_command)
+            MessageHandler(
+                filters.Document.ALL & filters.CaptionRegex(r"^/lote(@\w+)?(\s|$)"),
+                lote,
+                block=False,
+            )
         )
-        self.app.add_handler(CommandHandler("adduser", self.adduser_command))
-        self.app.add_handler(CommandHandler("removeuser", self.removeuser_command))
 
-        self.app.add_handler(InlineQueryHandler(self.inline_query))
+        # block=False: consultas inline rodam em paralelo para que uma mais
+        # nova possa cancelar a anterior do mesmo usuário
+        self.app.add_handler(
+            InlineQueryHandler(
+                timed(HANDLER_SECONDS, "inline")(self.inline_query), block=False
+            )
+        )
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handler para o comando /start"""
         await update.message.reply_text(WELCOME_MESSAGE.strip())
         user_id = update.effective_user.id
-        LogPerformance().info(LOG_MESSAGES["user_started"].format(user_id=user_id))
+        logger.info(LOG_MESSAGES["user_started"], {"user_id": user_id})
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handler para o comando /help"""
         await update.message.reply_text(HELP_MESSAGE.strip())
         user_id = update.effective_user.id
-        LogPerformance().info(LOG_MESSAGES["user_help"].format(user_id=user_id))
+        logger.info(LOG_MESSAGES["user_help"], {"user_id": user_id})
 
     async def cep_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handler para o comando /cep"""
@@ -111,10 +278,9 @@ class CEPzinho:
 
         cep_input = " ".join(context.args)
 
-        LogPerformance().info(
-            LOG_MESSAGES["user_message"].format(
-                user_id=user_id, message=f"/cep {cep_input}"
-            )
+        logger.info(
+            LOG_MESSAGES["user_message"],
+            {"user_id": user_id, "message": f"/cep {cep_input}"},
         )
 
         cep = self._extract_cep(cep_input)
@@ -125,28 +291,25 @@ class CEPzinho:
 
         try:
             cep_obj = Cep(cep)
-            cep_data = cep_obj.get_cep()
+            cep_data = await cep_obj.aget_cep()
 
             response = format_cep_response(cep_data)
             await update.message.reply_text(response)
 
             success = not cep_data.get("erro")
-            self.db.add_query(
+            await self.query_log.log(
                 user_id, user_name, user_full_name, "cep", cep_input, cep_data, success
             )
 
-            LogPerformance().info(
-                LOG_MESSAGES["cep_processed"].format(cep=cep, user_id=user_id)
-            )
+            logger.info(LOG_MESSAGES["cep_processed"], {"cep": cep, "user_id": user_id})
 
         except Exception as e:
-            LogPerformance().error(
-                LOG_MESSAGES["cep_error"].format(cep=cep, error=str(e))
-            )
+            HANDLER_ERRORS.inc("cep")
+            logger.error(LOG_MESSAGES["cep_error"], {"cep": cep, "error": e})
             await update.message.reply_text(ERROR_MESSAGE)
 
             # Salva erro no banco de dados
-            self.db.add_query(
+            await self.query_log.log(
                 user_id, user_name, user_full_name, "cep", cep_input, None, False
             )
 
@@ -162,10 +325,9 @@ class CEPzinho:
 
         address_input = " ".join(context.args)
 
-        LogPerformance().info(
-            LOG_MESSAGES["user_message"].format(
-                user_id=user_id, message=f"/rua {address_input}"
-            )
+        logger.info(
+            LOG_MESSAGES["user_message"],
+            {"user_id": user_id, "message": f"/rua {address_input}"},
         )
 
         try:
@@ -176,7 +338,7 @@ class CEPzinho:
                 return
 
             cep_obj = Cep()
-            address_data = cep_obj.search_address(
+            address_data = await cep_obj.asearch_address(
                 address_info["uf"], address_info["cidade"], address_info["logradouro"]
             )
 
@@ -184,7 +346,7 @@ class CEPzinho:
             await update.message.reply_text(response)
 
             success = len(address_data) > 0
-            self.db.add_query(
+            await self.query_log.log(
                 user_id,
                 user_name,
                 user_full_name,
@@ -194,17 +356,16 @@ class CEPzinho:
                 success,
             )
 
-            LogPerformance().info(
-                f"Endereço '{address_input}' processado para usuário {user_id}"
+            logger.info(
+                "Endereço '%s' processado para usuário %s", address_input, user_id
             )
 
         except Exception as e:
-            LogPerformance().error(
-                f"Erro ao processar endereço '{address_input}': {str(e)}"
-            )
+            HANDLER_ERRORS.inc("rua")
+            logger.error("Erro ao processar endereço '%s': %s", address_input, e)
             await update.message.reply_text(ERROR_MESSAGE)
 
-            self.db.add_query(
+            await self.query_log.log(
                 user_id, user_name, user_full_name, "rua", address_input, None, False
             )
 
@@ -219,13 +380,26 @@ class CEPzinho:
     async def stats_command(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
-        """Handler para o comando /stats"""
+        """Handler para o comando /stats [dias]"""
         try:
-            stats = self.db.get_statistics(7)  # Últimos 7 dias
-            response = format_stats_message(stats)
+            days = 7  # Últimos 7 dias
+            if context.args:
+                days = max(1, int(context.args[0]))
+
+            stats = self.db.get_statistics(days)
+            response = format_stats_message(
+                stats,
+                self.cache.get_stats(),
+                self.inline_stats,
+                Cep.get_upstream_stats(),
+                self.warmup.stats,
+            )
             await update.message.reply_text(response)
+        except ValueError:
+            await update.message.reply_text("❌ Use: /stats [dias]")
         except Exception as e:
-            LogPerformance().error(f"Erro ao buscar estatísticas: {e}")
+            HANDLER_ERRORS.inc("stats")
+            logger.error("Erro ao buscar estatísticas: %s", e)
             await update.message.reply_text("❌ Erro ao buscar estatísticas.")
 
     @require_authorization
@@ -238,7 +412,8 @@ class CEPzinho:
             response = format_summary_users_message(users)
             await update.message.reply_text(response)
         except Exception as e:
-            LogPerformance().error(f"Erro ao buscar resumo de usuários: {e}")
+            HANDLER_ERRORS.inc("summary_users")
+            logger.error("Erro ao buscar resumo de usuários: %s", e)
             await update.message.reply_text("❌ Erro ao buscar resumo de usuários.")
 
     @require_authorization
@@ -251,7 +426,8 @@ class CEPzinho:
             response = format_recent_queries_message(queries, 20)
             await update.message.reply_text(response)
         except Exception as e:
-            LogPerformance().error(f"Erro ao buscar consultas recentes: {e}")
+            HANDLER_ERRORS.inc("recent")
+            logger.error("Erro ao buscar consultas recentes: %s", e)
             await update.message.reply_text("❌ Erro ao buscar consultas recentes.")
 
     @require_authorization
@@ -264,7 +440,8 @@ class CEPzinho:
             response = format_authorized_users_message(users)
             await update.message.reply_text(response)
         except Exception as e:
-            LogPerformance().error(f"Erro ao buscar usuários autorizados: {e}")
+            HANDLER_ERRORS.inc("users")
+            logger.error("Erro ao buscar usuários autorizados: %s", e)
             await update.message.reply_text("❌ Erro ao buscar usuários autorizados.")
 
     @require_authorization
@@ -281,8 +458,8 @@ class CEPzinho:
             user_name = update.effective_user.username or "N/A"
             user_full_name = update.effective_user.full_name or "N/A"
 
-            success = self.db.add_authorized_user(
-                new_user_id, user_name, user_full_name
+            success = await asyncio.to_thread(
+                self.db.add_authorized_user, new_user_id, user_name, user_full_name
             )
 
             if success:
@@ -294,7 +471,8 @@ class CEPzinho:
         except ValueError:
             await update.message.reply_text("❌ ID do usuário deve ser um número.")
         except Exception as e:
-            LogPerformance().error(f"Erro ao adicionar usuário: {e}")
+            HANDLER_ERRORS.inc("adduser")
+            logger.error("Erro ao adicionar usuário: %s", e)
             await update.message.reply_text("❌ Erro ao adicionar usuário.")
 
     @require_authorization
@@ -309,17 +487,233 @@ class CEPzinho:
         try:
             remove_user_id = int(context.args[0])
 
-            await update.message.reply_text(
-                USER_REMOVED_MESSAGE.format(user_id=remove_user_id)
-            )
+            if await asyncio.to_thread(self.db.remove_authorized_user, remove_user_id):
+                await update.message.reply_text(
+                    USER_REMOVED_MESSAGE.format(user_id=remove_user_id)
+                )
+            else:
+                await update.message.reply_text(
+                    USER_NOT_FOUND_MESSAGE.format(user_id=remove_user_id)
+                )
         except ValueError:
             await update.message.reply_text("❌ ID do usuário deve ser um número.")
         except Exception as e:
-            LogPerformance().error(f"Erro ao remover usuário: {e}")
+            HANDLER_ERRORS.inc("removeuser")
+            logger.error("Erro ao remover usuário: %s", e)
             await update.message.reply_text("❌ Erro ao remover usuário.")
 
+    @require_authorization
+    async def metrics_command(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """Handler para o comando /metrics"""
+        response = format_metrics_message(metrics.summaries(), metrics.counters())
+        await update.message.reply_text(response)
+
+    @require_authorization
+    async def lote_command(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """Handler para o comando /lote
+
+        Os CEPs vêm do texto do comando e/ou de um arquivo CSV/TXT (enviado
+        com a legenda /lote ou respondido com /lote). O progresso é mostrado
+        editando uma única mensagem e o resultado volta como um CSV.
+        """
+        message = update.message
+        user_id = update.effective_user.id
+        user_name = update.effective_user.name or "N/A"
+        user_full_name = update.effective_user.full_name or "N/A"
+
+        try:
+            text = await self._lote_input(message)
+        except ValueError as e:
+            await message.reply_text(str(e))
+            return
+
+        ceps = self._extract_ceps(text)
+        if not ceps:
+            await message.reply_text(LOTE_USAGE_MESSAGE.strip())
+            return
+
+        unique = list(dict.fromkeys(ceps))
+        if len(unique) > LOTE_MAX_CEPS:
+            await message.reply_text(
+                LOTE_TOO_MANY_MESSAGE.format(count=len(unique), max_ceps=LOTE_MAX_CEPS)
+            )
+            return
+
+        logger.info("Lote de %s CEPs do usuário %s", len(unique), user_id)
+        query_text = f"{len(unique)} CEPs"
+        status = await message.reply_text(
+            LOTE_PROGRESS_MESSAGE.format(done=0, total=len(unique))
+        )
+        progress = {"done": 0}
+
+        def on_progress(done: int, total: int) -> None:
+            progress["done"] = done
+
+        task = asyncio.ensure_future(Cep.aget_many(unique, on_progress=on_progress))
+        try:
+            shown = 0
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.lote_progress_interval)
+                if not task.done() and progress["done"] != shown:
+                    shown = progress["done"]
+                    await self._edit_progress(
+                        status,
+                        LOTE_PROGRESS_MESSAGE.format(done=shown, total=len(unique)),
+                    )
+            results = task.result()
+
+            summary = {"total": len(unique), "duplicates": len(ceps) - len(unique)}
+            for key in ("ok", "não encontrado", "falha"):
+                summary[key] = 0
+            for cep_data in results.values():
+                summary[lote_status(cep_data)] += 1
+
+            await message.reply_document(
+                document=format_lote_csv(results).encode("utf-8-sig"),
+                filename=f"lote-cepzinho-{len(unique)}-ceps.csv",
+            )
+            await self._edit_progress(
+                status,
+                LOTE_DONE_MESSAGE.format(
+                    total=summary["total"],
+                    duplicates=summary["duplicates"],
+                    found=summary["ok"],
+                    not_found=summary["não encontrado"],
+                    failed=summary["falha"],
+                ),
+            )
+
+            await self.query_log.log(
+                user_id, user_name, user_full_name, "lote", query_text, summary, True
+            )
+
+        except Exception as e:
+            HANDLER_ERRORS.inc("lote")
+            logger.error("Erro ao processar lote de %s CEPs: %s", len(unique), e)
+            await message.reply_text(ERROR_MESSAGE)
+
+            await self.query_log.log(
+                user_id, user_name, user_full_name, "lote", query_text, None, False
+            )
+        finally:
+            if not task.done():
+                task.cancel()
+
+    @require_authorization
+    async def export_command(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """Handler para o comando /export [filtros]
+
+        As consultas são escritas aos poucos (em uma thread) em um arquivo
+        temporário compactado, enviado como documento.
+        """
+        try:
+            options = parse_filters(context.args or [])
+        except ValueError:
+            await update.message.reply_text(EXPORT_USAGE_MESSAGE.strip())
+            return
+
+        fmt = options.pop("fmt")
+        try:
+            with tempfile.TemporaryFile() as file:
+                count = await asyncio.to_thread(
+                    export_queries, self.db, file, fmt, **options
+                )
+                size = file.tell()
+
+                if not count:
+                    await update.message.reply_text(EXPORT_EMPTY_MESSAGE)
+                    return
+                if size > EXPORT_MAX_FILE_SIZE:
+                    await update.message.reply_text(
+                        EXPORT_TOO_LARGE_MESSAGE.format(
+                            size_mib=size / 2**20, max_mib=EXPORT_MAX_FILE_SIZE / 2**20
+                        )
+                    )
+                    return
+
+                file.seek(0)
+                await update.message.reply_document(
+                    document=file,
+                    filename=f"consultas-{utc_now()[:10]}.{fmt}.gz",
+                    caption=EXPORT_DONE_MESSAGE.format(count=count),
+                )
+
+            logger.info(
+                "%s consultas exportadas (%s KiB) para o usuário %s",
+                count,
+                size // 1024,
+                update.effective_user.id,
+            )
+        except Exception as e:
+            HANDLER_ERRORS.inc("export")
+            logger.error("Erro ao exportar consultas: %s", e)
+            await update.message.reply_text("❌ Erro ao exportar consultas.")
+
+    async def _lote_input(self, message) -> str:
+        """Texto do /lote: argumentos do comando mais o conteúdo do arquivo
+        anexado (ou da mensagem respondida); ValueError com a mensagem para o
+        usuário se o arquivo não for aceito"""
+        parts = (message.text or message.caption or "").split(maxsplit=1)
+        text = parts[1] if len(parts) > 1 else ""
+
+        document = message.document
+        if document is None and message.reply_to_message is not None:
+            document = message.reply_to_message.document
+        if document is None:
+            return text
+
+        if not (document.file_name or "").lower().endswith((".csv", ".txt")):
+            raise ValueError(LOTE_FILE_TYPE_MESSAGE)
+        if (document.file_size or 0) > LOTE_MAX_FILE_SIZE:
+            raise ValueError(
+                LOTE_FILE_TOO_LARGE_MESSAGE.format(max_kib=LOTE_MAX_FILE_SIZE // 1024)
+            )
+
+        file = await document.get_file()
+        data = bytes(await file.download_as_bytearray())
+        try:
+            content = data.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            content = data.decode("cp1252", errors="replace")  # CSV do Excel
+        return f"{text}\n{content}"
+
+    async def _edit_progress(self, status, text: str) -> None:
+        """Atualiza a mensagem de progresso do /lote (falhas são ignoradas)"""
+        try:
+            await status.edit_text(text)
+        except TelegramError as e:
+            logger.debug("Não foi possível atualizar o progresso do lote: %s", e)
+
     async def inline_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handler para consultas inline"""
+        """Handler para consultas inline
+
+        O Telegram envia uma consulta a cada tecla digitada; uma consulta nova
+        do mesmo usuário cancela a anterior que ainda estiver em andamento.
+        """
+        user_id = update.inline_query.from_user.id
+        task = asyncio.current_task()
+        self.inline_stats["received"] += 1
+
+        previous = self._inline_tasks.get(user_id)
+        if previous is not None and not previous.done():
+            previous.cancel()
+            self.inline_stats["superseded"] += 1
+        self._inline_tasks[user_id] = task
+
+        try:
+            await self._process_inline_query(update)
+        finally:
+            if self._inline_tasks.get(user_id) is task:
+                del self._inline_tasks[user_id]
+
+    async def _process_inline_query(self, update: Update) -> None:
+        """Processa uma consulta inline e responde ao Telegram"""
         query = update.inline_query.query.strip()
         user_id = update.inline_query.from_user.id
         full_name = update.inline_query.from_user.full_name
@@ -339,91 +733,36 @@ class CEPzinho:
             await update.inline_query.answer(results)
             return
 
-        LogPerformance().info(
-            f"Consulta inline de usuário {name} {full_name} {user_id}: {query}"
+        # Janela de debounce: se o usuário digitar de novo, esta consulta é
+        # cancelada aqui, antes de qualquer chamada ao provedor de CEP
+        try:
+            await asyncio.sleep(self.inline_debounce)
+        except asyncio.CancelledError:
+            self.inline_stats["avoided"] += 1
+            raise
+
+        logger.info(
+            "Consulta inline de usuário %s %s %s: %s", name, full_name, user_id, query
         )
 
-        results = []
+        user = (user_id, name, full_name)
+        legs = []
 
         cep = self._extract_cep(query)
         if cep:
-            try:
-                cep_obj = Cep(cep)
-                cep_data = cep_obj.get_cep()
-
-                if not cep_data.get("erro"):
-                    title = INLINE_RESULT_TITLE_CEP.format(cep=cep_data.get("cep"))
-                    description = INLINE_RESULT_DESCRIPTION_CEP.format(
-                        logradouro=cep_data.get("logradouro", "N/A"),
-                        bairro=cep_data.get("bairro", "N/A"),
-                        cidade=cep_data.get("localidade", "N/A"),
-                        uf=cep_data.get("uf", "N/A"),
-                    )
-                    content = format_inline_cep_result(cep_data)
-
-                    results.append(
-                        InlineQueryResultArticle(
-                            id=f"cep_{cep}",
-                            title=title,
-                            description=description,
-                            input_message_content=InputTextMessageContent(content),
-                        )
-                    )
-
-                    self.db.add_query(
-                        user_id, name, full_name, "inline_cep", query, cep_data, True
-                    )
-            except Exception as e:
-                LogPerformance().error(f"Erro na consulta inline CEP: {e}")
-                self.db.add_query(
-                    user_id, name, full_name, "inline_cep", query, None, False
-                )
+            legs.append(("cep", self._inline_cep_results(cep, query, user)))
 
         address_info = self._parse_address(query)
         if address_info:
-            try:
-                cep_obj = Cep()
-                address_data = cep_obj.search_address(
-                    address_info["uf"],
-                    address_info["cidade"],
-                    address_info["logradouro"],
-                )
-
-                if address_data:
-                    for i, addr in enumerate(address_data[:3]):
-                        title = INLINE_RESULT_TITLE_ADDRESS.format(
-                            logradouro=addr.get("logradouro", "N/A")
-                        )
-                        description = INLINE_RESULT_DESCRIPTION_ADDRESS.format(
-                            cep=addr.get("cep", "N/A"),
-                            cidade=addr.get("localidade", "N/A"),
-                            uf=addr.get("uf", "N/A"),
-                        )
-                        content = f"📍 **CEP {addr.get('cep', 'N/A')}**\n🏠 {addr.get('logradouro', 'N/A')}\n🏙️ {addr.get('localidade', 'N/A')} - {addr.get('uf', 'N/A')}"
-
-                        results.append(
-                            InlineQueryResultArticle(
-                                id=f"addr_{i}_{addr.get('cep', '')}",
-                                title=title,
-                                description=description,
-                                input_message_content=InputTextMessageContent(content),
-                            )
-                        )
+            legs.append(
+                ("endereço", self._inline_address_results(address_info, query, user))
+            )
 
-                    self.db.add_query(
-                        user_id,
-                        name,
-                        full_name,
-                        "inline_address",
-                        query,
-                        {"results": address_data},
-                        True,
-                    )
-            except Exception as e:
-                LogPerformance().error(f"Erro na consulta inline endereço: {e}")
-                self.db.add_query(
-                    user_id, name, full_name, "inline_address", query, None, False
-                )
+        try:
+            results = await self._run_inline_legs(legs)
+        except asyncio.CancelledError:
+            self.inline_stats["cancelled"] += 1
+            raise
 
         if not results:
             results = [
@@ -439,6 +778,157 @@ class CEPzinho:
 
         await update.inline_query.answer(results)
 
+    async def _run_inline_legs(self, legs: list) -> list:
+        """Executa as consultas inline em paralelo sob um único prazo
+
+        O que terminar dentro do prazo é devolvido (na ordem das
+        consultas); as que estourarem o prazo são canceladas.
+        """
+        if not legs:
+            return []
+
+        tasks = [
+            asyncio.create_task(self._timed_inline_leg(leg_name, coro))
+            for leg_name, coro in legs
+        ]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.inline_deadline)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = []
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception() is None:
+                results.extend(task.result())
+        return results
+
+    async def _timed_inline_leg(self, leg_name: str, coro) -> list:
+        """Executa uma consulta inline registrando quanto tempo ela levou"""
+        start = perf_counter()
+        try:
+            results = await coro
+        except asyncio.CancelledError:
+            logger.warning(
+                "Consulta inline [%s] cancelada após %.0fms (prazo %ss)",
+                leg_name,
+                (perf_counter() - start) * 1000,
+                self.inline_deadline,
+            )
+            raise
+
+        logger.debug(
+            "Consulta inline [%s] levou %.0fms",
+            leg_name,
+            (perf_counter() - start) * 1000,
+        )
+        return results
+
+    async def _inline_cep_results(self, cep: str, query: str, user: tuple) -> list:
+        """Monta os resultados inline de uma consulta por CEP"""
+        user_id, name, full_name = user
+        results = []
+
+        try:
+            cep_obj = Cep(cep)
+            cep_data = await cep_obj.aget_cep()
+
+            if not cep_data.get("erro"):
+                results.append(self._inline_cep_article(cep, cep_data))
+
+                await self.query_log.log(
+                    user_id, name, full_name, "inline_cep", query, cep_data, True
+                )
+        except Exception as e:
+            HANDLER_ERRORS.inc("inline")
+            logger.error("Erro na consulta inline CEP: %s", e)
+            await self.query_log.log(
+                user_id, name, full_name, "inline_cep", query, None, False
+            )
+
+        return results
+
+    def _inline_cep_article(self, cep: str, cep_data: dict) -> InlineQueryResultArticle:
+        """Resultado inline de um CEP, guardado no registro do cache para que
+        um acerto não monte o resultado de novo (os objetos da API são
+        imutáveis e podem ser reutilizados)"""
+        article = getattr(cep_data, "article", None)
+        if article is not None:
+            return article
+
+        rendered = render_cep(cep_data)
+        article = InlineQueryResultArticle(
+            id=f"cep_{cep}",
+            title=rendered.inline_title,
+            description=rendered.inline_description,
+            input_message_content=InputTextMessageContent(rendered.inline_content),
+        )
+        try:
+            cep_data.article = article
+        except AttributeError:
+            pass  # dicionário comum (base local, sem cache)
+        return article
+
+    async def _inline_address_results(
+        self, address_info: dict, query: str, user: tuple
+    ) -> list:
+        """Monta os resultados inline de uma consulta por endereço"""
+        user_id, name, full_name = user
+        results = []
+
+        try:
+            cep_obj = Cep()
+            address_data = await cep_obj.asearch_address(
+                address_info["uf"],
+                address_info["cidade"],
+                address_info["logradouro"],
+            )
+
+            if address_data:
+                for i, addr in enumerate(address_data[:3]):
+                    title = INLINE_RESULT_TITLE_ADDRESS.format(
+                        logradouro=addr.get("logradouro", "N/A")
+                    )
+                    description = INLINE_RESULT_DESCRIPTION_ADDRESS.format(
+                        cep=addr.get("cep", "N/A"),
+                        cidade=addr.get("localidade", "N/A"),
+                        uf=addr.get("uf", "N/A"),
+                    )
+                    content = f"📍 **CEP {addr.get('cep', 'N/A')}**\n🏠 {addr.get('logradouro', 'N/A')}\n🏙️ {addr.get('localidade', 'N/A')} - {addr.get('uf', 'N/A')}"
+
+                    results.append(
+                        InlineQueryResultArticle(
+                            id=f"addr_{i}_{addr.get('cep', '')}",
+                            title=title,
+                            description=description,
+                            input_message_content=InputTextMessageContent(content),
+                        )
+                    )
+
+                await self.query_log.log(
+                    user_id,
+                    name,
+                    full_name,
+                    "inline_address",
+                    query,
+                    {"results": address_data},
+                    True,
+                )
+        except Exception as e:
+            HANDLER_ERRORS.inc("inline")
+            logger.error("Erro na consulta inline endereço: %s", e)
+            await self.query_log.log(
+                user_id, name, full_name, "inline_address", query, None, False
+            )
+
+        return results
+
     def _extract_cep(self, text: str) -> str:
         """Extrai o CEP do texto da mensagem"""
         cep_clean = re.sub(CEP_PATTERN, "", text)
@@ -448,6 +938,16 @@ class CEPzinho:
 
         return None
 
+    def _extract_ceps(self, text: str) -> list:
+        """Extrai os CEPs de um texto ou arquivo (separados por espaços,
+        quebras de linha, vírgulas ou ponto e vírgula), na ordem, com repetições"""
+        ceps = []
+        for token in re.split(r"[\s,;]+", text):
+            cep = self._extract_cep(token) if token else None
+            if cep:
+                ceps.append(cep)
+        return ceps
+
     def _parse_address(self, text: str) -> dict:
         """Extrai informações do endereço (UF, cidade, logradouro)"""
         parts = text.split(",")
@@ -466,12 +966,35 @@ class CEPzinho:
 
         return {"uf": uf, "cidade": cidade, "logradouro": logradouro}
 
+    async def _post_init(self, application: Application) -> None:
+        """Inicia as tarefas em segundo plano depois que o bot sobe
+
+        Roda antes de o bot começar a receber atualizações; o aquecimento do
+        cache segura a inicialização por no máximo CACHE_WARMUP_BUDGET segundos.
+        """
+        await self.query_log.start()
+        self.metrics_server.start()
+        await self.warmup.start()
+        self.archive.schedule(application.job_queue)
+
+    async def _post_shutdown(self, application: Application) -> None:
+        """Libera os recursos compartilhados ao desligar o bot"""
+        await self.warmup.stop()
+        await self.query_log.stop()
+        await Cep.aclose()
+        self.metrics_server.stop()
+
     def run(self) -> None:
-        """Inicia o bot"""
-        LogPerformance().info(LOG_MESSAGES["bot_started"])
-        self.app.run_polling(allowed_updates=Update.ALL_TYPES)
+        """Inicia o bot em modo polling ou webhook (BOT_MODE)"""
+        logger.info(LOG_MESSAGES["bot_started"])
+        run_application(self.app)
 
 
 if __name__ == "__main__":
-    bot = CEPzinho()
-    bot.run()
+    if BOT_WORKERS > 0:
+        from workers import FrontBot
+
+        FrontBot(BOT_WORKERS).run()
+    else:
+        bot = CEPzinho()
+        bot.run()
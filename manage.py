@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Comandos de manutenção do CEPzinho
+
+Uso:
+    python manage.py import-ceps dump.csv [--output ceps.idx]
+    python manage.py backfill-stats [--db cepzinho.db]
+    python manage.py dump-archive [--since AAAA-MM-DD] [--until AAAA-MM-DD] [--output consultas.jsonl]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from config import CEP_LOCAL_DATASET, QUERY_ARCHIVE_DIR
+
+
+def import_ceps(args: argparse.Namespace) -> None:
+    """Gera a base local de CEPs a partir de um CSV"""
+    from cep_index import CepIndex, FIELDS, build_index
+
+    print(f"📥 Importando CEPs de {args.csv}...")
+    print(f"   Colunas esperadas: cep, {', '.join(FIELDS)}")
+
+    start = time.perf_counter()
+    count = build_index(args.csv, args.output)
+    elapsed = time.perf_counter() - start
+
+    index = CepIndex(args.output)
+    index.close()
+
+    print(f"✅ {count} CEPs gravados em {args.output} ({elapsed:.1f}s)")
+
+
+def backfill_stats(args: argparse.Namespace) -> None:
+    """Recalcula os agregados diários do /stats a partir do histórico"""
+    from database import Database
+
+    print(f"📊 Recalculando agregados diários de {args.db}...")
+
+    start = time.perf_counter()
+    db = Database(args.db)
+    success = db.rebuild_statistics()
+    elapsed = time.perf_counter() - start
+    db.close()
+
+    if success:
+        print(f"✅ Agregados recalculados ({elapsed:.1f}s)")
+    else:
+        print("❌ Erro ao recalcular agregados. Verifique os logs.")
+
+
+def dump_archive(args: argparse.Namespace) -> None:
+    """Escreve as consultas arquivadas em JSON, uma por linha"""
+    from archive import QueryArchive
+
+    archive = QueryArchive(None, args.dir)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = 0
+
+    try:
+        for query in archive.iter_queries(args.since, args.until):
+            output.write(json.dumps(query, ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if args.output:
+            output.close()
+
+    print(f"✅ {count} consultas arquivadas lidas de {args.dir}", file=sys.stderr)
+
+
+def main():
+    """Interpreta a linha de comando e executa o subcomando escolhido"""
+    parser = argparse.ArgumentParser(description="Manutenção do CEPzinho")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_import = subparsers.add_parser(
+        "import-ceps",
+        help="Gera a base local de CEPs (modo offline) a partir de um CSV",
+    )
+    parser_import.add_argument("csv", help="Arquivo CSV com os CEPs")
+    parser_import.add_argument(
+        "--output", default=CEP_LOCAL_DATASET, help="Arquivo de saída da base local"
+    )
+    parser_import.set_defaults(func=import_ceps)
+
+    parser_backfill = subparsers.add_parser(
+        "backfill-stats",
+        help="Recalcula os agregados diários do /stats a partir das consultas",
+    )
+    parser_backfill.add_argument(
+        "--db", default="cepzinho.db", help="Arquivo do banco de dados"
+    )
+    parser_backfill.set_defaults(func=backfill_stats)
+
+    parser_dump = subparsers.add_parser(
+        "dump-archive",
+        help="Lê as consultas arquivadas (fora da retenção) em JSON, uma por linha",
+    )
+    parser_dump.add_argument(
+        "--since", help="Data inicial (AAAA-MM-DD), inclusive", default=None
+    )
+    parser_dump.add_argument(
+        "--until", help="Data final (AAAA-MM-DD), exclusive", default=None
+    )
+    parser_dump.add_argument(
+        "--dir", default=QUERY_ARCHIVE_DIR, help="Diretório dos arquivos mensais"
+    )
+    parser_dump.add_argument(
+        "--output", default=None, help="Arquivo de saída (padrão: saída padrão)"
+    )
+    parser_dump.set_defaults(func=dump_archive)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
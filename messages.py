@@ -2,6 +2,10 @@
 Mensagens padrões do bot CEPzinho
 """
 
+import csv
+import io
+from typing import Dict, NamedTuple, Optional
+
 WELCOME_MESSAGE = """
 🤖 Olá! Eu sou o CEPzinho, seu ajudante de endereços!
 
@@ -135,11 +139,14 @@ NOT_AUTHORIZED_MESSAGE = "❌ Você não está autorizado a usar este comando."
 ADMIN_HELP_MESSAGE = """
 🔧 **Comandos de Administração:**
 
-/stats - Mostra estatísticas do bot
+/stats [dias] - Mostra estatísticas do bot (padrão: 7 dias)
 /recent - Mostra consultas recentes
 /users - Lista usuários autorizados
 /adduser [user_id] - Adiciona usuário autorizado
 /removeuser [user_id] - Remove usuário autorizado
+/metrics - Mostra latências e contadores internos do bot
+/lote [CEPs] - Consulta vários CEPs (ou envie um arquivo CSV/TXT com a legenda /lote) e devolve um CSV
+/export [filtros] - Exporta o histórico de consultas (CSV ou NDJSON compactado)
 
 📊 **Estatísticas disponíveis:**
 • Total de consultas
@@ -166,6 +173,53 @@ STATS_MESSAGE = """
 📅 Período: {days} dias
 """
 
+CACHE_STATS_MESSAGE = """
+🗃️ **Cache de CEPs:**
+• Acertos (memória/disco): {memory_hits}/{disk_hits}
+• Falhas: {misses}
+• Taxa de acerto: {hit_rate:.1f}%
+• Descartes (LRU): {evictions}
+• Expirados: {expired}
+• Ocupação: {size}/{max_entries}
+"""
+
+WARMUP_STATS_MESSAGE = """
+🔥 **Aquecimento do cache ({status}):**
+• CEPs mais consultados: {candidates}
+• Já em cache/base local/buscados no provedor: {cached}/{local}/{fetched}
+• Falhas: {failed}
+• Consultas de CEP recentes cobertas: {coverage:.1f}%
+• Duração: {elapsed:.1f}s
+"""
+
+INLINE_STATS_MESSAGE = """
+⌨️ **Consultas inline (desde o início do bot):**
+• Recebidas: {received}
+• Substituídas por uma mais nova: {superseded}
+• Chamadas ao provedor evitadas: {avoided}
+• Canceladas em andamento: {cancelled}
+"""
+
+UPSTREAM_STATS_MESSAGE = """
+🌐 **Provedores de CEPs (desde o início do bot):**
+• Requisições: {requests}
+• Consultas agrupadas em uma requisição já em andamento: {coalesced}
+• Respostas do cache vencido (atualizadas em segundo plano): {stale_served}
+• Requisições em paralelo a outro provedor (hedging): {hedged} ({hedge_wins} respondidas primeiro pelo reserva)
+"""
+
+PROVIDER_STATS_MESSAGE = """• {name}: circuito {breaker_state} (falhas recentes: {failure_rate:.0f}%, aberto {opened}x, {rejected} recusadas), p95 {p95:.0f}ms
+"""
+
+METRICS_MESSAGE = """
+⏱️ **Latências (desde o início do bot):**
+{histograms}
+🔢 **Contadores:**
+{counters}"""
+
+METRICS_SERIES_MESSAGE = """• {name}{labels}: {count}x, média {avg:.1f}ms, p50 {p50:.1f}ms, p95 {p95:.1f}ms
+"""
+
 RECENT_QUERIES_MESSAGE = """
 🔍 Consultas Recentes:
 
@@ -194,12 +248,100 @@ USER_ADDED_MESSAGE = "✅ Usuário {user_id} adicionado com sucesso!"
 USER_REMOVED_MESSAGE = "✅ Usuário {user_id} removido com sucesso!"
 USER_NOT_FOUND_MESSAGE = "❌ Usuário {user_id} não encontrado."
 
+LOTE_USAGE_MESSAGE = """📦 **Como usar o comando /lote:**
+
+Envie os CEPs na mensagem: /lote 01310-100 36246200 13183248
+Ou envie um arquivo CSV/TXT com a legenda /lote (ou responda ao arquivo com /lote).
+
+O resultado volta como um arquivo CSV."""
+
+LOTE_TOO_MANY_MESSAGE = "❌ O lote tem {count} CEPs; o máximo é {max_ceps}."
+LOTE_FILE_TYPE_MESSAGE = "❌ Envie um arquivo .csv ou .txt."
+LOTE_FILE_TOO_LARGE_MESSAGE = "❌ Arquivo muito grande (máximo {max_kib} KiB)."
+LOTE_PROGRESS_MESSAGE = "⏳ Consultando {total} CEPs: {done}/{total}"
+LOTE_DONE_MESSAGE = """✅ Lote concluído: {total} CEPs ({duplicates} repetidos ignorados)
+• Encontrados: {found}
+• Não encontrados: {not_found}
+• Falhas: {failed}"""
+
+EXPORT_USAGE_MESSAGE = """📤 **Como usar o comando /export:**
+
+/export [desde=AAAA-MM-DD] [ate=AAAA-MM-DD] [dias=N] [usuario=ID] [tipo=TIPO] [formato=csv|ndjson]
+
+📝 Exemplos:
+• /export dias=7
+• /export desde=2025-01-01 ate=2025-01-31 tipo=cep
+• /export usuario=123456 formato=ndjson"""
+
+EXPORT_EMPTY_MESSAGE = "❌ Nenhuma consulta encontrada com esses filtros."
+EXPORT_TOO_LARGE_MESSAGE = (
+    "❌ O arquivo ficou com {size_mib:.0f} MiB (máximo {max_mib:.0f} MiB). "
+    "Use um período menor."
+)
+EXPORT_DONE_MESSAGE = "📤 {count} consultas exportadas"
+
+# Colunas do CSV devolvido pelo /lote
+LOTE_CSV_FIELDS = (
+    "cep",
+    "status",
+    "logradouro",
+    "complemento",
+    "bairro",
+    "localidade",
+    "uf",
+    "ibge",
+    "ddd",
+)
+
+
+class RenderedCep(NamedTuple):
+    """Mensagens de um CEP já formatadas"""
+
+    response: str
+    inline_title: str
+    inline_description: str
+    inline_content: str
+
+
+def render_cep(cep_data: dict) -> RenderedCep:
+    """Formata todas as mensagens de um CEP
+
+    Registros do cache (cache.CepRecord) guardam o resultado, então cada CEP
+    em cache é formatado uma única vez; dicionários comuns são formatados a
+    cada chamada.
+    """
+    rendered = getattr(cep_data, "rendered", None)
+    if rendered is not None:
+        return rendered
+
+    if cep_data.get("erro"):
+        rendered = RenderedCep(CEP_NOT_FOUND_MESSAGE, "", "", CEP_NOT_FOUND_MESSAGE)
+    else:
+        rendered = RenderedCep(
+            _format_cep_response(cep_data),
+            INLINE_RESULT_TITLE_CEP.format(cep=cep_data.get("cep")),
+            INLINE_RESULT_DESCRIPTION_CEP.format(
+                logradouro=cep_data.get("logradouro", "N/A"),
+                bairro=cep_data.get("bairro", "N/A"),
+                cidade=cep_data.get("localidade", "N/A"),
+                uf=cep_data.get("uf", "N/A"),
+            ),
+            _format_inline_cep_result(cep_data),
+        )
+
+    try:
+        cep_data.rendered = rendered
+    except AttributeError:
+        pass  # dicionário comum (base local, sem cache)
+    return rendered
+
 
 def format_cep_response(cep_data: dict) -> str:
     """Formata a resposta da API do CEP"""
-    if cep_data.get("erro"):
-        return CEP_NOT_FOUND_MESSAGE
+    return render_cep(cep_data).response
+
 
+def _format_cep_response(cep_data: dict) -> str:
     response = f"""
 📍 **Informações do CEP {cep_data.get('cep', 'N/A')}**
 
@@ -238,9 +380,10 @@ def format_address_response(address_data: list) -> str:
 
 def format_inline_cep_result(cep_data: dict) -> str:
     """Formata resultado inline para CEP"""
-    if cep_data.get("erro"):
-        return CEP_NOT_FOUND_MESSAGE
+    return render_cep(cep_data).inline_content
+
 
+def _format_inline_cep_result(cep_data: dict) -> str:
     return f"""📍 **CEP {cep_data.get('cep', 'N/A')}**
 🏠 {cep_data.get('logradouro', 'N/A')}
 🏘️ {cep_data.get('bairro', 'N/A')}
@@ -265,7 +408,13 @@ def format_inline_address_result(address_data: list) -> str:
     return result.strip()
 
 
-def format_stats_message(stats: dict) -> str:
+def format_stats_message(
+    stats: dict,
+    cache_stats: dict = None,
+    inline_stats: dict = None,
+    upstream_stats: dict = None,
+    warmup_stats: dict = None,
+) -> str:
     """Formata mensagem de estatísticas"""
     if not stats:
         return "❌ Erro ao buscar estatísticas."
@@ -283,7 +432,7 @@ def format_stats_message(stats: dict) -> str:
     if not query_types_text:
         query_types_text = "👮🏿 Nenhuma consulta registrada\n"
 
-    return STATS_MESSAGE.format(
+    response = STATS_MESSAGE.format(
         days=stats.get("period_days", 7),
         total_queries=stats.get("total_queries", 0),
         successful_queries=stats.get("successful_queries", 0),
@@ -293,6 +442,66 @@ def format_stats_message(stats: dict) -> str:
         query_types=query_types_text,
     )
 
+    if cache_stats:
+        response += CACHE_STATS_MESSAGE.format(**cache_stats)
+
+    if warmup_stats and warmup_stats.get("candidates"):
+        status = "concluído" if warmup_stats["done"] else "em andamento"
+        response += WARMUP_STATS_MESSAGE.format(status=status, **warmup_stats)
+
+    if inline_stats:
+        response += INLINE_STATS_MESSAGE.format(**inline_stats)
+
+    if upstream_stats:
+        response += UPSTREAM_STATS_MESSAGE.format(**upstream_stats)
+        for provider in upstream_stats.get("providers", []):
+            response += PROVIDER_STATS_MESSAGE.format(**provider)
+
+    return response
+
+
+def format_metrics_message(summaries: list, counters: list) -> str:
+    """Formata o resumo das métricas (metrics.summaries e metrics.counters)"""
+    histograms = ""
+    for name, labels, summary in summaries:
+        histograms += METRICS_SERIES_MESSAGE.format(
+            name=name.replace("cepzinho_", ""),
+            labels=f" [{', '.join(map(str, labels))}]" if labels else "",
+            **summary,
+        )
+
+    counters_text = ""
+    for name, labels, value in counters:
+        label_text = f" [{', '.join(map(str, labels))}]" if labels else ""
+        counters_text += f"• {name.replace('cepzinho_', '')}{label_text}: {value:g}\n"
+
+    return METRICS_MESSAGE.format(
+        histograms=histograms or "👮🏿 Nenhuma amostra registrada\n",
+        counters=counters_text or "👮🏿 Nenhum contador registrado\n",
+    )
+
+
+def lote_status(cep_data: Optional[dict]) -> str:
+    """Situação de um CEP no resultado do /lote"""
+    if cep_data is None:
+        return "falha"
+    if cep_data.get("erro"):
+        return "não encontrado"
+    return "ok"
+
+
+def format_lote_csv(results: Dict[str, Optional[dict]]) -> str:
+    """Formata o resultado de Cep.aget_many como CSV (uma linha por CEP)"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, LOTE_CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for cep, cep_data in results.items():
+        status = lote_status(cep_data)
+        row = dict(cep_data) if status == "ok" else {}
+        row.update(cep=f"{cep[:5]}-{cep[5:]}", status=status)
+        writer.writerow(row)
+    return output.getvalue()
+
 
 def format_recent_queries_message(queries: list, limit: int = 50) -> str:
     """Formata mensagem de consultas recentes"""
@@ -0,0 +1,414 @@
+"""
+Métricas do CEPzinho (histogramas de latência e contadores)
+
+As métricas ficam em memória, por processo, e são expostas no formato texto
+do Prometheus em http://METRICS_LISTEN:METRICS_PORT/metrics e resumidas no
+comando /metrics. Registrar uma amostra custa uma busca binária nos limites
+dos buckets e alguns incrementos (menos de 1µs); não há locks, então uma
+leitura concorrente do endpoint pode ver uma amostra pela metade, o que é
+aceitável para monitoramento.
+
+Com workers, cada processo envia periodicamente um retrato (snapshot) das
+suas métricas ao processo principal, que o guarda com merge() e soma os
+retratos às próprias séries ao expor as métricas.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import wraps
+from inspect import iscoroutinefunction
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+from telegram.request import HTTPXRequest
+from logs import get_logger
+from config import METRICS_LISTEN, METRICS_PORT
+
+logger = get_logger(__name__)
+
+# Limites (segundos) dos buckets: de 1ms a 10s
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry: List["Metric"] = []
+
+# Último retrato recebido de cada processo worker: origem -> métrica -> dados
+_remote: Dict[str, Dict[str, tuple]] = {}
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        """Cria e registra a métrica `name` com os rótulos `labels`"""
+        self.name = name
+        self.help = help
+        self.labels = labels
+        _registry.append(self)
+
+    def _label_text(self, values: tuple, extra: str = "") -> str:
+        pairs = [f'{k}="{v}"' for k, v in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        """Linhas da métrica no formato texto do Prometheus"""
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def snapshot(self) -> tuple:
+        """Cópia das séries deste processo para enviar a outro (veja merge)"""
+        return (self.kind, self.help, self.labels, self._local())
+
+    @abstractmethod
+    def totals(self) -> Dict[tuple, object]:
+        """Séries deste processo somadas às recebidas dos workers"""
+
+    @abstractmethod
+    def _local(self) -> Dict[tuple, object]:
+        """Séries deste processo"""
+
+    def _remote_series(self) -> List[Dict[tuple, object]]:
+        return [
+            metrics[self.name][3]
+            for metrics in list(_remote.values())
+            if self.name in metrics
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        """Soma `amount` à série dos rótulos informados"""
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def items(self) -> List[Tuple[tuple, float]]:
+        """(rótulos, valor) de cada série deste processo"""
+        return list(self.values.items())
+
+    def _local(self) -> Dict[tuple, float]:
+        return dict(self.items())
+
+    def totals(self) -> Dict[tuple, float]:
+        totals = self._local()
+        for series in self._remote_series():
+            for labels, value in series.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self) -> List[str]:
+        return super().render() + [
+            f"{self.name}{self._label_text(k)} {v}" for k, v in self.totals().items()
+        ]
+
+
+class CallbackCounter(Counter):
+    """Contador lido de outro lugar (ex.: estatísticas do cache) na hora de
+    expor as métricas"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Tuple[str, ...],
+        callback: Callable[[], Dict[tuple, float]],
+    ):
+        super().__init__(name, help, labels)
+        self.callback = callback
+
+    def items(self) -> List[Tuple[tuple, float]]:
+        return list(self.callback().items())
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # rótulos -> [contagem por bucket (+Inf no fim), soma]
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        """Registra uma amostra (em segundos)"""
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def time(self, *labels) -> "_Timer":
+        """Context manager que registra a duração do bloco"""
+        return _Timer(self, labels)
+
+    def snapshot(self) -> tuple:
+        return super().snapshot() + (self.buckets,)
+
+    def _local(self) -> Dict[tuple, list]:
+        return {
+            labels: [list(counts), total]
+            for labels, (counts, total) in list(self.series.items())
+        }
+
+    def totals(self) -> Dict[tuple, list]:
+        totals = self._local()
+        for series in self._remote_series():
+            for labels, (counts, total) in series.items():
+                merged = totals.get(labels)
+                if merged is None:
+                    totals[labels] = [list(counts), total]
+                else:
+                    merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                    merged[1] += total
+        return totals
+
+    def summary(self, labels: tuple) -> Dict:
+        """Contagem, média e quantis estimados pelos buckets de uma série"""
+        return self._summarize(*self.totals()[labels])
+
+    def _summarize(self, counts: List[int], total: float) -> Dict:
+        count = sum(counts)
+        return {
+            "count": count,
+            "avg": total / count * 1000 if count else 0.0,
+            "p50": self.quantile(counts, 0.5) * 1000,
+            "p95": self.quantile(counts, 0.95) * 1000,
+            "p99": self.quantile(counts, 0.99) * 1000,
+        }
+
+    def quantile(self, counts: List[int], q: float) -> float:
+        """Estimativa do quantil `q`, interpolando dentro do bucket (como o
+        histogram_quantile do Prometheus)"""
+        rank = q * sum(counts)
+        seen = 0
+        for i, count in enumerate(counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return 0.0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, (counts, total) in self.totals().items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = self._label_text(labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {total}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(perf_counter() - self.start, *self.labels)
+
+
+def timed(histogram: Histogram, *labels) -> Callable:
+    """Decorador que registra a duração de uma função (síncrona ou async)"""
+
+    def decorator(func: Callable) -> Callable:
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(perf_counter() - start, *labels)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - start, *labels)
+
+        return wrapper
+
+    return decorator
+
+
+# Métricas do bot
+HANDLER_SECONDS = Histogram(
+    "cepzinho_handler_seconds", "Duração dos handlers do bot", ("handler",)
+)
+HANDLER_ERRORS = Counter(
+    "cepzinho_handler_errors_total", "Erros tratados pelos handlers", ("handler",)
+)
+LOOKUP_SECONDS = Histogram(
+    "cepzinho_lookup_seconds",
+    "Duração das consultas (base local, cache e provedores)",
+    ("kind",),
+)
+UPSTREAM_SECONDS = Histogram(
+    "cepzinho_upstream_seconds", "Duração das requisições aos provedores", ("provider",)
+)
+UPSTREAM_REQUESTS = Counter(
+    "cepzinho_upstream_requests_total",
+    "Requisições aos provedores por resultado (ok, erro, recusada)",
+    ("provider", "outcome"),
+)
+DB_WRITE_SECONDS = Histogram(
+    "cepzinho_db_write_seconds", "Duração das escritas no banco", ("operation",)
+)
+TELEGRAM_SECONDS = Histogram(
+    "cepzinho_telegram_seconds", "Duração das chamadas à Bot API", ("method",)
+)
+
+
+def register_cache(cache) -> None:
+    """Expõe os contadores do cache de CEPs (CepCache.stats), substituindo
+    o cache registrado antes"""
+    unregister("cepzinho_cache_lookups_total")
+    results = ("memory_hits", "disk_hits", "stale_hits", "misses", "evictions")
+    CallbackCounter(
+        "cepzinho_cache_lookups_total",
+        "Consultas ao cache de CEPs por resultado",
+        ("result",),
+        lambda: {(result,): cache.stats[result] for result in results},
+    )
+
+
+def unregister(name: str) -> None:
+    """Remove uma métrica do registro"""
+    _registry[:] = [metric for metric in _registry if metric.name != name]
+
+
+def snapshot() -> Dict[str, tuple]:
+    """Retrato de todas as métricas deste processo, para enviar ao principal"""
+    return {metric.name: metric.snapshot() for metric in list(_registry)}
+
+
+def merge(source: str, metrics: Dict[str, tuple]) -> None:
+    """Guarda o retrato (snapshot) mais recente das métricas de `source`
+
+    Os valores são acumulados desde o início do worker, então cada retrato
+    substitui o anterior. Métricas que não existem neste processo (ex.: as
+    do cache, que só os workers têm) são registradas aqui sem séries próprias.
+    """
+    names = {metric.name for metric in _registry}
+    for name, (kind, help, labels, _, *buckets) in metrics.items():
+        if name in names:
+            continue
+        if kind == Histogram.kind:
+            Histogram(name, help, labels, *buckets)
+        else:
+            Counter(name, help, labels)
+    _remote[source] = metrics
+
+
+def render() -> str:
+    """Todas as métricas no formato texto do Prometheus"""
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def summaries() -> List[Tuple[str, tuple, Dict]]:
+    """(métrica, rótulos, resumo) de cada série de histograma, para o /metrics"""
+    return [
+        (metric.name, labels, metric._summarize(*series))
+        for metric in list(_registry)
+        if isinstance(metric, Histogram)
+        for labels, series in metric.totals().items()
+    ]
+
+
+def counters() -> List[Tuple[str, tuple, float]]:
+    """(métrica, rótulos, valor) de cada série de contador, para o /metrics"""
+    return [
+        (metric.name, labels, value)
+        for metric in list(_registry)
+        if isinstance(metric, Counter)
+        for labels, value in metric.totals().items()
+    ]
+
+
+class TimedRequest(HTTPXRequest):
+    """Cliente da Bot API que mede a duração de cada chamada por método"""
+
+    async def do_request(self, url: str, *args, **kwargs):
+        start = perf_counter()
+        try:
+            return await super().do_request(url, *args, **kwargs)
+        finally:
+            TELEGRAM_SECONDS.observe(perf_counter() - start, url.rsplit("/", 1)[-1])
+
+
+class MetricsServer:
+    def __init__(self, listen: str = METRICS_LISTEN, port: int = METRICS_PORT):
+        """Servidor HTTP local (em uma thread) que responde GET /metrics"""
+        self.listen = listen
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> None:
+        """Sobe o servidor; porta 0 desativa o endpoint"""
+        if self.port <= 0:
+            return
+
+        try:
+            self._server = ThreadingHTTPServer((self.listen, self.port), _Handler)
+        except OSError as e:
+            logger.error(
+                "Endpoint de métricas indisponível na porta %s: %s", self.port, e
+            )
+            return
+
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info("Métricas em http://%s:%s/metrics", self.listen, self.port)
+
+    def stop(self) -> None:
+        """Derruba o servidor, se estiver rodando"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
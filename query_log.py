@@ -0,0 +1,135 @@
+"""
+Gravação assíncrona (write-behind) do histórico de consultas do CEPzinho
+
+Os handlers apenas enfileiram a consulta; uma tarefa em segundo plano grava
+as consultas em lotes com `executemany`, numa única transação por lote, fora
+do event loop. O lote é gravado ao atingir QUERY_LOG_BATCH_SIZE consultas ou
+após QUERY_LOG_FLUSH_INTERVAL segundos. A fila é limitada a
+QUERY_LOG_MAX_PENDING consultas: se encher, os handlers aguardam (backpressure).
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from logs import get_logger
+from database import utc_now
+from config import (
+    QUERY_LOG_BATCH_SIZE,
+    QUERY_LOG_FLUSH_INTERVAL,
+    QUERY_LOG_MAX_PENDING,
+)
+
+logger = get_logger(__name__)
+
+_STOP = object()
+
+
+class QueryLogger:
+    def __init__(
+        self,
+        db,
+        batch_size: int = QUERY_LOG_BATCH_SIZE,
+        flush_interval: float = QUERY_LOG_FLUSH_INTERVAL,
+        max_pending: int = QUERY_LOG_MAX_PENDING,
+    ):
+        """Inicializa a fila de consultas a gravar no banco `db` (Database)"""
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"written": 0, "batches": 0, "failed": 0}
+
+    async def start(self) -> None:
+        """Inicia a tarefa de gravação em segundo plano"""
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._batch_ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def log(
+        self,
+        user_id: int,
+        user_name: str,
+        user_full_name: str,
+        query_type: str,
+        query_text: str,
+        result_data: Optional[Dict] = None,
+        success: bool = True,
+    ) -> None:
+        """Enfileira uma consulta; aguarda apenas se a fila estiver cheia"""
+        created_at = utc_now()
+        await self._queue.put(
+            (
+                user_id,
+                user_name,
+                user_full_name,
+                query_type,
+                query_text,
+                result_data,
+                success,
+                created_at,
+            )
+        )
+
+        if self._queue.qsize() >= self.batch_size - 1:
+            self._batch_ready.set()
+
+    async def stop(self) -> None:
+        """Grava tudo o que estiver pendente e encerra a tarefa de gravação"""
+        if self._task is None:
+            return
+
+        await self._queue.put(_STOP)
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            record = await self._queue.get()
+            if record is _STOP:
+                return
+
+            batch = [record]
+
+            # Espera o lote encher ou o intervalo de gravação passar
+            self._batch_ready.clear()
+            if self._queue.qsize() < self.batch_size - 1:
+                try:
+                    await asyncio.wait_for(
+                        self._batch_ready.wait(), self.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+            stopping = False
+            while len(batch) < self.batch_size and not self._queue.empty():
+                record = self._queue.get_nowait()
+                if record is _STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Tuple]) -> None:
+        """Grava um lote em uma thread, sem bloquear o event loop"""
+        try:
+            success = await asyncio.to_thread(self.db.add_queries, batch)
+        except Exception as e:
+            logger.error("Erro ao gravar lote de consultas: %s", e)
+            success = False
+
+        if success:
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        else:
+            self.stats["failed"] += len(batch)
+
+    @property
+    def pending(self) -> int:
+        """Quantidade de consultas aguardando gravação"""
+        return self._queue.qsize() if self._queue is not None else 0
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark do banco de dados do CEPzinho
+
+Compara, para cada método público de `Database`, as operações por segundo do
+comportamento anterior (uma conexão nova por chamada, journal padrão) com as
+conexões persistentes em modo WAL.
+
+Uso:
+    PYTHONPATH=. python test/bench_database.py
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from database import Database
+
+SEED_ROWS = 5000
+
+
+class ConnectPerCallDatabase(Database):
+    """Comportamento anterior: `sqlite3.connect` a cada chamada, sem WAL"""
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, check_same_thread=False)
+
+    @contextmanager
+    def _write(self):
+        with sqlite3.connect(self.db_path) as conn:
+            yield conn
+
+    _read = _write
+
+
+def seed(db: Database) -> None:
+    """Popula o banco com consultas e usuários autorizados"""
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    db.add_queries(
+        [
+            (i % 200, f"@u{i % 200}", "Usuário", "cep", "01310100", {"i": i}, True, now)
+            for i in range(SEED_ROWS)
+        ]
+    )
+    for user_id in range(10):
+        db.add_authorized_user(user_id, f"@admin{user_id}", "Admin")
+    db.set_cached_cep("01310100", {"cep": "01310-100"}, time.time() + 3600)
+
+
+def operations(db: Database) -> dict:
+    """Operações medidas: nome -> função sem argumentos
+
+    As leituras vêm antes das escritas para que os dois bancos tenham o mesmo
+    volume de dados quando as leituras forem medidas.
+    """
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    batch = [(1, "@u1", "Usuário", "cep", "01310100", {"cep": "01310-100"}, True, now)]
+    batch *= 100
+    return {
+        "is_authorized": lambda: db.is_authorized(1),
+        "get_recent_queries": lambda: db.get_recent_queries(20),
+        "get_user_queries": lambda: db.get_user_queries(1, 20),
+        "get_statistics": lambda: db.get_statistics(7),
+        "get_authorized_users": lambda: db.get_authorized_users(),
+        "get_summary_users": lambda: db.get_summary_users(),
+        "add_query": lambda: db.add_query(1, "@u1", "Usuário", "cep", "01310100", {}),
+        "add_queries (lote de 100)": lambda: db.add_queries(batch),
+        "add_authorized_user": lambda: db.add_authorized_user(1, "@admin", "Admin"),
+        "get_cached_cep": lambda: db.get_cached_cep("01310100"),
+        "set_cached_cep": lambda: db.set_cached_cep(
+            "01310100", {"cep": "01310-100"}, time.time() + 3600
+        ),
+    }
+
+
+def measure(func, duration: float = 0.3) -> float:
+    """Executa `func` repetidamente por `duration` segundos; retorna ops/s"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        func()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    """Executa o benchmark e imprime a tabela comparativa"""
+    print("🤖 Benchmark do banco de dados do CEPzinho...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before = ConnectPerCallDatabase(os.path.join(tmp, "antes.db"))
+        after = Database(os.path.join(tmp, "depois.db"))
+        seed(before)
+        seed(after)
+
+        before_ops = operations(before)
+        after_ops = operations(after)
+
+        print(f"{'método':<28}{'antes (ops/s)':>15}{'depois (ops/s)':>16}{'ganho':>9}")
+        for name in before_ops:
+            rate_before = measure(before_ops[name])
+            rate_after = measure(after_ops[name])
+            print(
+                f"{name:<28}{rate_before:>15.0f}{rate_after:>16.0f}"
+                f"{rate_after / rate_before:>8.1f}x"
+            )
+
+        after.close()
+
+    print("\n" + "=" * 50)
+
+
+if __name__ == "__main__":
+    main()
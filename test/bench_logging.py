@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark do logging no caminho de uma consulta /cep do CEPzinho
+
+Compara o tempo de CPU por consulta gasto na thread do event loop com as
+mensagens de log de um /cep: antes, com `LogPerformance()` e f-strings
+formatadas sempre (inclusive as mensagens de depuração, registradas como
+warning) e escrita síncrona no arquivo; depois, com o logger do módulo
+(logs.py), formatação preguiçosa, depuração filtrada pelo nível e escrita
+em uma thread separada.
+
+Uso:
+    PYTHONPATH=. python test/bench_logging.py [--requests 20000]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import logs
+from config import LOG_MESSAGES
+from fake_viacep import SAMPLE_CEPS
+from logperformance import LogPerformance
+
+CEP = "01310100"
+USER_ID = 123456789
+
+
+def before(result: dict) -> None:
+    """Mensagens de um /cep como eram registradas antes"""
+    LogPerformance().info(
+        LOG_MESSAGES["user_message"] % {"user_id": USER_ID, "message": f"/cep {CEP}"}
+    )
+    LogPerformance().warning(f"Buscando CEP {CEP}")
+    LogPerformance().warning(f"CEP {CEP} encontrado: {result}")
+    LogPerformance().info(
+        LOG_MESSAGES["cep_processed"] % {"cep": CEP, "user_id": USER_ID}
+    )
+
+
+def after(logger: logging.Logger, result: dict) -> None:
+    """Mensagens de um /cep com o logger do módulo"""
+    logger.info(
+        LOG_MESSAGES["user_message"], {"user_id": USER_ID, "message": f"/cep {CEP}"}
+    )
+    logger.debug("Buscando CEP %s", CEP)
+    logger.debug("CEP %s encontrado: %s", CEP, result)
+    logger.info(LOG_MESSAGES["cep_processed"], {"cep": CEP, "user_id": USER_ID})
+
+
+def per_request(requests: int, log_request) -> float:
+    """Tempo de CPU (µs) da thread atual por consulta"""
+    start = time.thread_time()
+    for _ in range(requests):
+        log_request()
+    return (time.thread_time() - start) / requests * 1e6
+
+
+def main():
+    """Executa o benchmark e imprime o custo por consulta antes e depois"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    result = SAMPLE_CEPS[CEP]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old = LogPerformance().logger
+        old.handlers = [logging.FileHandler(os.path.join(tmp, "antes.log"))]
+        logs.setup([logging.FileHandler(os.path.join(tmp, "depois.log"))], "INFO")
+        logger = logs.get_logger("bench")
+
+        print("🤖 Benchmark de logging do CEPzinho...\n")
+        print(f"{'':<10}{'µs/consulta (CPU do event loop)':>34}")
+        baseline = per_request(args.requests, lambda: before(result))
+        lazy = per_request(args.requests, lambda: after(logger, result))
+        logs.shutdown()
+
+    print(f"{'antes':<10}{baseline:>34.2f}")
+    print(f"{'depois':<10}{lazy:>34.2f}")
+    print(f"\nEconomia: {baseline - lazy:.1f}µs por consulta ({baseline / lazy:.1f}x)")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark da formatação das respostas de CEP do CEPzinho
+
+Mede o tempo de CPU por consulta para montar a resposta do /cep e o
+resultado inline de um CEP que está no cache: antes, formatando a partir do
+dicionário a cada consulta; depois, com as mensagens memoizadas no registro
+do cache (cache.CepRecord).
+
+Uso:
+    PYTHONPATH=. python test/bench_render.py [--requests 100000]
+"""
+
+import argparse
+import time
+
+from cache import CepCache
+from fake_viacep import SAMPLE_CEPS
+from main import CEPzinho
+from messages import format_cep_response
+
+CEP = "01310100"
+
+
+def per_request(requests: int, lookup) -> float:
+    """Tempo de CPU (µs) por consulta de `lookup`"""
+    start = time.process_time()
+    for _ in range(requests):
+        lookup()
+    return (time.process_time() - start) / requests * 1e6
+
+
+def main():
+    """Executa o benchmark e imprime o custo por consulta antes e depois"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+
+    cache = CepCache()
+    cache.set(CEP, SAMPLE_CEPS[CEP])
+
+    def before():
+        data = dict(cache.get(CEP))  # dicionário comum: sem memoização
+        format_cep_response(data)
+        CEPzinho._inline_cep_article(None, CEP, data)
+
+    def after():
+        data = cache.get(CEP)
+        format_cep_response(data)
+        CEPzinho._inline_cep_article(None, CEP, data)
+
+    print("🤖 Benchmark de formatação do CEPzinho...\n")
+    print(f"{'':<10}{'µs/consulta (CPU)':>20}")
+    baseline = per_request(args.requests, before)
+    memoized = per_request(args.requests, after)
+    print(f"{'antes':<10}{baseline:>20.2f}")
+    print(f"{'depois':<10}{memoized:>20.2f}")
+    print(f"\nGanho: {baseline / memoized:.1f}x")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Benchmark de replay dos handlers do CEPzinho (offline)
+
+Monta objetos `Update` a partir de um trace gravado (uma atualização JSON do
+Telegram por linha) ou sintético (/cep, /rua, rajadas de teclas inline e
+/stats de um admin) e chama os handlers do CEPzinho diretamente, sem polling
+nem webhook, contra uma Bot API e um ViaCEP falsos (latência configurável).
+
+Mede, por handler: vazão, latência p50/p95/p99 e memória alocada por chamada
+(pico do tracemalloc, em uma segunda passada sequencial; inclui os buffers de
+leitura de 64KiB do httpx). O resultado pode
+ser gravado como baseline JSON e comparado com o de outro commit; a saída é
+diferente de zero se o p95 de algum handler piorar além da tolerância.
+
+Uso:
+    PYTHONPATH=. python test/bench_replay.py [trace.jsonl] [--latency 0.02]
+        [--concurrency 20] [--save baseline.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench_webhook import percentile
+from fake_telegram import FakeTelegram
+from fake_viacep import FakeViaCep
+
+ADMIN_ID = 42
+SYNTHETIC_UPDATES = 1000
+
+# Rajada de teclas de uma consulta inline: cada prefixo é uma atualização
+INLINE_TYPING = ["0131", "01310", "013101", "0131010", "01310100"]
+
+
+def message_update(user_id: int, text: str) -> dict:
+    """Atualização de mensagem com um comando, no formato do Telegram"""
+    user = {"id": user_id, "is_bot": False, "first_name": f"Usuário {user_id}"}
+    return {
+        "message": {
+            "message_id": 1,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": user,
+            "text": text,
+            "entities": [
+                {"type": "bot_command", "offset": 0, "length": len(text.split()[0])}
+            ],
+        }
+    }
+
+
+def inline_update(user_id: int, query: str) -> dict:
+    """Atualização de consulta inline, no formato do Telegram"""
+    user = {"id": user_id, "is_bot": False, "first_name": f"Usuário {user_id}"}
+    return {"inline_query": {"id": "1", "from": user, "query": query, "offset": ""}}
+
+
+def synthetic_trace(count: int, seed: int) -> list:
+    """Gera um trace com a mistura de consultas de produção
+
+    CEPs conhecidos se repetem (acertos no cache), CEPs novos vão ao provedor
+    (e não existem, como os CEPs digitados errado) e as rajadas inline são
+    prefixos de um CEP digitado tecla a tecla pelo mesmo usuário.
+    """
+    rng = random.Random(seed)
+    trace = []
+    while len(trace) < count:
+        user_id = rng.randint(1000, 1999)
+        kind = rng.random()
+        if kind < 0.45:
+            cep = rng.choice(["01310-100", "36246-200", "01310100"])
+            trace.append(message_update(user_id, f"/cep {cep}"))
+        elif kind < 0.55:
+            trace.append(message_update(user_id, f"/cep {rng.randint(0, 10**8):08d}"))
+        elif kind < 0.7:
+            address = "Avenida Paulista, São Paulo, SP"
+            trace.append(message_update(user_id, f"/rua {address}"))
+        elif kind < 0.97:
+            trace.extend(inline_update(user_id, query) for query in INLINE_TYPING)
+        else:
+            trace.append(message_update(ADMIN_ID, "/stats"))
+    return [dict(update, update_id=i) for i, update in enumerate(trace[:count], 1)]
+
+
+def sessions(trace: list) -> list:
+    """Agrupa consultas inline seguidas do mesmo usuário em uma rajada"""
+    grouped = []
+    for update in trace:
+        inline = update.get("inline_query")
+        last = grouped[-1][-1] if grouped else None
+        if (
+            inline
+            and last
+            and "inline_query" in last
+            and last["inline_query"]["from"]["id"] == inline["from"]["id"]
+        ):
+            grouped[-1].append(update)
+        else:
+            grouped.append([update])
+    return grouped
+
+
+class Replay:
+    def __init__(self, bot, keystroke_gap: float):
+        """Chama os handlers do `bot` (CEPzinho) para cada atualização"""
+        self.bot = bot
+        self.app = bot.app
+        self.keystroke_gap = keystroke_gap
+        self.latencies = {}  # handler -> [segundos]
+        self.cancelled = 0
+
+    def route(self, data: dict):
+        """(Update, nome do handler, handler do PTB, resultado do check)"""
+        from telegram import Update
+        from telegram.ext import CommandHandler
+
+        update = Update.de_json(data, self.app.bot)
+        for group in self.app.handlers.values():
+            for handler in group:
+                check = handler.check_update(update)
+                if check is not None and check is not False:
+                    if isinstance(handler, CommandHandler):
+                        name = f"/{next(iter(handler.commands))}"
+                    else:
+                        name = "inline"
+                    return update, name, handler, check
+        return update, None, None, None
+
+    async def dispatch(self, data: dict) -> None:
+        """Executa o handler de uma atualização e registra a latência"""
+        from telegram.ext import CallbackContext
+
+        update, name, handler, check = self.route(data)
+        if handler is None:
+            return
+
+        context = CallbackContext.from_update(update, self.app)
+        start = time.perf_counter()
+        try:
+            await handler.handle_update(update, self.app, check, context)
+        except asyncio.CancelledError:
+            self.cancelled += 1  # tecla substituída pela seguinte
+            return
+        self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+
+    async def session(self, updates: list) -> None:
+        """Uma atualização isolada ou uma rajada inline (teclas espaçadas por
+        `keystroke_gap`, cada uma cancelando a anterior como no bot)"""
+        if len(updates) == 1:
+            await self.dispatch(updates[0])
+            return
+
+        tasks = []
+        for update in updates:
+            tasks.append(asyncio.ensure_future(self.dispatch(update)))
+            await asyncio.sleep(self.keystroke_gap)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self, trace: list, concurrency: int) -> float:
+        """Reproduz o trace com `concurrency` sessões em paralelo; retorna o
+        tempo total em segundos"""
+        pending = sessions(trace)
+        pending.reverse()
+
+        async def worker():
+            while pending:
+                await self.session(pending.pop())
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    async def allocations(self, trace: list) -> dict:
+        """Memória alocada (pico, KiB, mediana) por chamada de cada handler,
+        medida em uma passada sequencial para não misturar handlers
+        concorrentes"""
+        peaks = {}
+        tracemalloc.start()
+        try:
+            for data in trace:
+                _, name, handler, _ = self.route(data)
+                if handler is None:
+                    continue
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                await self.dispatch(data)
+                peak = tracemalloc.get_traced_memory()[1]
+                peaks.setdefault(name, []).append((peak - before) / 1024)
+        finally:
+            tracemalloc.stop()
+        return {name: percentile(values, 0.5) for name, values in peaks.items()}
+
+
+async def run(trace: list, args) -> dict:
+    """Sobe o bot contra os serviços falsos, reproduz o trace e encerra"""
+    from main import CEPzinho
+
+    bot = CEPzinho()
+    bot.db.add_authorized_user(ADMIN_ID, "@admin", "Admin")
+    if args.debounce is not None:
+        bot.inline_debounce = args.debounce
+
+    app = bot.app
+    async with app:
+        await bot._post_init(app)
+        try:
+            replay = Replay(bot, args.keystroke_gap)
+            elapsed = await replay.run(trace, args.concurrency)
+            latencies, cancelled = replay.latencies, replay.cancelled
+
+            allocations = {}
+            if not args.no_alloc:
+                replay.latencies = {}
+                bot.inline_debounce = 0
+                allocations = await replay.allocations(trace[: args.alloc_updates])
+        finally:
+            await bot._post_shutdown(app)
+
+    handlers = {}
+    for name, values in sorted(latencies.items()):
+        handlers[name] = {
+            "calls": len(values),
+            "throughput": len(values) / elapsed,
+            "p50": percentile(values, 0.5) * 1000,
+            "p95": percentile(values, 0.95) * 1000,
+            "p99": percentile(values, 0.99) * 1000,
+            "alloc_kib": allocations.get(name),
+        }
+    return {
+        "updates": len(trace),
+        "elapsed": elapsed,
+        "throughput": len(trace) / elapsed,
+        "cancelled": cancelled,
+        "handlers": handlers,
+    }
+
+
+def commit() -> str:
+    """Commit atual do repositório (para identificar o baseline)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def report(result: dict) -> None:
+    print(
+        f"{'handler':<12}{'chamadas':>9}{'/s':>9}{'p50 (ms)':>10}"
+        f"{'p95 (ms)':>10}{'p99 (ms)':>10}{'KiB/chamada':>13}"
+    )
+    for name, stats in result["handlers"].items():
+        alloc = stats["alloc_kib"]
+        print(
+            f"{name:<12}{stats['calls']:>9}{stats['throughput']:>9.1f}"
+            f"{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}"
+            f"{'-' if alloc is None else f'{alloc:.1f}':>13}"
+        )
+    print(
+        f"\n{result['updates']} atualizações em {result['elapsed']:.1f}s "
+        f"({result['throughput']:.0f}/s, {result['cancelled']} teclas inline "
+        "substituídas pela seguinte)"
+    )
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> bool:
+    """Imprime a variação em relação ao baseline; False se algum p95 piorou
+    mais que `tolerance` (fração)"""
+    print(f"\nComparação com o baseline ({baseline.get('commit', '?')}):")
+    ok = True
+    for name, stats in result["handlers"].items():
+        before = baseline["handlers"].get(name)
+        if not before:
+            continue
+
+        changes = []
+        for key in ("throughput", "p50", "p95", "p99", "alloc_kib"):
+            if stats[key] is None or not before.get(key):
+                continue
+            change = (stats[key] - before[key]) / before[key]
+            changes.append(f"{key} {change:+.0%}")
+        regressed = before["p95"] and stats["p95"] > before["p95"] * (1 + tolerance)
+        ok = ok and not regressed
+        print(f"{'❌' if regressed else '✅'} {name}: {', '.join(changes)}")
+    return ok
+
+
+def main():
+    """Executa o benchmark, imprime o relatório e grava/compara o baseline"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("trace", nargs="?", help="Arquivo .jsonl de atualizações")
+    parser.add_argument("--updates", type=int, default=SYNTHETIC_UPDATES)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--keystroke-gap", type=float, default=0.05)
+    parser.add_argument("--debounce", type=float, help="Padrão: INLINE_DEBOUNCE")
+    parser.add_argument("--alloc-updates", type=int, default=200)
+    parser.add_argument("--no-alloc", action="store_true")
+    parser.add_argument("--save", help="Grava o resultado como baseline JSON")
+    parser.add_argument("--compare", help="Baseline JSON para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.trace:
+        with open(args.trace, encoding="utf-8") as file:
+            trace = [json.loads(line) for line in file if line.strip()]
+    else:
+        trace = synthetic_trace(args.updates, args.seed)
+
+    print("🤖 Benchmark de replay dos handlers do CEPzinho...\n")
+
+    with FakeTelegram() as telegram, FakeViaCep(latency=args.latency) as viacep:
+        tmp = tempfile.TemporaryDirectory()
+        os.environ.update(
+            {
+                "TELEGRAM_TOKEN": "123456:bench",
+                "TELEGRAM_API_URL": telegram.base_url,
+                "CEP_API_URL": viacep.cep_url,
+                "ADDRESS_API_URL": viacep.address_url,
+                "CEP_PROVIDERS": "viacep",
+                "CEP_LOCAL_DATASET": os.path.join(tmp.name, "sem-base-local.idx"),
+                "QUERY_RETENTION_DAYS": "0",
+                "CACHE_WARMUP_TOP_N": "0",
+                "METRICS_PORT": "0",
+            }
+        )
+        repo = os.getcwd()
+        os.chdir(tmp.name)  # banco de dados descartável
+
+        result = asyncio.run(run(trace, args))
+        os.chdir(repo)
+        tmp.cleanup()
+
+    result.update(commit=commit(), latency=args.latency, concurrency=args.concurrency)
+    report(result)
+
+    ok = True
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            ok = compare(result, json.load(file), args.tolerance)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2, ensure_ascii=False)
+        print(f"\n💾 Baseline gravado em {args.save}")
+
+    print("\n" + "=" * 50)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Benchmark do modo webhook do CEPzinho
+
+Sobe o bot em modo webhook contra uma Bot API e um ViaCEP falsos, reenvia
+atualizações gravadas (uma atualização JSON do Telegram por linha) ao
+endpoint do webhook e mede a latência ponta a ponta de cada handler: do POST
+da atualização até a resposta do bot chegar à Bot API (p50/p99 por tipo).
+
+Sem arquivo, usa atualizações sintéticas de /cep e de consultas inline.
+
+Uso:
+    PYTHONPATH=. python test/bench_webhook.py [updates.jsonl] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import httpx
+
+from fake_telegram import FakeTelegram
+from fake_viacep import FakeViaCep
+
+SECRET = "bench-secret"
+SYNTHETIC_UPDATES = 500
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def synthetic_updates(count: int) -> list:
+    """Gera atualizações no formato do Telegram: /cep e consultas inline"""
+    ceps = ["01310-100", "36246-200", "99999-999"]
+    updates = []
+    for i in range(count):
+        user = {"id": 1000 + i % 50, "is_bot": False, "first_name": f"Usuário {i}"}
+        if i % 2:
+            updates.append(
+                {
+                    "update_id": i,
+                    "inline_query": {
+                        "id": str(i),
+                        "from": user,
+                        "query": ceps[i % 3].replace("-", ""),
+                        "offset": "",
+                    },
+                }
+            )
+        else:
+            text = f"/cep {ceps[i % 3]}"
+            updates.append(
+                {
+                    "update_id": i,
+                    "message": {
+                        "message_id": i,
+                        "date": int(time.time()),
+                        "chat": {"id": user["id"], "type": "private"},
+                        "from": user,
+                        "text": text,
+                        "entities": [{"type": "bot_command", "offset": 0, "length": 4}],
+                    },
+                }
+            )
+    return updates
+
+
+def prepare(updates: list) -> list:
+    """Numera as atualizações e dá a cada uma uma chave de resposta única
+
+    Retorna (tipo, chave, atualização). A chave é o chat_id (mensagens) ou o
+    id da consulta inline, que a Bot API falsa registra ao receber a resposta.
+    """
+    prepared = []
+    for update_id, update in enumerate(updates, start=1):
+        update = dict(update, update_id=update_id)
+        if "inline_query" in update:
+            update["inline_query"] = dict(update["inline_query"], id=str(update_id))
+            prepared.append(("inline", str(update_id), update))
+        elif "message" in update:
+            chat = dict(update["message"]["chat"], id=update_id)
+            update["message"] = dict(update["message"], chat=chat)
+            prepared.append(("mensagem", update_id, update))
+    return prepared
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def replay(telegram: FakeTelegram, prepared: list, concurrency: int):
+    """Envia as atualizações ao webhook e retorna {tipo: [latências em s]}"""
+    from main import webhook_settings
+
+    settings = webhook_settings()
+    url = f"http://127.0.0.1:{settings['port']}/{settings['url_path']}"
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+    sent = {}
+    queue = asyncio.Queue()
+    for item in prepared:
+        queue.put_nowait(item)
+
+    async with httpx.AsyncClient() as client:
+        # Requisições sem o segredo correto são recusadas
+        response = await client.post(url, json=prepared[0][2])
+        assert response.status_code == 403, response.status_code
+
+        async def sender():
+            while not queue.empty():
+                _, key, update = queue.get_nowait()
+                sent[key] = time.perf_counter()
+                response = await client.post(url, json=update, headers=headers)
+                response.raise_for_status()
+
+        await asyncio.gather(*(sender() for _ in range(concurrency)))
+
+    # Espera as respostas pararem de chegar
+    expected = len(prepared)
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline:
+        answered = {key for key, _ in telegram.replies}
+        if len(answered) >= expected:
+            break
+        await asyncio.sleep(0.05)
+
+    first_reply = {}
+    for key, moment in telegram.replies:
+        first_reply.setdefault(key, moment)
+
+    latencies = {}
+    for kind, key, _ in prepared:
+        if key in first_reply:
+            latencies.setdefault(kind, []).append(first_reply[key] - sent[key])
+    return latencies
+
+
+async def run(telegram: FakeTelegram, updates: list, concurrency: int) -> dict:
+    """Sobe o bot em modo webhook, reenvia as atualizações e encerra"""
+    from main import CEPzinho, webhook_settings
+
+    bot = CEPzinho()
+    app = bot.app
+    async with app:
+        await bot._post_init(app)
+        await app.updater.start_webhook(**webhook_settings())
+        await app.start()
+        try:
+            return await replay(telegram, prepare(updates), concurrency)
+        finally:
+            await app.updater.stop()
+            await app.stop()
+            await bot._post_shutdown(app)
+
+
+def main():
+    """Executa o benchmark e imprime p50/p99 por tipo de atualização"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("updates", nargs="?", help="Arquivo .jsonl de atualizações")
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.updates:
+        with open(args.updates, encoding="utf-8") as file:
+            updates = [json.loads(line) for line in file if line.strip()]
+    else:
+        updates = synthetic_updates(SYNTHETIC_UPDATES)
+
+    print("🤖 Benchmark do webhook do CEPzinho...\n")
+
+    with FakeTelegram() as telegram, FakeViaCep() as viacep:
+        tmp = tempfile.TemporaryDirectory()
+        os.environ.update(
+            {
+                "TELEGRAM_TOKEN": "123456:bench",
+                "TELEGRAM_API_URL": telegram.base_url,
+                "CEP_API_URL": viacep.cep_url,
+                "ADDRESS_API_URL": viacep.address_url,
+                "BOT_MODE": "webhook",
+                "WEBHOOK_URL": "https://cepzinho.exemplo.com.br",
+                "WEBHOOK_PORT": str(free_port()),
+                "WEBHOOK_SECRET": SECRET,
+                "INLINE_DEBOUNCE": os.getenv("INLINE_DEBOUNCE", "0"),
+                "QUERY_RETENTION_DAYS": "0",
+            }
+        )
+        os.chdir(tmp.name)  # banco de dados descartável
+
+        start = time.perf_counter()
+        latencies = asyncio.run(run(telegram, updates, args.concurrency))
+        elapsed = time.perf_counter() - start
+        tmp.cleanup()
+
+    print(f"{'tipo':<12}{'respostas':>10}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+    for kind, values in latencies.items():
+        print(
+            f"{kind:<12}{len(values):>10}"
+            f"{percentile(values, 0.5) * 1000:>11.1f}"
+            f"{percentile(values, 0.99) * 1000:>11.1f}"
+        )
+    total = sum(len(values) for values in latencies.values())
+    print(f"\n{total}/{len(updates)} respostas em {elapsed:.1f}s")
+
+    print("\n" + "=" * 50)
+    return 0 if total == len(updates) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escalabilidade do modo multi-processo do CEPzinho
+
+Para 1, 2, 4... workers, distribui o mesmo lote de atualizações /cep (CEPs
+distintos, que precisam ir ao ViaCEP falso com latência simulada) pelo
+WorkerPool e mede a vazão até todas as respostas chegarem à Bot API falsa.
+Também confere que as respostas de cada chat chegaram na ordem de envio e que
+todas as consultas foram gravadas pelo processo principal.
+
+Uso:
+    PYTHONPATH=. python test/bench_workers.py [--updates 400] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from fake_telegram import FakeTelegram
+from fake_viacep import SAMPLE_CEPS, FakeViaCep
+
+CHATS = 40
+
+
+def make_updates(count: int) -> tuple:
+    """Gera `count` comandos /cep, cada um com um CEP diferente"""
+    ceps, updates = {}, []
+    for i in range(count):
+        cep = f"{10000000 + i:08d}"
+        formatted = f"{cep[:5]}-{cep[5:]}"
+        ceps[cep] = dict(SAMPLE_CEPS["01310100"], cep=formatted)
+
+        chat_id = 1000 + i % CHATS
+        user = {"id": chat_id, "is_bot": False, "first_name": "Usuário"}
+        updates.append(
+            {
+                "update_id": i + 1,
+                "message": {
+                    "message_id": i + 1,
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "from": user,
+                    "text": f"/cep {formatted}",
+                    "entities": [{"type": "bot_command", "offset": 0, "length": 4}],
+                },
+            }
+        )
+    return ceps, updates
+
+
+def in_order(telegram: FakeTelegram, updates: list) -> bool:
+    """Confere se cada chat recebeu as respostas na ordem dos comandos"""
+    expected = {}
+    for update in updates:
+        message = update["message"]
+        cep = message["text"].split()[1]
+        expected.setdefault(message["chat"]["id"], []).append(cep)
+
+    for chat_id, ceps in expected.items():
+        texts = telegram.texts.get(chat_id, [])
+        if [cep for cep in ceps if any(cep in t for t in texts)] != ceps:
+            return False
+        positions = [next(i for i, t in enumerate(texts) if cep in t) for cep in ceps]
+        if positions != sorted(positions):
+            return False
+    return True
+
+
+def measure(workers: int, updates: list, telegram: FakeTelegram) -> tuple:
+    """Roda o lote com `workers` processos; retorna (atualizações/s, ok)
+
+    ok indica que as respostas de cada chat vieram em ordem e que o processo
+    principal gravou todas as consultas enviadas pelos workers.
+    """
+    from workers import WorkerPool
+
+    telegram.replies.clear()
+    telegram.texts.clear()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.chdir(tmp.name)  # banco e cache compartilhado novos a cada rodada
+
+    pool = WorkerPool(workers)
+    pool.start()
+
+    start = time.perf_counter()
+    for update in updates:
+        pool.dispatch(update, update["message"]["chat"]["id"])
+
+    deadline = start + 120
+    while len(telegram.replies) < len(updates) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    pool.stop()
+    with pool.db._read() as conn:
+        stored = conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+    pool.db.close()
+    os.chdir("/")
+    tmp.cleanup()
+
+    ok = in_order(telegram, updates) and stored == len(updates)
+    return len(telegram.replies) / elapsed, ok
+
+
+def main():
+    """Executa o benchmark e imprime a vazão e o ganho por número de workers"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--updates", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    print("🤖 Benchmark de workers do CEPzinho...")
+    print(f"   {os.cpu_count()} CPUs, latência do ViaCEP {args.latency * 1000:.0f}ms\n")
+
+    ceps, updates = make_updates(args.updates)
+    ok = True
+
+    with FakeTelegram() as telegram, FakeViaCep(args.latency, ceps) as viacep:
+        os.environ.update(
+            {
+                "TELEGRAM_TOKEN": "123456:bench",
+                "TELEGRAM_API_URL": telegram.base_url,
+                "CEP_API_URL": viacep.cep_url,
+                "ADDRESS_API_URL": viacep.address_url,
+                "QUERY_RETENTION_DAYS": "0",
+            }
+        )
+
+        print(f"{'workers':<10}{'atualizações/s':>16}{'ganho':>9}{'ordem':>8}")
+        baseline = None
+        for workers in args.workers:
+            rate, ordered = measure(workers, updates, telegram)
+            baseline = baseline or rate
+            ok = ok and ordered
+            print(
+                f"{workers:<10}{rate:>16.0f}{rate / baseline:>8.1f}x"
+                f"{'ok' if ordered else 'ERRO':>8}"
+            )
+
+    print("\n" + "=" * 50)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+CEPzinho montado para os testes dos handlers
+
+make_bot() cria o bot pelo __init__, como em produção, mas com uma
+Application falsa (só guarda os handlers, sem falar com o Telegram) e um
+banco SQLite temporário. Ao sair, fecha o banco e desfaz a configuração
+compartilhada do Cep (cache e base local) e das métricas do cache.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+from unittest.mock import patch
+
+import metrics
+from cep import Cep
+from database import Database
+from main import Application, CEPzinho
+
+
+class FakeApplication:
+    """Application do python-telegram-bot sem rede: apenas guarda os handlers"""
+
+    def __init__(self):
+        self.handlers = []
+        self.job_queue = None
+
+    def add_handler(self, handler, group: int = 0) -> None:
+        self.handlers.append(handler)
+
+
+class FakeApplicationBuilder:
+    """Aceita a configuração do ApplicationBuilder e cria uma FakeApplication"""
+
+    def __getattr__(self, name: str):
+        return lambda *args, **kwargs: self
+
+    def build(self) -> FakeApplication:
+        return FakeApplication()
+
+
+@contextmanager
+def make_bot(authorized: Iterable[int] = (), **settings) -> Iterator[CEPzinho]:
+    """Cria o bot pelo __init__ com a Application falsa e um banco temporário
+
+    Os usuários em `authorized` são cadastrados como administradores e
+    `settings` substitui atributos de configuração do bot (por exemplo,
+    inline_debounce=0.1).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        for user_id in authorized:
+            db.add_authorized_user(user_id, "@admin", "Admin")
+
+        with patch.object(Application, "builder", FakeApplicationBuilder):
+            bot = CEPzinho(db=db)
+
+        for name, value in settings.items():
+            if not hasattr(bot, name):
+                raise AttributeError(f"CEPzinho não tem a configuração {name}")
+            setattr(bot, name, value)
+
+        try:
+            yield bot
+        finally:
+            db.close()
+            Cep.cache = Cep.local_index = Cep.address_index = None
+            metrics.unregister("cepzinho_cache_lookups_total")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Bot API do Telegram falsa para benchmarks locais do CEPzinho
+
+Responde aos métodos usados pelo bot e registra o instante de cada resposta
+enviada (sendMessage por chat_id, answerInlineQuery por inline_query_id) e o
+texto das mensagens de cada chat.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "CEPzinho",
+    "username": "cepzinho_bot",
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class FakeTelegram:
+    """Servidor HTTP local que imita a Bot API (`{base_url}{token}/{método}`)"""
+
+    def __init__(self):
+        self.replies = []  # (chave, instante) na ordem de chegada
+        self.texts = {}  # chat_id -> textos enviados, em ordem
+        self._lock = threading.Lock()
+        self._message_id = 0
+        self._server = _Server(("127.0.0.1", 0), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/bot"
+
+    def _result(self, method: str, params: dict):
+        if method == "getMe":
+            return BOT_USER
+
+        if method == "sendMessage":
+            chat_id = int(params["chat_id"])
+            with self._lock:
+                self._message_id += 1
+                self.replies.append((chat_id, time.perf_counter()))
+                self.texts.setdefault(chat_id, []).append(params.get("text", ""))
+                message_id = self._message_id
+            return {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+
+        if method == "answerInlineQuery":
+            with self._lock:
+                self.replies.append((params["inline_query_id"], time.perf_counter()))
+
+        return True
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode("utf-8")
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(body or "{}")
+                else:
+                    params = {k: v[0] for k, v in parse_qs(body).items()}
+
+                method = self.path.rstrip("/").rsplit("/", 1)[-1]
+                payload = {"ok": True, "result": fake._result(method, params)}
+
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeTelegram":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeTelegram":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Servidor ViaCEP falso para testes locais e testes de carga do CEPzinho
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+SAMPLE_CEPS = {
+    "01310100": {
+        "cep": "01310-100",
+        "logradouro": "Avenida Paulista",
+        "complemento": "de 612 a 1510 - lado par",
+        "bairro": "Bela Vista",
+        "localidade": "São Paulo",
+        "uf": "SP",
+        "ibge": "3550308",
+        "gia": "1004",
+        "ddd": "11",
+        "siafi": "7107",
+    },
+    "36246200": {
+        "cep": "36246-200",
+        "logradouro": "",
+        "complemento": "",
+        "bairro": "",
+        "localidade": "Santos Dumont",
+        "uf": "MG",
+        "ibge": "3160702",
+        "gia": "",
+        "ddd": "32",
+        "siafi": "5387",
+    },
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class FakeViaCep:
+    """Servidor HTTP local que imita as rotas do ViaCEP"""
+
+    def __init__(self, latency: float = 0.0, ceps: dict = None):
+        self.latency = latency
+        self.ceps = ceps if ceps is not None else dict(SAMPLE_CEPS)
+        self.requests = 0
+        self.status = 200  # outro valor simula o provedor fora do ar
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def cep_url(self) -> str:
+        return self.base_url + "/ws/{cep}/json/"
+
+    @property
+    def address_url(self) -> str:
+        return self.base_url + "/ws/{uf}/{cidade}/{logradouro}/json/"
+
+    def lookup_address(self, uf: str, cidade: str, logradouro: str) -> list:
+        """Busca linear nos CEPs conhecidos (suficiente para os testes)"""
+        return [
+            data
+            for data in self.ceps.values()
+            if data["uf"].lower() == uf.lower()
+            and data["localidade"].lower() == cidade.lower()
+            and logradouro.lower() in data["logradouro"].lower()
+        ]
+
+    def respond(self, parts: list) -> tuple:
+        """Retorna (status HTTP, corpo) para o caminho já separado em partes"""
+        if len(parts) == 3:
+            return 200, self.ceps.get(parts[1], {"erro": True})
+        if len(parts) == 5:
+            return 200, self.lookup_address(parts[1], parts[2], parts[3])
+        return 200, {"erro": True}
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.requests += 1
+
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                if fake.status != 200:
+                    self.send_response(fake.status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                parts = [unquote(p) for p in self.path.strip("/").split("/")]
+                status, payload = fake.respond(parts)
+
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeViaCep":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeViaCep":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class FakeBrasilApi(FakeViaCep):
+    """Servidor HTTP local que imita a rota de CEP da BrasilAPI"""
+
+    @property
+    def cep_url(self) -> str:
+        return self.base_url + "/api/cep/v1/{cep}"
+
+    def respond(self, parts: list) -> tuple:
+        if not parts[-1].isdigit() or len(parts[-1]) != 8:
+            return 400, {"name": "CepPromiseError", "message": "CEP inválido"}
+        data = self.ceps.get(parts[-1])
+        if data is None:
+            return 404, {"name": "CepPromiseError", "message": "CEP não encontrado"}
+        return 200, {
+            "cep": data["cep"].replace("-", ""),
+            "state": data["uf"],
+            "city": data["localidade"],
+            "neighborhood": data["bairro"],
+            "street": data["logradouro"],
+            "service": "fake",
+        }
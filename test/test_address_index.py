@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o índice de endereços (busca /rua sem rede) do CEPzinho
+"""
+
+import os
+import tempfile
+import time
+
+from address_index import AddressIndex, fold
+from cep import Cep, ViaCepProvider
+from cep_index import CepIndex, build_index
+from test_cep_index import write_csv
+
+ROWS = [
+    {
+        "cep": "01310-100",
+        "logradouro": "Avenida Paulista",
+        "localidade": "São Paulo",
+        "uf": "SP",
+    },
+    {
+        "cep": "01311-000",
+        "logradouro": "Avenida Paulista Nova",
+        "localidade": "São Paulo",
+        "uf": "SP",
+    },
+    {
+        "cep": "01001-000",
+        "logradouro": "Praça da Sé",
+        "localidade": "São Paulo",
+        "uf": "SP",
+    },
+    {
+        "cep": "01415-000",
+        "logradouro": "Rua Paulistânia",
+        "localidade": "São Paulo",
+        "uf": "SP",
+    },
+    {
+        "cep": "36246-300",
+        "logradouro": "Rua Maria do Carmo Silva",
+        "localidade": "Santos Dumont",
+        "uf": "MG",
+    },
+    {
+        "cep": "36246-400",
+        "logradouro": "Avenida Paulista",
+        "localidade": "Santos Dumont",
+        "uf": "MG",
+    },
+]
+
+
+def build(tmp: str) -> CepIndex:
+    """Gera a base local de teste e a abre"""
+    csv_path = os.path.join(tmp, "ceps.csv")
+    idx_path = os.path.join(tmp, "ceps.idx")
+    write_csv(csv_path, ROWS)
+    build_index(csv_path, idx_path)
+    return CepIndex(idx_path)
+
+
+def test_fold():
+    """Testa a normalização de acentos e caixa"""
+    print("🧪 Testando normalização de texto...")
+
+    assert fold("  Praça da SÉ ") == "praca da se"
+    assert fold("São Paulo") == fold("sao paulo")
+    print("✅ Normalização OK")
+
+
+def test_search_ranking():
+    """Testa a busca por prefixo, o ranking e o particionamento por cidade"""
+    print("\n🧪 Testando busca de endereços...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cep_index = build(tmp)
+        try:
+            index = AddressIndex(cep_index)
+
+            result = index.search("sp", "sao paulo", "avenida paulista")
+            assert [r["cep"] for r in result] == ["01310-100", "01311-000"]
+
+            result = index.search("SP", "São Paulo", "paulist")
+            assert sorted(r["cep"] for r in result) == [
+                "01310-100",
+                "01311-000",
+                "01415-000",
+            ]
+
+            assert index.search("SP", "São Paulo", "praca se")[0]["cep"] == "01001-000"
+            assert (
+                index.search("MG", "Santos Dumont", "maria carmo")[0]["cep"]
+                == "36246-300"
+            )
+            assert index.search("RJ", "São Paulo", "paulista") == []
+            assert index.search("SP", "São Paulo", "inexistente") == []
+
+            start = time.perf_counter()
+            for _ in range(1000):
+                index.search("SP", "São Paulo", "avenida paulista")
+            per_search = (time.perf_counter() - start) / 1000
+            print(f"✅ Busca de endereço: {per_search * 1e6:.1f} µs por consulta")
+        finally:
+            cep_index.close()
+
+
+def test_cep_search_address_uses_index():
+    """Testa que /rua responde pelo índice sem chamar o ViaCEP"""
+    print("\n🧪 Testando Cep.search_address com índice local...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cep_index = build(tmp)
+        original = Cep.providers, Cep.address_index
+        Cep.providers = [
+            ViaCepProvider("", "http://127.0.0.1:9/{uf}/{cidade}/{logradouro}")
+        ]
+        Cep.address_index = AddressIndex(cep_index)
+        try:
+            result = Cep().search_address("SP", "Sao Paulo", "Praça da Sé")
+            assert result[0]["logradouro"] == "Praça da Sé"
+        finally:
+            Cep.providers, Cep.address_index = original
+            cep_index.close()
+    print("✅ Endereço respondido sem acesso à rede")
+
+
+def test_address_index_is_built_lazily():
+    """Testa que o índice de endereços só é construído na primeira busca, em
+    segundo plano, e que até lá a busca vai ao provedor"""
+    print("\n🧪 Testando construção sob demanda do índice...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cep_index = build(tmp)
+        original = Cep.local_index, Cep.address_index
+        Cep.local_index, Cep.address_index = cep_index, None
+        try:
+            assert Cep()._search_local("SP", "Sao Paulo", "Praça da Sé") is None
+
+            deadline = time.monotonic() + 5
+            while Cep.address_index is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            result = Cep()._search_local("SP", "Sao Paulo", "Praça da Sé")
+            assert result[0]["logradouro"] == "Praça da Sé"
+        finally:
+            Cep.local_index, Cep.address_index = original
+            cep_index.close()
+    print("✅ Índice construído em segundo plano")
+
+
+def main():
+    """Executa todos os testes do índice de endereços"""
+    print("🤖 Iniciando testes do índice de endereços do CEPzinho...\n")
+
+    test_fold()
+    test_search_ranking()
+    test_cep_search_address_uses_index()
+    test_address_index_is_built_lazily()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes do índice de endereços passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
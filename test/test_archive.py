@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o arquivamento do histórico de consultas do CEPzinho
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import manage
+from archive import QueryArchive
+from database import Database
+from test_result_storage import PAULISTA
+
+
+def timestamp(days_ago: int) -> str:
+    moment = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def count_queries(db: Database) -> int:
+    with sqlite3.connect(db.db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+
+
+def seed(db: Database) -> None:
+    """Grava 30 consultas antigas (100 a 129 dias) e 10 recentes"""
+    db.add_queries(
+        [
+            (i, "@u", "U", "cep", "01310100", PAULISTA, True, timestamp(100 + i))
+            for i in range(30)
+        ]
+        + [
+            (i, "@u", "U", "rua", "Paulista", None, False, timestamp(i))
+            for i in range(10)
+        ]
+    )
+
+
+def test_old_queries_are_archived():
+    """Testa que só as consultas fora da retenção saem do banco"""
+    print("🧪 Testando arquivamento...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        seed(db)
+        stats = db.get_statistics(365)
+
+        archive = QueryArchive(
+            db, os.path.join(tmp, "archive"), retention_days=90, batch_size=7
+        )
+        assert archive.run() == 30
+        assert count_queries(db) == 10
+        assert archive.run() == 0
+
+        archived = list(archive.iter_queries())
+        assert len(archived) == 30
+        assert all(query["result_data"] == PAULISTA for query in archived)
+        assert len(archive.months()) >= 1
+
+        # Os agregados continuam respondendo o período todo, mesmo após backfill
+        assert db.get_statistics(365) == stats
+        assert db.rebuild_statistics()
+        assert db.get_statistics(365) == stats
+
+        since = timestamp(110)[:10]
+        assert all(q["created_at"] >= since for q in archive.iter_queries(since))
+
+        # As consultas arquivadas também são lidas pelo manage.py
+        output = os.path.join(tmp, "consultas.jsonl")
+        manage.dump_archive(
+            argparse.Namespace(
+                dir=archive.archive_dir, since=since, until=None, output=output
+            )
+        )
+        with open(output, encoding="utf-8") as file:
+            dumped = [json.loads(line) for line in file]
+        assert dumped == list(archive.iter_queries(since))
+        db.close()
+    print(f"✅ 30 consultas arquivadas em {len(archive.months())} arquivo(s)")
+
+
+def test_crash_before_delete_is_idempotent():
+    """Testa que um lote regravado não aparece duplicado na leitura"""
+    print("\n🧪 Testando regravação de lote...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        seed(db)
+        archive = QueryArchive(db, os.path.join(tmp, "archive"), retention_days=90)
+
+        # Simula queda entre a gravação do arquivo e a remoção no banco
+        os.makedirs(archive.archive_dir)
+        archive._append(db.get_queries_before(archive.cutoff(), 100))
+        assert archive.run() == 30
+
+        lines = 0
+        for month in archive.months():
+            with gzip.open(archive.path(month), "rt") as file:
+                lines += sum(1 for _ in file)
+        assert lines == 60
+        assert len(list(archive.iter_queries())) == 30
+        db.close()
+    print("✅ Linhas repetidas descartadas na leitura")
+
+
+def main():
+    """Executa todos os testes de arquivamento"""
+    print("🤖 Iniciando testes de arquivamento do CEPzinho...\n")
+
+    test_old_queries_are_archived()
+    test_crash_before_delete_is_idempotent()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Testes do cliente assíncrono de CEP e teste de carga contra um ViaCEP falso
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+
+from cep import Cep, ViaCepProvider
+from fake_viacep import FakeViaCep
+
+
+@contextmanager
+def fake_viacep(latency: float = 0.0):
+    """Sobe o ViaCEP falso e aponta o cliente para ele durante o bloco"""
+    original = Cep.providers
+    with FakeViaCep(latency=latency) as fake:
+        Cep.providers = [ViaCepProvider(fake.cep_url, fake.address_url)]
+        try:
+            yield fake
+        finally:
+            Cep.providers = original
+
+
+async def _run_load(total: int, concurrency: int) -> float:
+    """Dispara `total` consultas com no máximo `concurrency` em voo; retorna req/s"""
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(f"{i:08d}")  # CEPs distintos: sem agrupamento
+
+    async def worker():
+        while not queue.empty():
+            cep = queue.get_nowait()
+            await Cep(cep).aget_cep()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await Cep.aclose()
+    return total / elapsed
+
+
+def test_async_lookups():
+    """Testa aget_cep e asearch_address contra o servidor falso"""
+    print("🧪 Testando cliente assíncrono...")
+
+    with fake_viacep():
+
+        async def run():
+            found = await Cep("01310100").aget_cep()
+            missing = await Cep("99999999").aget_cep()
+            addresses = await Cep().asearch_address("SP", "São Paulo", "Paulista")
+            await Cep.aclose()
+            return found, missing, addresses
+
+        found, missing, addresses = asyncio.run(run())
+
+    assert found["logradouro"] == "Avenida Paulista"
+    assert missing.get("erro")
+    assert [a["cep"] for a in addresses] == ["01310-100"]
+    print("✅ Consultas assíncronas OK")
+
+
+def test_throughput_scales_with_concurrency():
+    """Teste de carga: a vazão deve crescer com a concorrência"""
+    print("\n🧪 Testando vazão com latência simulada de 50ms...")
+
+    with fake_viacep(latency=0.05):
+        serial = asyncio.run(_run_load(10, 1))
+        parallel = asyncio.run(_run_load(80, 16))
+
+    print(f"   concorrência 1: {serial:.0f} req/s")
+    print(f"   concorrência 16: {parallel:.0f} req/s")
+    assert parallel > serial * 3
+
+
+def main():
+    """Executa o teste de carga completo e imprime a tabela de vazão"""
+    print("🤖 Teste de carga do cliente assíncrono do CEPzinho...\n")
+
+    with fake_viacep(latency=0.05):
+        for concurrency in (1, 2, 4, 8, 16, 32):
+            rate = asyncio.run(_run_load(concurrency * 10, concurrency))
+            print(f"   concorrência {concurrency:>2}: {rate:8.1f} req/s")
+
+    print("\n" + "=" * 50)
+
+
+if __name__ == "__main__":
+    main()
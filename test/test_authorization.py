@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o cache de usuários autorizados do CEPzinho
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from database import Database
+
+
+def test_authorization_is_in_memory():
+    """Testa que a verificação de autorização não consulta o banco"""
+    print("🧪 Testando autorização em memória...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cepzinho.db")
+        db = Database(path)
+        db.add_authorized_user(1, "@admin", "Admin")
+        db.add_authorized_user(2, "@suporte", "Suporte", role="support")
+
+        statements = []
+        readers = list(db._readers.queue)
+        for conn in readers:
+            conn.set_trace_callback(statements.append)
+
+        assert db.is_authorized(1)
+        assert db.is_authorized(2)
+        assert not db.is_authorized(3)
+        assert db.get_role(1) == "admin"
+        assert db.get_role(2) == "support"
+        assert db.get_role(3) is None
+
+        for conn in readers:
+            conn.set_trace_callback(None)
+        assert statements == []
+        db.close()
+
+        # Um banco reaberto carrega os usuários já gravados
+        db = Database(path)
+        assert db.is_authorized(2) and db.get_role(2) == "support"
+        db.close()
+    print("✅ Verificações sem I/O")
+
+
+def test_changes_invalidate_cache():
+    """Testa que adicionar e remover usuários atualiza o cache"""
+    print("\n🧪 Testando invalidação do cache...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+
+        db.add_authorized_user(1, "@admin", "Admin")
+        assert db.is_authorized(1)
+
+        db.add_authorized_user(1, "@admin", "Admin", role="support")
+        assert db.get_role(1) == "support"
+
+        assert db.remove_authorized_user(1)
+        assert not db.is_authorized(1)
+        assert not db.remove_authorized_user(1)
+
+        with sqlite3.connect(db.db_path) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM authorized_users").fetchone()
+        assert count[0] == 0
+        db.close()
+    print("✅ Cache atualizado a cada alteração")
+
+
+def main():
+    """Executa todos os testes de autorização"""
+    print("🤖 Iniciando testes de autorização do CEPzinho...\n")
+
+    test_authorization_is_in_memory()
+    test_changes_invalidate_cache()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
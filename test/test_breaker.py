@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o stale-while-revalidate e o circuit breaker do provedor
+"""
+
+import asyncio
+import time
+
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from cache import CepCache
+from cep import Cep
+from test_async_cep import fake_viacep
+
+OLD_PAULISTA = {"cep": "01310-100", "logradouro": "Avenida Paulista (antiga)"}
+
+
+def test_breaker_transitions():
+    """Testa fechado -> aberto -> meio aberto -> fechado/aberto"""
+    print("🧪 Testando transições do circuito...")
+
+    breaker = CircuitBreaker("teste", window=4, min_calls=4, open_seconds=0.05)
+    for success in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record(success, 0.01)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # uma requisição de teste por vez
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED
+
+    # Respostas lentas também contam como falha
+    for _ in range(4):
+        breaker.allow()
+        breaker.record(True, breaker.slow_call + 1)
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record(False, 0.01)
+    assert breaker.state == OPEN
+    assert breaker.get_stats()["opened"] == 3
+    print(f"✅ Transições corretas: {breaker.get_stats()}")
+
+
+def test_stale_while_revalidate():
+    """Testa que o CEP vencido é servido na hora e atualizado em segundo plano"""
+    print("\n🧪 Testando stale-while-revalidate...")
+
+    cache = CepCache(ttl=0)
+    cache.set("01310100", OLD_PAULISTA)
+    cache.ttl = 3600
+    Cep.cache = cache
+
+    try:
+        with fake_viacep(latency=0.1) as fake:
+
+            async def run():
+                start = time.perf_counter()
+                served = await Cep("01310-100").aget_cep()
+                elapsed = time.perf_counter() - start
+                await asyncio.gather(*Cep._revalidating)
+                await Cep.aclose()
+                return served, elapsed
+
+            served, elapsed = asyncio.run(run())
+    finally:
+        Cep.cache = None
+
+    assert served == OLD_PAULISTA
+    assert elapsed < 0.05
+    assert fake.requests == 1
+    assert cache.get("01310100")["logradouro"] == "Avenida Paulista"
+    assert cache.get_stats()["stale_hits"] == 1
+    print(f"✅ Resposta antiga em {elapsed * 1000:.1f}ms, cache atualizado")
+
+
+def test_open_circuit_fails_fast():
+    """Testa que, com o provedor fora, o circuito abre e só o cache responde"""
+    print("\n🧪 Testando circuito aberto...")
+
+    cache = CepCache(ttl=0)
+    cache.set("01310100", OLD_PAULISTA)
+    Cep.cache = cache
+
+    try:
+        with fake_viacep() as fake:
+            fake.status = 503
+            breaker = CircuitBreaker("teste", window=2, min_calls=2, open_seconds=60)
+            Cep.providers[0].breaker = breaker
+
+            async def run():
+                errors = []
+                for cep in ("11111111", "22222222", "33333333"):
+                    try:
+                        await Cep(cep).aget_cep()
+                    except Exception as e:
+                        errors.append(type(e))
+                stale = await Cep("01310100").aget_cep()
+                await Cep.aclose()
+                return errors, stale
+
+            errors, stale = asyncio.run(run())
+    finally:
+        Cep.cache = None
+
+    assert breaker.state == OPEN
+    assert errors[-1] is CircuitOpenError
+    assert fake.requests == 2  # a terceira consulta nem chegou ao provedor
+    assert stale == OLD_PAULISTA
+    print("✅ Falha rápida com o circuito aberto e cache antigo servido")
+
+
+def test_cancelled_probe_waiting_on_semaphore():
+    """Testa que a requisição de teste cancelada na fila do semáforo libera o
+    circuito meio aberto"""
+    print("\n🧪 Testando requisição de teste cancelada na fila...")
+
+    breaker = CircuitBreaker("teste", window=2, min_calls=2, open_seconds=0.01)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record(False, 0.01)
+    assert breaker.state == OPEN
+    time.sleep(0.02)
+
+    provider = Cep.providers[0]
+    original = provider.breaker
+    provider.breaker = breaker
+
+    try:
+        with fake_viacep() as fake:
+
+            async def run():
+                Cep._get_client()
+                Cep._semaphore = asyncio.Semaphore(1)
+                await Cep._semaphore.acquire()  # semáforo saturado
+
+                probe = asyncio.create_task(
+                    Cep._arequest(provider, provider.cep_url.format(cep="01310100"))
+                )
+                await asyncio.sleep(0.01)
+                assert breaker.state == HALF_OPEN and breaker._probing
+
+                probe.cancel()
+                try:
+                    await probe
+                except asyncio.CancelledError:
+                    pass
+                Cep._semaphore.release()
+
+                allowed = breaker.allow()  # nova requisição de teste liberada
+                await Cep.aclose()
+                return allowed
+
+            allowed = asyncio.run(run())
+    finally:
+        provider.breaker = original
+
+    assert allowed
+    assert fake.requests == 0
+    print("✅ Circuito liberado para uma nova requisição de teste")
+
+
+def main():
+    """Executa todos os testes do circuit breaker"""
+    print("🤖 Iniciando testes do circuit breaker do CEPzinho...\n")
+
+    test_breaker_transitions()
+    test_stale_while_revalidate()
+    test_open_circuit_fails_fast()
+    test_cancelled_probe_waiting_on_semaphore()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o cache de CEPs do CEPzinho
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from cache import CepCache
+from database import Database
+from messages import format_stats_message
+
+CEP_DATA = {"cep": "01310-100", "logradouro": "Avenida Paulista", "uf": "SP"}
+
+
+def test_memory_lru():
+    """Testa acertos, falhas e descarte LRU do nível em memória"""
+    print("🧪 Testando LRU em memória...")
+
+    cache = CepCache(max_entries=2)
+    cache.set("01310100", CEP_DATA)
+    cache.set("36246200", {"cep": "36246-200"})
+
+    assert cache.get("01310100") == CEP_DATA  # vira o mais recente
+    cache.set("13183248", {"cep": "13183-248"})  # descarta 36246200
+
+    assert cache.get("36246200") is None
+    assert cache.get("13183248") is not None
+
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    print(f"✅ Estatísticas: {stats}")
+
+
+def test_negative_ttl():
+    """Testa que respostas de erro expiram com o TTL negativo"""
+    print("\n🧪 Testando TTL de respostas negativas...")
+
+    cache = CepCache(ttl=60, negative_ttl=0.05)
+    cache.set("99999999", {"erro": True})
+    cache.set("01310100", CEP_DATA)
+
+    assert cache.get("99999999") == {"erro": True}
+    time.sleep(0.1)
+    assert cache.get("99999999") is None
+    assert cache.get("01310100") == CEP_DATA
+    assert cache.get_stats()["expired"] == 1
+    print("✅ CEP inexistente expirou antes do CEP válido")
+
+
+def test_disk_tier_survives_restart():
+    """Testa que o nível SQLite sobrevive a uma nova instância do cache"""
+    print("\n🧪 Testando cache persistente no SQLite...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        CepCache(db).set("01310100", CEP_DATA)
+
+        restarted = CepCache(db)
+        assert restarted.get("01310100") == CEP_DATA
+        assert restarted.get("01310100") == CEP_DATA
+
+        stats = restarted.get_stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_hits"] == 1
+
+        message = format_stats_message({"total_queries": 0}, stats)
+        assert "Cache de CEPs" in message
+    print("✅ CEP recuperado do disco e promovido para a memória")
+
+
+def test_disk_write_off_event_loop():
+    """Testa que, dentro do event loop, a gravação no SQLite roda em outra
+    thread e flush() aguarda as pendentes"""
+    print("\n🧪 Testando gravação fora do event loop...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        threads = []
+        set_cached_cep = db.set_cached_cep
+
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            return set_cached_cep(*args)
+
+        db.set_cached_cep = record_thread
+        cache = CepCache(db)
+
+        async def run():
+            cache.set("01310100", CEP_DATA)
+            cache.set("00000000", {"erro": True})
+            await cache.flush()
+            return threading.current_thread()
+
+        loop_thread = asyncio.run(run())
+        assert len(threads) == 2 and loop_thread not in threads
+        assert db.get_cached_cep("01310100")[0] == CEP_DATA
+        assert cache._writer is None  # flush() encerra a thread de gravação
+        db.close()
+    print("✅ Gravações feitas na thread do cache")
+
+
+def test_disk_read_off_event_loop():
+    """Testa que alookup() e apreload() leem o SQLite fora do event loop"""
+    print("\n🧪 Testando leitura fora do event loop...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        CepCache(db).set("01310100", CEP_DATA)
+        threads = []
+        get_cached_cep = db.get_cached_cep
+
+        def record_thread(cep):
+            threads.append(threading.current_thread())
+            return get_cached_cep(cep)
+
+        db.set_cached_cep = None  # nenhuma gravação esperada
+        db.get_cached_cep = record_thread
+        cache = CepCache(db)
+
+        async def run():
+            found = await cache.alookup("01310100")
+            missing = await cache.alookup("36246200")
+            preloaded = await CepCache(db).apreload("01310100")
+            return found, missing, preloaded, threading.current_thread()
+
+        found, missing, preloaded, loop_thread = asyncio.run(run())
+        db.close()
+
+    assert found == (CEP_DATA, False) and missing is None and preloaded
+    assert len(threads) == 3 and loop_thread not in threads
+    assert cache.get_stats()["disk_hits"] == 1
+    assert cache.get("01310100") == CEP_DATA  # promovido para a memória
+    print("✅ Leituras do disco feitas fora do event loop")
+
+
+def main():
+    """Executa todos os testes do cache"""
+    print("🤖 Iniciando testes do cache do CEPzinho...\n")
+
+    test_memory_lru()
+    test_negative_ttl()
+    test_disk_tier_survives_restart()
+    test_disk_write_off_event_loop()
+    test_disk_read_off_event_loop()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes do cache passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
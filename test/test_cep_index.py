@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Script de teste para a base local de CEPs (modo offline) do CEPzinho
+"""
+
+import csv
+import os
+import tempfile
+import time
+
+from cep import Cep, ViaCepProvider
+from cep_index import CepIndex, CepIndexError, FIELDS, build_index
+
+ROWS = [
+    {
+        "cep": "01310-100",
+        "logradouro": "Avenida Paulista",
+        "bairro": "Bela Vista",
+        "localidade": "São Paulo",
+        "uf": "SP",
+        "ddd": "11",
+    },
+    {
+        "cep": "36246200",
+        "logradouro": "",
+        "localidade": "Santos Dumont",
+        "uf": "MG",
+        "ddd": "32",
+    },
+    {
+        "cep": "01001-000",
+        "logradouro": "Praça da Sé",
+        "localidade": "São Paulo",
+        "uf": "SP",
+    },
+    {"cep": "123", "logradouro": "CEP inválido é ignorado"},
+]
+
+
+def write_csv(path: str, rows: list) -> None:
+    """Grava um CSV no formato aceito pelo import-ceps"""
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=("cep",) + FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def test_build_and_lookup():
+    """Testa a geração do arquivo e a busca binária"""
+    print("🧪 Testando base local de CEPs...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "ceps.csv")
+        idx_path = os.path.join(tmp, "ceps.idx")
+        write_csv(csv_path, ROWS)
+
+        assert build_index(csv_path, idx_path) == 3
+
+        index = CepIndex(idx_path)
+        try:
+            record = index.get("01310-100")
+            assert record["cep"] == "01310-100"
+            assert record["logradouro"] == "Avenida Paulista"
+            assert record["localidade"] == "São Paulo"
+            assert index.get("01001000")["logradouro"] == "Praça da Sé"
+            assert index.get("99999999") is None
+            assert index.get("abc") is None
+            assert [r["cep"] for r in index] == ["01001-000", "01310-100", "36246-200"]
+
+            start = time.perf_counter()
+            for _ in range(10000):
+                index.get("36246200")
+            per_lookup = (time.perf_counter() - start) / 10000
+            print(f"✅ Busca local: {per_lookup * 1e6:.1f} µs por CEP")
+            assert per_lookup < 0.001
+        finally:
+            index.close()
+
+
+def test_corrupted_file_is_rejected():
+    """Testa a validação de checksum e de versão do cabeçalho"""
+    print("\n🧪 Testando validação do arquivo...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "ceps.csv")
+        idx_path = os.path.join(tmp, "ceps.idx")
+        write_csv(csv_path, ROWS)
+        build_index(csv_path, idx_path)
+
+        with open(idx_path, "r+b") as idx_file:
+            idx_file.seek(-1, os.SEEK_END)
+            idx_file.write(b"X")
+
+        try:
+            CepIndex(idx_path)
+            raise AssertionError("Arquivo corrompido deveria ser rejeitado")
+        except CepIndexError as e:
+            print(f"✅ Rejeitado: {e}")
+
+        with open(idx_path, "r+b") as idx_file:
+            idx_file.seek(8)
+            idx_file.write((99).to_bytes(4, "little"))
+
+        try:
+            CepIndex(idx_path)
+            raise AssertionError("Versão desconhecida deveria ser rejeitada")
+        except CepIndexError as e:
+            print(f"✅ Rejeitado: {e}")
+
+
+def test_cep_uses_local_index():
+    """Testa que o Cep responde pela base local sem chamar o ViaCEP"""
+    print("\n🧪 Testando Cep em modo offline...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "ceps.csv")
+        idx_path = os.path.join(tmp, "ceps.idx")
+        write_csv(csv_path, ROWS)
+        build_index(csv_path, idx_path)
+
+        index = CepIndex(idx_path)
+        original = Cep.providers, Cep.local_index, Cep.local_fallback
+        # qualquer chamada HTTP falharia
+        Cep.providers = [ViaCepProvider("http://127.0.0.1:9/{cep}")]
+        Cep.local_index = index
+        Cep.local_fallback = False
+        try:
+            assert Cep("01310100").get_cep()["logradouro"] == "Avenida Paulista"
+            assert Cep("99999999").get_cep() == {"erro": True}
+        finally:
+            Cep.providers, Cep.local_index, Cep.local_fallback = original
+            index.close()
+    print("✅ CEPs respondidos sem acesso à rede")
+
+
+def main():
+    """Executa todos os testes da base local"""
+    print("🤖 Iniciando testes da base local do CEPzinho...\n")
+
+    test_build_and_lookup()
+    test_corrupted_file_is_rejected()
+    test_cep_uses_local_index()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes da base local passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Script de teste para a exportação do histórico de consultas (/export)
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+from types import SimpleNamespace
+
+from database import Database
+from export import export_queries, parse_filters
+from fake_bot import make_bot
+from fake_viacep import SAMPLE_CEPS
+
+
+def make_history(db: Database, count: int) -> None:
+    """Grava `count` consultas de dois usuários, metade com resultado de CEP"""
+    cep = SAMPLE_CEPS["01310100"]
+    queries = []
+    for i in range(count):
+        day = f"2025-01-{1 + i % 28:02d} 12:00:00"
+        if i % 2:
+            queries.append((1, "@a", "A", "cep", "01310100", cep, True, day))
+        else:
+            queries.append((2, "@b", "B", "rua", "Paulista, SP", None, False, day))
+    db.add_queries(queries)
+
+
+def read_export(data: bytes, fmt: str) -> list:
+    text = gzip.decompress(data).decode("utf-8")
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(text)))
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_export_formats_and_filters():
+    """Testa CSV e NDJSON, resultados resolvidos e filtros"""
+    print("🧪 Testando exportação do histórico...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"), read_pool_size=1)
+        make_history(db, 100)
+
+        file = io.BytesIO()
+        assert export_queries(db, file, "csv", batch_size=7) == 100
+        rows = read_export(file.getvalue(), "csv")
+        assert rows[0]["created_at"] <= rows[-1]["created_at"]
+        ceps = [row for row in rows if row["query_type"] == "cep"]
+        assert json.loads(ceps[0]["result_data"])["logradouro"] == "Avenida Paulista"
+
+        file = io.BytesIO()
+        options = parse_filters(
+            ["desde=2025-01-02", "ate=2025-01-03", "tipo=cep", "formato=ndjson"]
+        )
+        assert export_queries(db, file, options.pop("fmt"), **options) > 0
+        rows = read_export(file.getvalue(), "ndjson")
+        assert {row["created_at"][:10] for row in rows} <= {"2025-01-02", "2025-01-03"}
+        assert all(row["user_id"] == 1 for row in rows)
+        assert rows[0]["result_data"]["uf"] == "SP"
+        db.close()
+    print(f"✅ {len(rows)} consultas filtradas em NDJSON")
+
+
+def test_parse_filters():
+    """Testa os argumentos do /export"""
+    print("\n🧪 Testando filtros do /export...")
+
+    assert parse_filters([]) == {"fmt": "csv"}
+    assert parse_filters(["usuario=42", "ate=2025-02-28"]) == {
+        "fmt": "csv",
+        "user_id": 42,
+        "until": "2025-03-01 00:00:00",
+    }
+    for args in (["dias"], ["usuario=abc"], ["formato=xlsx"], ["ate=31/01/2025"]):
+        try:
+            parse_filters(args)
+        except ValueError:
+            continue
+        raise AssertionError(f"{args} deveria ser recusado")
+    print("✅ Filtros válidos aceitos e inválidos recusados")
+
+
+def test_export_memory_is_flat():
+    """Testa que a memória do export não cresce com o número de consultas"""
+    print("\n🧪 Testando memória da exportação...")
+
+    peaks = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        for added, total in ((2000, 2000), (18000, 20000)):
+            make_history(db, added)
+            with tempfile.TemporaryFile() as file:
+                tracemalloc.start()
+                count = export_queries(db, file, "csv", batch_size=500)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            assert count == total
+        db.close()
+
+    assert peaks[1] < peaks[0] * 2, peaks
+    print(f"✅ Pico de memória: {peaks[0] // 1024} KiB vs {peaks[1] // 1024} KiB")
+
+
+def test_export_command():
+    """Testa o /export enviando o arquivo como documento"""
+    print("\n🧪 Testando comando /export...")
+
+    with make_bot(authorized=(1,)) as bot:
+        make_history(bot.db, 10)
+        replies = []
+
+        async def reply_text(text):
+            replies.append(("texto", text))
+
+        async def reply_document(document, filename, caption):
+            replies.append(("arquivo", filename, caption, document.read()))
+
+        def update():
+            return SimpleNamespace(
+                effective_user=SimpleNamespace(id=1),
+                message=SimpleNamespace(
+                    reply_text=reply_text, reply_document=reply_document
+                ),
+            )
+
+        async def run():
+            await bot.export_command(update(), SimpleNamespace(args=["tipo=rua"]))
+            await bot.export_command(update(), SimpleNamespace(args=["tipo=inline"]))
+            await bot.export_command(update(), SimpleNamespace(args=["x"]))
+
+        asyncio.run(run())
+
+    kind, filename, caption, data = replies[0]
+    assert kind == "arquivo" and filename.endswith(".csv.gz")
+    assert caption == "📤 5 consultas exportadas"
+    assert len(read_export(data, "csv")) == 5
+    assert replies[1][1].startswith("❌ Nenhuma consulta")
+    assert "Como usar o comando /export" in replies[2][1]
+    print(f"✅ Arquivo {filename} enviado")
+
+
+def main():
+    """Executa todos os testes da exportação"""
+    print("🤖 Iniciando testes da exportação do CEPzinho...\n")
+
+    test_export_formats_and_filters()
+    test_parse_filters()
+    test_export_memory_is_flat()
+    test_export_command()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Script de teste para a execução paralela das consultas inline do CEPzinho
+"""
+
+import asyncio
+import time
+
+from fake_bot import make_bot
+
+
+async def leg(delay: float, value: str, finished: list) -> list:
+    await asyncio.sleep(delay)
+    finished.append(value)
+    return [value]
+
+
+def test_legs_run_concurrently():
+    """Testa que as consultas de CEP e endereço rodam ao mesmo tempo"""
+    print("🧪 Testando consultas inline em paralelo...")
+
+    finished = []
+    with make_bot(inline_deadline=1.0) as bot:
+        start = time.perf_counter()
+        results = asyncio.run(
+            bot._run_inline_legs(
+                [
+                    ("cep", leg(0.2, "cep", finished)),
+                    ("endereço", leg(0.1, "endereço", finished)),
+                ]
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    assert results == ["cep", "endereço"]  # mantém a ordem das consultas
+    assert elapsed < 0.29
+    print(f"✅ Duas consultas concluídas em {elapsed * 1000:.0f}ms")
+
+
+def test_slow_leg_is_cancelled():
+    """Testa que a consulta lenta é cancelada ao estourar o prazo"""
+    print("\n🧪 Testando prazo das consultas inline...")
+
+    finished = []
+    with make_bot(inline_deadline=0.2) as bot:
+        start = time.perf_counter()
+        results = asyncio.run(
+            bot._run_inline_legs(
+                [
+                    ("cep", leg(0.05, "cep", finished)),
+                    ("endereço", leg(5, "endereço", finished)),
+                ]
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    assert results == ["cep"]
+    assert finished == ["cep"]
+    assert elapsed < 0.5
+    print(f"✅ Consulta lenta cancelada em {elapsed * 1000:.0f}ms")
+
+
+def main():
+    """Executa todos os testes de consultas inline em paralelo"""
+    print("🤖 Iniciando testes de consultas inline em paralelo do CEPzinho...\n")
+
+    test_legs_run_concurrently()
+    test_slow_leg_is_cancelled()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o debounce das consultas inline do CEPzinho
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from fake_bot import make_bot
+
+
+def make_update(user_id: int, query: str, answers: list) -> SimpleNamespace:
+    """Monta uma consulta inline falsa que registra as respostas enviadas"""
+
+    async def answer(results):
+        answers.append((query, results))
+
+    return SimpleNamespace(
+        inline_query=SimpleNamespace(
+            query=query,
+            from_user=SimpleNamespace(id=user_id, name="@teste", full_name="Teste"),
+            answer=answer,
+        )
+    )
+
+
+def test_keystrokes_are_coalesced():
+    """Testa que só a última tecla digitada dentro da janela é respondida"""
+    print("🧪 Testando debounce por usuário...")
+
+    answers = []
+
+    async def run():
+        tasks = []
+        for query in ("ab", "abc", "abcd"):
+            update = make_update(1, query, answers)
+            tasks.append(asyncio.create_task(bot.inline_query(update, None)))
+            await asyncio.sleep(0.01)
+
+        # Outro usuário não é afetado
+        other = make_update(2, "xyz", answers)
+        tasks.append(asyncio.create_task(bot.inline_query(other, None)))
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    with make_bot(inline_debounce=0.1, inline_deadline=1.0) as bot:
+        asyncio.run(run())
+
+    assert sorted(query for query, _ in answers) == ["abcd", "xyz"]
+    assert bot.inline_stats == {
+        "received": 4,
+        "superseded": 2,
+        "avoided": 2,
+        "cancelled": 0,
+    }
+    assert bot._inline_tasks == {}
+    print(f"✅ Contadores: {bot.inline_stats}")
+
+
+def main():
+    """Executa todos os testes de debounce inline"""
+    print("🤖 Iniciando testes de debounce inline do CEPzinho...\n")
+
+    test_keystrokes_are_coalesced()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
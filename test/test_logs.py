@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o logging com fila e formatação preguiçosa
+"""
+
+import logging
+
+import logs
+
+
+class Counter:
+    """Conta quantas vezes foi convertido em texto"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "contador"
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append((record.levelno, record.getMessage()))
+
+
+def test_level_gated_and_queued():
+    """Testa que mensagens abaixo do nível não são formatadas e que as demais
+    chegam aos handlers pela fila"""
+    print("🧪 Testando logging preguiçoso...")
+
+    handler = ListHandler()
+    logs.setup([handler], "INFO")
+    logger = logs.get_logger("teste")
+    counter = Counter()
+
+    try:
+        logger.debug("ignorada: %s", counter)
+        logger.info("CEP %(cep)s de %(user)s", {"cep": "01310100", "user": counter})
+        logger.warning("sem prefixo")
+    finally:
+        logs.shutdown()  # espera a thread escrever as mensagens pendentes
+        logs.setup()
+
+    assert counter.formatted == 1
+    assert handler.messages == [
+        (logging.INFO, "🙂 CEP 01310100 de contador"),
+        (logging.WARNING, "sem prefixo"),
+    ]
+    print("✅ Depuração descartada sem formatar; demais mensagens entregues")
+
+
+def main():
+    """Executa todos os testes de logging"""
+    print("🤖 Iniciando testes de logging do CEPzinho...\n")
+
+    test_level_gated_and_queued()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
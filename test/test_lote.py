@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Script de teste para a consulta de CEPs em lote (/lote e Cep.get_many)
+"""
+
+import asyncio
+import csv
+import io
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from cache import CepCache
+from cep import Cep
+from database import Database
+from fake_bot import make_bot
+from fake_viacep import SAMPLE_CEPS
+from messages import format_lote_csv
+from test_async_cep import fake_viacep
+
+
+def make_update(text: str, replies: list) -> SimpleNamespace:
+    """Monta uma mensagem falsa que registra as respostas, arquivos e edições"""
+
+    async def edit_text(new_text):
+        replies.append(("edição", new_text))
+
+    async def reply_text(reply):
+        replies.append(("texto", reply))
+        return SimpleNamespace(edit_text=edit_text)
+
+    async def reply_document(document, filename):
+        replies.append(("arquivo", document.decode("utf-8-sig")))
+
+    return SimpleNamespace(
+        effective_user=SimpleNamespace(id=1, name="@teste", full_name="Teste"),
+        message=SimpleNamespace(
+            text=text,
+            caption=None,
+            document=None,
+            reply_to_message=None,
+            reply_text=reply_text,
+            reply_document=reply_document,
+        ),
+    )
+
+
+def test_extract_ceps():
+    """Testa a extração dos CEPs de um texto colado ou de um CSV"""
+    print("🧪 Testando extração dos CEPs...")
+
+    text = "pedido;cep\n1;01310-100\n2;36246200\n3,01310100 abc 123"
+    with make_bot() as bot:
+        ceps = bot._extract_ceps(text)
+    assert ceps == ["01310100", "36246200", "01310100"]
+    print(f"✅ CEPs extraídos: {ceps}")
+
+
+def test_get_many():
+    """Testa deduplicação, respostas do cache e consultas só das faltas"""
+    print("\n🧪 Testando Cep.aget_many...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        Cep.cache = CepCache(db)
+        Cep.cache.set("01310100", SAMPLE_CEPS["01310100"])
+        progress = []
+
+        try:
+            with fake_viacep() as fake:
+
+                async def run():
+                    results = await Cep.aget_many(
+                        ["01310-100", "01310100", "36246-200", "99999999"],
+                        on_progress=lambda done, total: progress.append((done, total)),
+                    )
+                    await Cep.aclose()
+                    return results
+
+                results = asyncio.run(run())
+        finally:
+            Cep.cache = None
+            db.close()
+
+    assert list(results) == ["01310100", "36246200", "99999999"]
+    assert results["01310100"]["logradouro"] == "Avenida Paulista"
+    assert results["36246200"]["localidade"] == "Santos Dumont"
+    assert results["99999999"].get("erro")
+    assert fake.requests == 2  # o CEP em cache não vai ao provedor
+    assert progress[-1] == (3, 3)
+    print(f"✅ {len(results)} CEPs, {fake.requests} requisições ao provedor")
+
+
+def test_rate_limit_and_failures():
+    """Testa o limite de requisições por segundo e que falhas não derrubam o lote"""
+    print("\n🧪 Testando limite de taxa e falhas...")
+
+    ceps = [f"{10000000 + i:08d}" for i in range(10)]
+    with fake_viacep() as fake:
+
+        async def run():
+            start = time.perf_counter()
+            results = await Cep.aget_many(ceps, concurrency=10, rate=50)
+            elapsed = time.perf_counter() - start
+
+            fake.status = 500
+            failed = await Cep.aget_many(["20000000"], rate=0)
+            await Cep.aclose()
+            return results, elapsed, failed
+
+        results, elapsed, failed = asyncio.run(run())
+
+    assert len(results) == 10 and fake.requests == 11
+    assert elapsed >= 0.17  # 10 requisições a 50/s
+    assert failed == {"20000000": None}
+    print(f"✅ 10 CEPs em {elapsed * 1000:.0f}ms a 50 req/s; falha vira None")
+
+
+def test_concurrent_batches_share_rate():
+    """Testa que dois lotes simultâneos dividem o mesmo limite de taxa"""
+    print("\n🧪 Testando limite de taxa entre lotes...")
+
+    batches = [[f"{prefix}{i:07d}" for i in range(5)] for prefix in (3, 4)]
+    with fake_viacep() as fake:
+
+        async def run():
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(Cep.aget_many(ceps, concurrency=5, rate=50) for ceps in batches)
+            )
+            elapsed = time.perf_counter() - start
+            await Cep.aclose()
+            return elapsed
+
+        elapsed = asyncio.run(run())
+
+    assert fake.requests == 10
+    assert elapsed >= 0.17  # 10 requisições a 50/s, não 5 de cada a 50/s
+    print(f"✅ 2 lotes de 5 CEPs em {elapsed * 1000:.0f}ms a 50 req/s no total")
+
+
+def test_lote_csv():
+    """Testa o CSV do resultado"""
+    print("\n🧪 Testando CSV do lote...")
+
+    results = {
+        "01310100": SAMPLE_CEPS["01310100"],
+        "99999999": {"erro": True},
+        "20000000": None,
+    }
+    rows = list(csv.DictReader(io.StringIO(format_lote_csv(results))))
+    assert [row["status"] for row in rows] == ["ok", "não encontrado", "falha"]
+    assert rows[0]["cep"] == "01310-100" and rows[0]["uf"] == "SP"
+    assert rows[2]["cep"] == "20000-000" and rows[2]["logradouro"] == ""
+    print("✅ Uma linha por CEP com a situação da consulta")
+
+
+def test_lote_command():
+    """Testa o /lote: progresso na mesma mensagem, CSV e histórico"""
+    print("\n🧪 Testando comando /lote...")
+
+    replies = []
+    update = make_update("/lote 01310-100 36246200 01310100 99999999", replies)
+
+    with make_bot(authorized=(1,), lote_progress_interval=0.01) as bot:
+        with fake_viacep(latency=0.05):
+
+            async def run():
+                await bot.query_log.start()
+                await bot.lote_command(update, None)
+                await bot.query_log.stop()
+                await Cep.aclose()
+
+            asyncio.run(run())
+        logged = bot.db.get_recent_queries()
+
+    kinds = [kind for kind, _ in replies]
+    assert kinds[0] == "texto" and kinds.count("texto") == 1
+    assert "arquivo" in kinds and kinds[-1] == "edição"
+    document = next(text for kind, text in replies if kind == "arquivo")
+    assert len(document.strip().splitlines()) == 4  # cabeçalho + 3 CEPs
+    assert "Encontrados: 2" in replies[-1][1]
+    assert "1 repetidos" in replies[-1][1]
+    assert [(q["query_type"], q["query_text"]) for q in logged] == [("lote", "3 CEPs")]
+    print(f"✅ Respostas: {kinds}")
+
+
+def main():
+    """Executa todos os testes do lote"""
+    print("🤖 Iniciando testes da consulta em lote do CEPzinho...\n")
+
+    test_extract_ceps()
+    test_get_many()
+    test_rate_limit_and_failures()
+    test_concurrent_batches_share_rate()
+    test_lote_csv()
+    test_lote_command()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
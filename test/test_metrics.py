@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Script de teste para as métricas (histogramas, contadores e endpoint /metrics)
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import urllib.request
+
+import metrics
+from cache import CepCache
+from cep import Cep
+from database import Database
+from messages import format_metrics_message
+from metrics import Counter, Histogram, Metric, MetricsServer
+from test_async_cep import fake_viacep
+
+
+def test_histogram():
+    """Testa buckets, quantis estimados e o formato texto do Prometheus"""
+    print("🧪 Testando histograma...")
+
+    histogram = Histogram("teste_seconds", "Teste", ("kind",), buckets=(0.01, 0.1, 1))
+    try:
+        for _ in range(90):
+            histogram.observe(0.005, "a")
+        for _ in range(10):
+            histogram.observe(0.5, "a")
+        histogram.observe(3, "b")
+
+        summary = histogram.summary(("a",))
+        assert summary["count"] == 100
+        assert round(summary["avg"], 1) == 54.5
+        assert summary["p50"] <= 10
+        assert 100 <= summary["p95"] <= 1000
+        assert histogram.summary(("b",))["p99"] == 1000  # acima do último bucket
+
+        text = metrics.render()
+        assert "# TYPE teste_seconds histogram" in text
+        assert 'teste_seconds_bucket{kind="a",le="0.01"} 90' in text
+        assert 'teste_seconds_bucket{kind="a",le="+Inf"} 100' in text
+        assert 'teste_seconds_count{kind="b"} 1' in text
+    finally:
+        metrics.unregister("teste_seconds")
+    print(f"✅ Histograma: {summary}")
+
+
+def test_lookup_and_upstream_metrics():
+    """Testa as métricas das consultas, do provedor, do cache e do banco"""
+    print("\n🧪 Testando métricas das consultas...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        Cep.cache = CepCache(db)
+        metrics.register_cache(Cep.cache)
+        upstream = metrics.UPSTREAM_SECONDS.series.get(("ViaCEP",), [[0], 0])
+        before = sum(upstream[0])
+
+        try:
+            with fake_viacep():
+
+                async def run():
+                    await Cep("01310-100").aget_cep()
+                    await Cep("01310-100").aget_cep()
+                    await Cep.aclose()
+
+                asyncio.run(run())
+        finally:
+            Cep.cache = None
+            db.close()
+
+    assert sum(metrics.UPSTREAM_SECONDS.series[("ViaCEP",)][0]) == before + 1
+    assert metrics.UPSTREAM_REQUESTS.values[("ViaCEP", "ok")] >= 1
+    assert metrics.LOOKUP_SECONDS.series[("cache",)]
+    assert metrics.DB_WRITE_SECONDS.series[("set_cached_cep",)]
+
+    text = metrics.render()
+    assert 'cepzinho_cache_lookups_total{result="memory_hits"} 1' in text
+    assert 'cepzinho_upstream_requests_total{provider="ViaCEP",outcome="ok"}' in text
+
+    message = format_metrics_message(metrics.summaries(), metrics.counters())
+    assert "upstream_seconds [ViaCEP]" in message
+    assert "cache_lookups_total [memory_hits]: 1" in message
+    print("✅ Consultas, provedor, cache e banco instrumentados")
+
+
+def test_counter_and_server():
+    """Testa o contador e o endpoint HTTP local"""
+    print("\n🧪 Testando endpoint /metrics...")
+
+    counter = Counter("teste_total", "Teste", ("handler",))
+    server = MetricsServer("127.0.0.1", 0)
+    try:
+        counter.inc("cep")
+        counter.inc("cep", amount=2)
+        assert counter.values == {("cep",): 3}
+
+        server.start()
+        assert server._server is None  # porta 0 desativa o endpoint
+
+        server.port = 19464
+        server.start()
+        url = f"http://127.0.0.1:{server.port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.status == 200
+            text = response.read().decode("utf-8")
+        assert 'teste_total{handler="cep"} 3' in text
+        assert "cepzinho_handler_seconds" in text
+    finally:
+        server.stop()
+        metrics.unregister("teste_total")
+    print("✅ Endpoint respondendo")
+
+
+def test_incomplete_metric_is_refused():
+    """Testa que uma métrica sem totals/_local falha ao ser criada"""
+    print("\n🧪 Testando métrica incompleta...")
+
+    class Gauge(Metric):
+        kind = "gauge"
+
+    try:
+        Gauge("teste_gauge", "Teste")
+        assert False, "métrica sem totals/_local deveria falhar"
+    except TypeError:
+        pass
+    assert "teste_gauge" not in metrics.render()
+    print("✅ Métrica incompleta recusada antes de ser registrada")
+
+
+def test_overhead():
+    """Testa que registrar uma amostra custa poucos microssegundos"""
+    print("\n🧪 Testando custo de uma amostra...")
+
+    histogram = Histogram("teste_overhead_seconds", "Teste", ("kind",))
+    try:
+        n = 100_000
+        start = time.perf_counter()
+        for _ in range(n):
+            histogram.observe(0.003, "a")
+        per_sample = (time.perf_counter() - start) / n * 1e6
+    finally:
+        metrics.unregister("teste_overhead_seconds")
+
+    assert per_sample < 5
+    print(f"✅ {per_sample:.2f}µs por amostra")
+
+
+def test_worker_metrics_are_merged():
+    """Testa que o retrato das métricas de um worker é somado às do principal"""
+    print("\n🧪 Testando métricas dos workers...")
+
+    histogram = Histogram("teste_merge_seconds", "Teste", ("kind",), buckets=(0.1, 1))
+    counter = Counter("teste_merge_total", "Teste", ("kind",))
+    try:
+        histogram.observe(0.05, "a")
+        counter.inc("a")
+        worker = metrics.snapshot()
+        worker["teste_worker_total"] = (
+            "counter",
+            "Só no worker",
+            ("kind",),
+            {("b",): 4},
+        )
+
+        metrics.merge("worker-0", worker)
+        metrics.merge("worker-0", worker)  # um retrato novo substitui o anterior
+        metrics.merge("worker-1", worker)
+        histogram.observe(0.5, "a")
+
+        assert histogram.summary(("a",))["count"] == 4
+        assert histogram.series[("a",)][0] == [1, 1, 0]  # só as locais
+        text = metrics.render()
+        assert 'teste_merge_seconds_bucket{kind="a",le="0.1"} 3' in text
+        assert 'teste_merge_total{kind="a"} 3' in text
+        assert 'teste_worker_total{kind="b"} 8' in text
+        assert ("teste_merge_total", ("a",), 3) in metrics.counters()
+    finally:
+        metrics._remote.clear()
+        for name in ("teste_merge_seconds", "teste_merge_total", "teste_worker_total"):
+            metrics.unregister(name)
+    print("✅ Séries dos workers somadas às do processo principal")
+
+
+def main():
+    """Executa todos os testes das métricas"""
+    print("🤖 Iniciando testes das métricas do CEPzinho...\n")
+
+    test_histogram()
+    test_lookup_and_upstream_metrics()
+    test_counter_and_server()
+    test_incomplete_metric_is_refused()
+    test_worker_metrics_are_merged()
+    test_overhead()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
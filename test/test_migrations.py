@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Script de teste para as migrações e índices do banco de dados do CEPzinho
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+
+from database import MIGRATIONS, Database
+
+# Esquema da tabela queries antes do sistema de migrações
+LEGACY_QUERIES_TABLE = """
+    CREATE TABLE queries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        user_name TEXT,
+        user_full_name TEXT,
+        query_type TEXT NOT NULL,
+        query_text TEXT NOT NULL,
+        result_data TEXT,
+        success BOOLEAN NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def test_legacy_database_is_migrated():
+    """Testa que um banco antigo (user_version 0) recebe todas as migrações"""
+    print("🧪 Testando migração de banco antigo...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cepzinho.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(LEGACY_QUERIES_TABLE)
+            conn.execute(
+                "INSERT INTO queries (user_id, query_type, query_text, success) "
+                "VALUES (1, 'cep', '01310100', 1)"
+            )
+
+        db = Database(path)
+        assert db.schema_version() == MIGRATIONS[-1][0]
+        assert len(db.get_recent_queries()) == 1
+        db.close()
+
+        # Reabrir não reaplica nada
+        db = Database(path)
+        assert db.schema_version() == MIGRATIONS[-1][0]
+        db.close()
+    print(f"✅ Esquema na versão {MIGRATIONS[-1][0]}")
+
+
+def test_no_table_scans():
+    """Testa via EXPLAIN QUERY PLAN que as consultas de leitura usam índices"""
+    print("\n🧪 Testando planos de execução...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        db.add_queries(
+            [
+                (i % 7, "@u", "Usuário", "cep", "01310100", None, True, now)
+                for i in range(50)
+            ]
+        )
+
+        statements = []
+        readers = list(db._readers.queue)
+        for conn in readers:
+            conn.set_trace_callback(statements.append)
+
+        db.get_recent_queries(20)
+        db.get_user_queries(1, 20)
+        db.get_statistics(7)
+        db.get_summary_users()
+
+        for conn in readers:
+            conn.set_trace_callback(None)
+
+        selects = [s for s in statements if s.lstrip().startswith("SELECT")]
+        assert len(selects) >= 6
+
+        with sqlite3.connect(db.db_path) as conn:
+            for statement in selects:
+                plan = [
+                    row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}")
+                ]
+                for step in plan:
+                    if step.startswith("SCAN"):
+                        assert "INDEX" in step, f"Varredura completa: {statement}"
+                print(f"   {' | '.join(plan)}")
+
+        db.close()
+    print("✅ Nenhuma varredura completa de tabela")
+
+
+def main():
+    """Executa todos os testes de migrações"""
+    print("🤖 Iniciando testes de migrações do CEPzinho...\n")
+
+    test_legacy_database_is_migrated()
+    test_no_table_scans()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Script de teste para os provedores de CEP e as requisições com hedging
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from httpx import HTTPStatusError, Request, Response
+
+from cep import BrasilApiProvider, Cep, CepProvider, ViaCepProvider, build_providers
+from fake_viacep import FakeBrasilApi, FakeViaCep
+from messages import format_cep_response
+
+
+@contextmanager
+def providers(*providers):
+    """Usa os provedores informados durante o bloco"""
+    original = Cep.providers
+    Cep.providers = list(providers)
+    try:
+        yield
+    finally:
+        Cep.providers = original
+
+
+def lookup(*ceps) -> list:
+    """Consulta os CEPs em sequência com o cliente assíncrono"""
+
+    async def run():
+        results = [await Cep(cep).aget_cep() for cep in ceps]
+        await Cep.aclose()
+        return results
+
+    return asyncio.run(run())
+
+
+def test_build_providers():
+    """Testa a lista de provedores montada a partir da configuração"""
+    print("🧪 Testando configuração dos provedores...")
+
+    built = build_providers("viacep, BrasilAPI")
+    assert [type(p) for p in built] == [ViaCepProvider, BrasilApiProvider]
+    assert built[1].address_url is None
+
+    for names in ("viacep,correios", "", " , "):
+        try:
+            build_providers(names)
+            assert False, f"{names!r} deveria falhar"
+        except ValueError as e:
+            assert "viacep, espelho, brasilapi" in str(e)
+    print("✅ Provedores montados em ordem")
+
+
+def test_provider_interface():
+    """Testa que parse_cep é obrigatório e parse_address tem padrão vazio"""
+    print("\n🧪 Testando interface dos provedores...")
+
+    class Incomplete(CepProvider):
+        pass
+
+    try:
+        Incomplete("http://localhost/{cep}")
+        assert False, "provedor sem parse_cep deveria falhar"
+    except TypeError:
+        pass
+
+    assert BrasilApiProvider("http://localhost/{cep}").parse_address(None) == []
+    print("✅ Provedor incompleto recusado ao ser criado")
+
+
+def test_brasilapi_is_normalized():
+    """Testa que a resposta da BrasilAPI chega no formato do ViaCEP"""
+    print("\n🧪 Testando normalização da BrasilAPI...")
+
+    with FakeBrasilApi() as fake, providers(BrasilApiProvider(fake.cep_url)):
+        found, missing, malformed = lookup("01310-100", "99999999", "0131")
+
+    assert found["cep"] == "01310-100"
+    assert found["logradouro"] == "Avenida Paulista"
+    assert found["localidade"] == "São Paulo" and found["uf"] == "SP"
+    assert missing == {"erro": True}
+    assert malformed == {"erro": True}
+    assert "Avenida Paulista" in format_cep_response(found)
+
+    # Erro do servidor não vira um CEP vazio: sobe para o breaker/failover
+    provider = BrasilApiProvider("http://localhost/{cep}")
+    request = Request("GET", "http://localhost/01310100")
+    try:
+        provider.parse_cep(Response(502, request=request))
+        assert False, "HTTP 5xx deveria falhar"
+    except HTTPStatusError:
+        pass
+    print("✅ Resposta normalizada")
+
+
+def test_hedged_request():
+    """Testa que o reserva é consultado após o p95 do principal e vence"""
+    print("\n🧪 Testando hedging...")
+
+    with FakeViaCep(latency=1.0) as slow, FakeBrasilApi() as fast:
+        primary = ViaCepProvider(slow.cep_url, slow.address_url)
+        primary.latencies.extend([0.05] * 20)
+        before = dict(Cep.upstream_stats)
+
+        with providers(primary, BrasilApiProvider(fast.cep_url)):
+            start = time.perf_counter()
+            (result,) = lookup("01310100")
+            elapsed = time.perf_counter() - start
+
+    assert result["logradouro"] == "Avenida Paulista"
+    assert elapsed < 0.5
+    assert slow.requests == 1 and fast.requests == 1
+    assert Cep.upstream_stats["hedged"] - before["hedged"] == 1
+    assert Cep.upstream_stats["hedge_wins"] - before["hedge_wins"] == 1
+    print(f"✅ Respondido pelo reserva em {elapsed * 1000:.0f}ms")
+
+
+def test_failover_on_error():
+    """Testa que um erro do principal consulta o reserva na hora"""
+    print("\n🧪 Testando falha do provedor principal...")
+
+    with FakeViaCep() as broken, FakeBrasilApi() as backup:
+        broken.status = 503
+        primary = ViaCepProvider(broken.cep_url, broken.address_url)
+
+        with providers(primary, BrasilApiProvider(backup.cep_url)):
+            (result,) = lookup("01310100")
+
+    assert result["cep"] == "01310-100"
+    assert broken.requests == 1 and backup.requests == 1
+    print("✅ Reserva respondeu após erro do principal")
+
+
+def test_sync_lookup_uses_providers():
+    """Testa que get_cep/search_address síncronos usam o failover e o timeout"""
+    print("\n🧪 Testando consulta síncrona...")
+
+    with FakeViaCep() as broken, FakeBrasilApi() as backup:
+        broken.status = 503
+        primary = ViaCepProvider(broken.cep_url, broken.address_url)
+
+        with providers(primary, BrasilApiProvider(backup.cep_url)):
+            result = Cep("01310-100").get_cep()
+
+    assert result["cep"] == "01310-100"
+    assert broken.requests == 1 and backup.requests == 1
+    assert list(primary.breaker._calls) == [True]  # falha registrada no circuito
+
+    with FakeViaCep(latency=1.0) as stalled:
+        slow = ViaCepProvider(stalled.cep_url, stalled.address_url)
+        with providers(slow), patch("cep.HTTP_TIMEOUT", 0.1):
+            start = time.perf_counter()
+            try:
+                Cep().search_address("SP", "São Paulo", "Paulista")
+                assert False, "provedor travado deveria estourar o timeout"
+            except Exception:
+                pass
+            elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
+    print(f"✅ Reserva respondeu e o provedor travado falhou em {elapsed:.2f}s")
+
+
+def main():
+    """Executa todos os testes dos provedores"""
+    print("🤖 Iniciando testes dos provedores de CEP do CEPzinho...\n")
+
+    test_build_providers()
+    test_provider_interface()
+    test_brasilapi_is_normalized()
+    test_hedged_request()
+    test_failover_on_error()
+    test_sync_lookup_uses_providers()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
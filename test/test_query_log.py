@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Script de teste para a gravação em lote do histórico de consultas do CEPzinho
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+from database import Database
+from query_log import QueryLogger
+
+
+def count_queries(db: Database) -> int:
+    with sqlite3.connect(db.db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+
+
+def test_batches_by_size_and_flush_on_stop():
+    """Testa a gravação por tamanho de lote e a gravação final ao desligar"""
+    print("🧪 Testando gravação em lotes...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        query_log = QueryLogger(db, batch_size=100, flush_interval=60)
+
+        async def run():
+            await query_log.start()
+            for i in range(250):
+                await query_log.log(i, "@u", "Usuário", "cep", "01310100", {"i": i})
+            await asyncio.sleep(0.2)
+            written_before_stop = query_log.stats["written"]
+            await query_log.stop()
+            return written_before_stop
+
+        written_before_stop = asyncio.run(run())
+
+        assert written_before_stop == 200  # dois lotes cheios, sem esperar 60s
+        assert query_log.stats == {"written": 250, "batches": 3, "failed": 0}
+        assert count_queries(db) == 250
+
+        recent = db.get_recent_queries(1)[0]
+        assert recent["created_at"] is not None
+    print(f"✅ Estatísticas: {query_log.stats}")
+
+
+def test_flush_by_interval():
+    """Testa que um lote incompleto é gravado após o intervalo"""
+    print("\n🧪 Testando gravação por intervalo...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        query_log = QueryLogger(db, batch_size=100, flush_interval=0.1)
+
+        async def run():
+            await query_log.start()
+            for i in range(5):
+                await query_log.log(
+                    i, "@u", "Usuário", "rua", "Av Paulista", None, False
+                )
+            await asyncio.sleep(0.3)
+            written = count_queries(db)
+            await query_log.stop()
+            return written
+
+        assert asyncio.run(run()) == 5
+    print("✅ Lote incompleto gravado após o intervalo")
+
+
+def test_backpressure():
+    """Testa que a fila limitada faz os handlers aguardarem"""
+    print("\n🧪 Testando backpressure...")
+
+    class SlowDatabase:
+        def add_queries(self, queries):
+            time.sleep(0.05)
+            return True
+
+    query_log = QueryLogger(
+        SlowDatabase(), batch_size=5, flush_interval=0.01, max_pending=5
+    )
+
+    async def run():
+        await query_log.start()
+        start = time.perf_counter()
+        for i in range(30):
+            await query_log.log(i, "@u", "Usuário", "cep", "01310100")
+            assert query_log.pending <= 5
+        elapsed = time.perf_counter() - start
+        await query_log.stop()
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    assert elapsed > 0.1
+    assert query_log.stats["written"] == 30
+    print(f"✅ Produtor contido pela fila cheia ({elapsed * 1000:.0f}ms)")
+
+
+def main():
+    """Executa todos os testes de gravação em lote"""
+    print("🤖 Iniciando testes de gravação em lote do CEPzinho...\n")
+
+    test_batches_by_size_and_flush_on_stop()
+    test_flush_by_interval()
+    test_backpressure()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Script de teste para as mensagens de CEP memoizadas no cache
+"""
+
+import pickle
+
+from cache import CepCache, CepRecord
+from fake_viacep import SAMPLE_CEPS
+from messages import (
+    CEP_NOT_FOUND_MESSAGE,
+    format_cep_response,
+    format_inline_cep_result,
+    render_cep,
+)
+
+PAULISTA = SAMPLE_CEPS["01310100"]
+
+
+def test_render_matches_formatters():
+    """Testa que a versão memoizada é idêntica à formatação direta"""
+    print("🧪 Testando mensagens memoizadas...")
+
+    cache = CepCache()
+    record = cache.set("01310100", PAULISTA)
+    rendered = render_cep(record)
+
+    assert isinstance(record, CepRecord) and record == PAULISTA
+    assert rendered.response == format_cep_response(dict(PAULISTA))
+    assert rendered.inline_content == format_inline_cep_result(dict(PAULISTA))
+    assert rendered.inline_title == "📍 CEP 01310-100"
+    assert "Avenida Paulista, Bela Vista - São Paulo/SP" == rendered.inline_description
+    assert render_cep({"erro": True}).response == CEP_NOT_FOUND_MESSAGE
+    print("✅ Mesmo texto da formatação direta")
+
+
+def test_cache_hit_reuses_rendering():
+    """Testa que um acerto no cache devolve as mensagens já formatadas"""
+    print("\n🧪 Testando reaproveitamento no acerto do cache...")
+
+    cache = CepCache()
+    first = render_cep(cache.set("01310100", PAULISTA))
+    hit = cache.get("01310100")
+
+    assert render_cep(hit) is first
+    assert format_cep_response(hit) is first.response
+
+    # Entre processos vai só o dicionário
+    copy = pickle.loads(pickle.dumps(hit))
+    assert type(copy) is dict and copy == PAULISTA
+    print("✅ Nenhuma formatação no acerto")
+
+
+def main():
+    """Executa todos os testes das mensagens memoizadas"""
+    print("🤖 Iniciando testes das mensagens memoizadas do CEPzinho...\n")
+
+    test_render_matches_formatters()
+    test_cache_hit_reuses_rendering()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
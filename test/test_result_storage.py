@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o armazenamento compacto dos resultados das consultas
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+
+import database
+from database import Database
+from test_migrations import LEGACY_QUERIES_TABLE
+
+PAULISTA = {
+    "cep": "01310-100",
+    "logradouro": "Avenida Paulista",
+    "bairro": "Bela Vista",
+    "localidade": "São Paulo",
+    "uf": "SP",
+}
+CONSOLACAO = dict(PAULISTA, cep="01310-200", bairro="Consolação")
+
+
+def count(db: Database, table: str) -> int:
+    with sqlite3.connect(db.db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_records_are_deduplicated():
+    """Testa que CEPs repetidos são gravados uma única vez"""
+    print("🧪 Testando deduplicação dos registros...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        db.add_query(1, "@a", "A", "cep", "01310100", PAULISTA)
+        db.add_queries(
+            [
+                (1, "@a", "A", "cep", "01310100", dict(PAULISTA), True, None),
+                (
+                    2,
+                    "@b",
+                    "B",
+                    "rua",
+                    "Paulista",
+                    {"results": [PAULISTA, CONSOLACAO]},
+                    True,
+                    None,
+                ),
+                (2, "@b", "B", "cep", "00000000", {"erro": True}, False, None),
+                (3, "@c", "C", "rua", "Nada", None, False, None),
+            ]
+        )
+
+        assert count(db, "cep_records") == 2
+
+        with sqlite3.connect(db.db_path) as conn:
+            stored = conn.execute(
+                "SELECT result_ref, result_data FROM queries ORDER BY id"
+            ).fetchall()
+        assert stored[0] == stored[1]
+        assert stored[0][1] is None
+        assert len(json.loads(stored[2][0])) == 2
+        assert stored[3] == (None, '{"erro": true}')
+        assert stored[4] == (None, None)
+
+        recent = {q["query_text"]: q for q in db.get_recent_queries()}
+        assert recent["01310100"]["result_data"] == PAULISTA
+        assert recent["Paulista"]["result_data"] == {"results": [PAULISTA, CONSOLACAO]}
+        assert recent["00000000"]["result_data"] == {"erro": True}
+        assert recent["Nada"].get("result_data") is None
+        db.close()
+    print("✅ 2 registros para 3 resultados de CEP")
+
+
+def test_result_data_is_lazy():
+    """Testa que result_data só é lido de cep_records quando acessado"""
+    print("\n🧪 Testando decodificação sob demanda...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        db.add_queries(
+            [(i, "@u", "U", "cep", "01310100", PAULISTA, True, None) for i in range(20)]
+        )
+
+        statements = []
+        readers = list(db._readers.queue)
+        for conn in readers:
+            conn.set_trace_callback(statements.append)
+
+        queries = db.get_user_queries(1)
+        assert not any("cep_records" in s for s in statements)
+        assert "result_data" in queries[0]
+
+        assert queries[0]["result_data"] == PAULISTA
+        assert queries[0]["result_data"] is queries[0]["result_data"]
+        assert sum("cep_records" in s for s in statements) == 1
+
+        # Percorrer a consulta inteira também decodifica o result_data
+        recent = db.get_recent_queries()
+        assert "result_data" in list(recent[0])
+        assert len(recent[1]) == 8
+        assert dict(recent[2])["result_data"] == PAULISTA
+        assert json.loads(json.dumps(recent[3]))["result_data"] == PAULISTA
+        assert {**recent[4]}["result_data"] == PAULISTA
+        assert recent[5] == dict(dict.items(recent[5]), result_data=PAULISTA)
+        assert sum("cep_records" in s for s in statements) == 7
+
+        for conn in readers:
+            conn.set_trace_callback(None)
+        db.close()
+    print("✅ Nenhuma leitura extra até o acesso")
+
+
+def test_legacy_rows_are_compacted():
+    """Testa que a migração move o JSON das consultas antigas para cep_records"""
+    print("\n🧪 Testando compactação de banco antigo...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cepzinho.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(LEGACY_QUERIES_TABLE)
+            conn.executemany(
+                "INSERT INTO queries (user_id, query_type, query_text, result_data, "
+                "success) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (1, "cep", "01310100", json.dumps(PAULISTA), 1),
+                    (1, "cep", "01310100", json.dumps(PAULISTA), 1),
+                    (2, "rua", "Paulista", json.dumps({"results": [CONSOLACAO]}), 1),
+                    (2, "cep", "00000000", json.dumps({"erro": True}), 0),
+                ],
+            )
+
+        batch_size = database.COMPACT_BATCH_SIZE
+        database.COMPACT_BATCH_SIZE = 3  # duas faixas de id
+        try:
+            db = Database(path)
+        finally:
+            database.COMPACT_BATCH_SIZE = batch_size
+        assert count(db, "cep_records") == 2
+
+        queries = sorted(db.get_recent_queries(), key=lambda q: q["query_text"])
+        assert [q["result_data"] for q in queries] == [
+            {"erro": True},
+            PAULISTA,
+            PAULISTA,
+            {"results": [CONSOLACAO]},
+        ]
+        db.close()
+    print("✅ Consultas antigas compactadas")
+
+
+def main():
+    """Executa todos os testes de armazenamento dos resultados"""
+    print("🤖 Iniciando testes de armazenamento dos resultados do CEPzinho...\n")
+
+    test_records_are_deduplicated()
+    test_result_data_is_lazy()
+    test_legacy_rows_are_compacted()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
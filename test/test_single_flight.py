@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o agrupamento (single-flight) de consultas idênticas
+"""
+
+import asyncio
+
+from cep import Cep
+from test_async_cep import fake_viacep
+
+
+def test_concurrent_ceps_share_one_request():
+    """Testa que consultas simultâneas do mesmo CEP geram uma só requisição"""
+    print("🧪 Testando agrupamento de CEPs...")
+
+    with fake_viacep(latency=0.1) as fake:
+        before = dict(Cep.upstream_stats)
+
+        async def run():
+            results = await asyncio.gather(
+                *(Cep(cep).aget_cep() for cep in ["01310-100", "01310100"] * 25)
+            )
+            await Cep.aclose()
+            return results
+
+        results = asyncio.run(run())
+
+    assert fake.requests == 1
+    assert all(result["cep"] == "01310-100" for result in results)
+    assert Cep.upstream_stats["requests"] - before["requests"] == 1
+    assert Cep.upstream_stats["coalesced"] - before["coalesced"] == 49
+    assert Cep._inflight == {}
+    print("✅ 50 consultas, 1 requisição")
+
+
+def test_concurrent_addresses_share_one_request():
+    """Testa o agrupamento por (uf, cidade, logradouro) normalizados"""
+    print("\n🧪 Testando agrupamento de endereços...")
+
+    with fake_viacep(latency=0.1) as fake:
+
+        async def run():
+            results = await asyncio.gather(
+                Cep().asearch_address("SP", "São Paulo", "Paulista"),
+                Cep().asearch_address("sp", "Sao  Paulo", "paulista"),
+                Cep().asearch_address("SP", "São Paulo", "Augusta"),
+            )
+            await Cep.aclose()
+            return results
+
+        paulista, folded, augusta = asyncio.run(run())
+
+    assert fake.requests == 2
+    assert paulista is folded
+    assert augusta == []
+    print("✅ 3 buscas, 2 requisições")
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    """Testa que cancelar um chamador não cancela a requisição compartilhada"""
+    print("\n🧪 Testando cancelamento de um chamador...")
+
+    with fake_viacep(latency=0.1) as fake:
+
+        async def run():
+            first = asyncio.create_task(Cep("01310100").aget_cep())
+            second = asyncio.create_task(Cep("01310100").aget_cep())
+            await asyncio.sleep(0.02)
+            first.cancel()
+            result = await second
+            await Cep.aclose()
+            return first.cancelled(), result
+
+        cancelled, result = asyncio.run(run())
+
+    assert cancelled
+    assert result["cep"] == "01310-100"
+    assert fake.requests == 1
+    print("✅ Requisição concluída para quem continuou esperando")
+
+
+def main():
+    """Executa todos os testes de agrupamento"""
+    print("🤖 Iniciando testes de single-flight do CEPzinho...\n")
+
+    test_concurrent_ceps_share_one_request()
+    test_concurrent_addresses_share_one_request()
+    test_cancelled_caller_does_not_cancel_others()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
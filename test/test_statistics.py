@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Script de teste para os agregados diários do /stats do CEPzinho
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from database import Database
+
+
+def timestamp(days_ago: int) -> str:
+    moment = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def rollup_rows(db: Database) -> list:
+    with sqlite3.connect(db.db_path) as conn:
+        return conn.execute(
+            "SELECT date, total_queries, successful_queries, failed_queries, "
+            "unique_users FROM statistics ORDER BY date"
+        ).fetchall()
+
+
+def seed(db: Database) -> None:
+    """Grava consultas de hoje, de ontem e de 30 dias atrás"""
+    db.add_queries(
+        [
+            (1, "@a", "A", "cep", "01310100", None, True, timestamp(0)),
+            (1, "@a", "A", "rua", "Paulista, SP, SP", None, False, timestamp(0)),
+            (2, "@b", "B", "cep", "01310100", None, True, timestamp(1)),
+            (3, "@c", "C", "inline_cep", "0131", None, True, timestamp(30)),
+        ]
+    )
+    db.add_query(2, "@b", "B", "cep", "36246200", None, True)
+    db.add_queries([(1, "@a", "A", "cep", "01310100", None, True, timestamp(1))])
+
+
+def test_incremental_rollups():
+    """Testa que os agregados acompanham as consultas gravadas"""
+    print("🧪 Testando agregados diários...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        seed(db)
+
+        today, yesterday, month_ago = (
+            timestamp(0)[:10],
+            timestamp(1)[:10],
+            timestamp(30)[:10],
+        )
+        assert rollup_rows(db) == [
+            (month_ago, 1, 1, 0, 1),
+            (yesterday, 2, 2, 0, 2),
+            (today, 3, 2, 1, 2),
+        ]
+
+        stats = db.get_statistics(7)
+        assert stats["total_queries"] == 5
+        assert stats["successful_queries"] == 4
+        assert stats["failed_queries"] == 1
+        assert stats["unique_users"] == 2
+        assert stats["query_types"] == {"cep": 4, "rua": 1}
+
+        assert db.get_statistics(60)["unique_users"] == 3
+        assert db.get_statistics(1)["total_queries"] == 3
+        db.close()
+    print(f"✅ Estatísticas de 7 dias: {stats}")
+
+
+def test_rebuild_matches_incremental():
+    """Testa que o backfill reproduz os agregados incrementais"""
+    print("\n🧪 Testando recálculo dos agregados...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        seed(db)
+
+        incremental = rollup_rows(db)
+        stats = db.get_statistics(60)
+
+        assert db.rebuild_statistics()
+        assert rollup_rows(db) == incremental
+        assert db.get_statistics(60) == stats
+        db.close()
+    print("✅ Recálculo idêntico aos agregados incrementais")
+
+
+def main():
+    """Executa todos os testes dos agregados diários"""
+    print("🤖 Iniciando testes dos agregados diários do CEPzinho...\n")
+
+    test_incremental_rollups()
+    test_rebuild_matches_incremental()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o aquecimento do cache de CEPs
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from cache import CepCache
+from cep import Cep
+from database import Database
+from test_async_cep import fake_viacep
+from warmup import CacheWarmup
+
+
+def make_history(db: Database) -> None:
+    """Grava um histórico com o 01310100 mais consultado que o 36246200"""
+    queries = [(1, "@u", "U", "cep", "01310-100", None, True, None)] * 6
+    queries += [(1, "@u", "U", "cep", "01310100", None, True, None)] * 2
+    queries += [(1, "@u", "U", "cep", "36246200", None, True, None)] * 2
+    queries += [(1, "@u", "U", "cep", "00000000", None, False, None)] * 2
+    queries += [(1, "@u", "U", "rua", "SP, São Paulo, Paulista", None, True, None)]
+    db.add_queries(queries)
+
+
+def test_top_ceps():
+    """Testa a contagem dos CEPs mais consultados com o texto normalizado"""
+    print("🧪 Testando CEPs mais consultados...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        make_history(db)
+
+        top, total = db.get_top_ceps(10, 30)
+        assert top == [("01310100", 8), ("36246200", 2)]
+        assert total == 12
+        assert db.get_top_ceps(1, 30)[0] == [("01310100", 8)]
+        db.close()
+    print("✅ Ranking por CEP normalizado")
+
+
+def test_warmup_fills_cache():
+    """Testa que o aquecimento busca os CEPs e não conta como falha no cache"""
+    print("\n🧪 Testando aquecimento do cache...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        make_history(db)
+        cache = CepCache(db)
+        Cep.cache = cache
+
+        try:
+            with fake_viacep() as fake:
+                warmup = CacheWarmup(db, cache, top_n=10, days=30)
+
+                async def run():
+                    stats = await warmup.run()
+                    cached = await Cep("01310-100").aget_cep()
+                    await Cep.aclose()
+                    return stats, cached
+
+                stats, cached = asyncio.run(run())
+        finally:
+            Cep.cache = None
+            db.close()
+
+    assert stats["fetched"] == 2 and stats["failed"] == 0
+    assert round(stats["coverage"]) == 83  # 10 de 12 consultas de CEP
+    assert fake.requests == 2
+    assert cached["logradouro"] == "Avenida Paulista"
+    assert cache.get_stats()["memory_hits"] == 1
+    assert cache.get_stats()["misses"] == 0
+    print(f"✅ Cache aquecido: {stats}")
+
+
+def test_warmup_respects_budget():
+    """Testa que a inicialização não espera além do orçamento"""
+    print("\n🧪 Testando orçamento do aquecimento...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cepzinho.db"))
+        make_history(db)
+        cache = CepCache(db)
+        Cep.cache = cache
+
+        try:
+            with fake_viacep(latency=0.3):
+                warmup = CacheWarmup(db, cache, concurrency=1, budget=0.05)
+
+                async def run():
+                    start = time.perf_counter()
+                    await warmup.start()
+                    waited = time.perf_counter() - start
+                    running = not warmup.stats["done"]
+                    await warmup._task
+                    await Cep.aclose()
+                    return waited, running
+
+                waited, running = asyncio.run(run())
+        finally:
+            Cep.cache = None
+            db.close()
+
+    assert waited < 0.2
+    assert running
+    assert warmup.stats["done"] and warmup.stats["fetched"] == 2
+    print(f"✅ Inicialização liberada em {waited * 1000:.0f}ms")
+
+
+def main():
+    """Executa todos os testes do aquecimento do cache"""
+    print("🤖 Iniciando testes do aquecimento do cache do CEPzinho...\n")
+
+    test_top_ceps()
+    test_warmup_fills_cache()
+    test_warmup_respects_budget()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Script de teste para a configuração do modo webhook
+"""
+
+from unittest.mock import patch
+
+from main import webhook_settings
+
+
+def test_webhook_settings():
+    """Testa a URL registrada no Telegram e a falha sem WEBHOOK_URL"""
+    print("🧪 Testando configuração do webhook...")
+
+    with patch("main.WEBHOOK_URL", "https://cepzinho.exemplo.com.br/"):
+        settings = webhook_settings()
+    assert settings["webhook_url"] == "https://cepzinho.exemplo.com.br/telegram"
+
+    with patch("main.WEBHOOK_URL", ""):
+        try:
+            webhook_settings()
+            assert False, "webhook sem WEBHOOK_URL deveria falhar"
+        except ValueError as e:
+            assert "WEBHOOK_URL" in str(e)
+    print(f"✅ Webhook registrado em {settings['webhook_url']}")
+
+
+def main():
+    """Executa os testes do modo webhook"""
+    print("🤖 Iniciando testes do webhook do CEPzinho...\n")
+
+    test_webhook_settings()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
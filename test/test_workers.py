@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o modo multi-processo (workers) do CEPzinho
+"""
+
+import os
+import queue
+import sqlite3
+import tempfile
+
+from telegram import Update
+
+from database import Database
+from workers import RELOAD_AUTHORIZED, WorkerDatabase, WorkerPool, chat_key
+
+USER = {"id": 7, "is_bot": False, "first_name": "Usuário"}
+
+
+def test_chat_key():
+    """Testa que mensagens usam o chat e consultas inline usam o usuário"""
+    print("🧪 Testando chave de distribuição...")
+
+    message = Update.de_json(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": -100, "type": "group"},
+                "from": USER,
+                "text": "/cep 01310100",
+            },
+        },
+        None,
+    )
+    inline = Update.de_json(
+        {
+            "update_id": 2,
+            "inline_query": {"id": "1", "from": USER, "query": "0131", "offset": ""},
+        },
+        None,
+    )
+
+    assert chat_key(message) == -100
+    assert chat_key(inline) == 7
+    print("✅ Chaves por chat e por usuário")
+
+
+def test_worker_writes_go_to_front():
+    """Testa que o worker não grava no banco e o principal aplica as escritas"""
+    print("\n🧪 Testando escritor único...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cepzinho.db")
+        writes = queue.Queue()
+        front = Database(path)
+        worker = WorkerDatabase(writes, path)
+        assert worker._writer is None  # somente leitura, sem migrações
+        assert worker.schema_version() == front.schema_version()
+        with worker._read() as conn:
+            try:
+                conn.execute("DELETE FROM queries")
+            except sqlite3.OperationalError:
+                pass
+            else:
+                raise AssertionError("o worker não deveria gravar no banco")
+
+        worker.add_queries([(1, "@u", "U", "cep", "01310100", None, True, None)])
+        worker.set_cached_cep("01310100", {"cep": "01310-100"}, 2**40)
+        worker.add_authorized_user(1, "@admin", "Admin")
+        assert worker.is_authorized(1)  # atualizado na hora no próprio worker
+        assert not worker.remove_authorized_user(2)
+
+        assert front.get_recent_queries() == []
+        assert front.get_cached_cep("01310100") is None
+        assert writes.qsize() == 3
+
+        pool = WorkerPool(2, db=front)
+        while not writes.empty():
+            pool.apply(*writes.get())
+
+        assert len(front.get_recent_queries()) == 1
+        assert front.get_cached_cep("01310100")[0] == {"cep": "01310-100"}
+        assert front.is_authorized(1)
+
+        # Só a mudança de autorização é repassada aos workers
+        for updates in pool.updates:
+            assert updates.get(timeout=5) == RELOAD_AUTHORIZED
+            assert updates.empty()
+
+        worker.close()
+        front.close()
+    print(f"✅ Escritas aplicadas pelo processo principal: {pool.stats}")
+
+
+def main():
+    """Executa todos os testes do modo multi-processo"""
+    print("🤖 Iniciando testes do modo multi-processo do CEPzinho...\n")
+
+    test_chat_key()
+    test_worker_writes_go_to_front()
+
+    print("\n" + "=" * 50)
+    print("🎉 Todos os testes passaram!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
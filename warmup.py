@@ -0,0 +1,118 @@
+"""
+Aquecimento do cache de CEPs do CEPzinho
+
+Na inicialização, os CEPs mais consultados recentemente (tabela `queries`)
+são carregados no cache: os que estão no cache em disco sobem para o LRU em
+memória e os demais são consultados no provedor, com concorrência limitada.
+O bot espera o aquecimento por no máximo `budget` segundos; o que faltar
+continua em segundo plano enquanto as atualizações já são recebidas.
+"""
+
+import asyncio
+from time import perf_counter
+from typing import Dict, Optional
+from logs import get_logger
+from cep import Cep
+from config import (
+    CACHE_WARMUP_TOP_N,
+    CACHE_WARMUP_DAYS,
+    CACHE_WARMUP_CONCURRENCY,
+    CACHE_WARMUP_BUDGET,
+)
+
+logger = get_logger(__name__)
+
+
+class CacheWarmup:
+    def __init__(
+        self,
+        db,
+        cache,
+        top_n: int = CACHE_WARMUP_TOP_N,
+        days: int = CACHE_WARMUP_DAYS,
+        concurrency: int = CACHE_WARMUP_CONCURRENCY,
+        budget: float = CACHE_WARMUP_BUDGET,
+    ):
+        """Inicializa o aquecimento do cache `cache` (CepCache) a partir do
+        histórico do banco `db` (Database)"""
+        self.db = db
+        self.cache = cache
+        self.top_n = top_n
+        self.days = days
+        self.concurrency = concurrency
+        self.budget = budget
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "candidates": 0,
+            "local": 0,
+            "cached": 0,
+            "fetched": 0,
+            "failed": 0,
+            "coverage": 0.0,
+            "elapsed": 0.0,
+            "done": False,
+        }
+
+    async def start(self) -> None:
+        """Inicia o aquecimento e aguarda por no máximo `budget` segundos"""
+        if self.top_n <= 0:
+            return
+
+        self._task = asyncio.ensure_future(self.run())
+        done, _ = await asyncio.wait({self._task}, timeout=self.budget)
+        if not done:
+            logger.warning(
+                "Aquecimento do cache passou de %.0fs; continuando em segundo plano",
+                self.budget,
+            )
+
+    async def stop(self) -> None:
+        """Interrompe o aquecimento, se ainda estiver rodando"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def run(self) -> Dict:
+        """Carrega os CEPs mais consultados no cache e retorna as estatísticas
+
+        `coverage` é a fração das consultas de CEP do período que teriam sido
+        respondidas pelos CEPs aquecidos, ou seja, a taxa de acertos que o
+        aquecimento garante logo após a inicialização.
+        """
+        start = perf_counter()
+        limit = min(self.top_n, self.cache.max_entries)
+        top, total = await asyncio.to_thread(self.db.get_top_ceps, limit, self.days)
+        self.stats["candidates"] = len(top)
+
+        pending = list(top)
+        covered = 0
+
+        async def worker():
+            nonlocal covered
+            while pending:
+                cep, count = pending.pop(0)
+                try:
+                    outcome = await Cep(cep).awarm()
+                except Exception as e:
+                    logger.warning("Falha ao aquecer CEP %s: %r", cep, e)
+                    outcome = "failed"
+                else:
+                    covered += count
+                self.stats[outcome] += 1
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+        self.stats["coverage"] = covered / total * 100 if total else 0.0
+        self.stats["elapsed"] = perf_counter() - start
+        self.stats["done"] = True
+        logger.info(
+            "Cache aquecido em %.1fs: %s de %s CEPs, cobrindo %.0f%% das "
+            "consultas de CEP dos últimos %s dias (%s)",
+            self.stats["elapsed"],
+            len(top) - self.stats["failed"],
+            len(top),
+            self.stats["coverage"],
+            self.days,
+            self.stats,
+        )
+        return self.stats
@@ -0,0 +1,258 @@
+"""
+Execução do CEPzinho em vários processos (BOT_WORKERS > 0)
+
+O processo principal (FrontBot) recebe as atualizações do Telegram (polling
+ou webhook) e as distribui entre BOT_WORKERS processos worker por uma fila
+local por worker. Todas as atualizações de um chat vão sempre para o mesmo
+worker, que as trata em ordem.
+
+Os workers leem o banco diretamente (SQLite em modo WAL aceita leitores em
+vários processos) e compartilham o segundo nível do cache de CEPs, a tabela
+`cep_cache`. As escritas (histórico de consultas, cache e usuários
+autorizados) são enviadas ao processo principal, o único que grava no banco.
+Pela mesma fila, cada worker envia periodicamente um retrato das suas
+métricas, que o processo principal soma às suas no endpoint /metrics.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+import metrics
+from logs import get_logger
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+from archive import QueryArchive
+from database import Database
+from main import CEPzinho, run_application
+from metrics import MetricsServer
+from config import (
+    TELEGRAM_TOKEN,
+    TELEGRAM_API_URL,
+    LOG_MESSAGES,
+    BOT_WORKERS,
+    METRICS_FORWARD_INTERVAL,
+)
+
+logger = get_logger(__name__)
+
+# Mensagem de controle: recarregar os usuários autorizados do banco
+RELOAD_AUTHORIZED = "reload_authorized"
+
+# Escritas que alteram os usuários autorizados em cache nos workers
+AUTHORIZATION_WRITES = ("add_authorized_user", "remove_authorized_user")
+
+# Mensagem na fila de escritas: retrato das métricas de um worker
+FORWARD_METRICS = "metrics"
+
+
+def chat_key(update: Update) -> int:
+    """Chave de distribuição de uma atualização: o chat (ou usuário)"""
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return update.effective_user.id
+    return update.update_id
+
+
+class WorkerDatabase(Database):
+    """Banco de dados de um worker: lê localmente (somente leitura, sem
+    conexão de escrita nem migrações), envia as escritas ao processo
+    principal pela fila `writes`"""
+
+    def __init__(self, writes, db_path: str = "cepzinho.db"):
+        self.writes = writes
+        super().__init__(db_path, read_only=True)
+
+    def _send(self, method: str, *args) -> bool:
+        self.writes.put((method, args))
+        return True
+
+    def add_query(self, *args) -> bool:
+        return self._send("add_query", *args)
+
+    def add_queries(self, queries: List[Tuple]) -> bool:
+        return self._send("add_queries", queries)
+
+    def set_cached_cep(self, cep: str, data: Dict, expires_at: float) -> bool:
+        return self._send("set_cached_cep", cep, data, expires_at)
+
+    def add_authorized_user(
+        self, user_id: int, user_name: str, user_full_name: str, role: str = "admin"
+    ) -> bool:
+        self._authorized = MappingProxyType({**self._authorized, user_id: role})
+        return self._send(
+            "add_authorized_user", user_id, user_name, user_full_name, role
+        )
+
+    def remove_authorized_user(self, user_id: int) -> bool:
+        if user_id not in self._authorized:
+            return False
+
+        authorized = dict(self._authorized)
+        del authorized[user_id]
+        self._authorized = MappingProxyType(authorized)
+        return self._send("remove_authorized_user", user_id)
+
+
+class WorkerPool:
+    def __init__(self, workers: int = BOT_WORKERS, db: Optional[Database] = None):
+        """Prepara `workers` processos e o banco (único escritor) do principal"""
+        context = multiprocessing.get_context("spawn")
+        self.db = db or Database()
+        self.updates = [context.Queue() for _ in range(workers)]
+        self.writes = context.Queue()
+        self._ready = context.Semaphore(0)
+        self._processes = [
+            context.Process(
+                target=run_worker,
+                args=(index, self.updates[index], self.writes, self._ready),
+                name=f"cepzinho-worker-{index}",
+            )
+            for index in range(workers)
+        ]
+        self._writer: Optional[threading.Thread] = None
+        self.stats = {"dispatched": 0, "writes": 0}
+
+    def start(self, timeout: float = 60) -> None:
+        """Inicia o escritor e os workers; aguarda todos ficarem prontos"""
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+        for process in self._processes:
+            process.start()
+        for _ in self._processes:
+            if not self._ready.acquire(timeout=timeout):
+                raise RuntimeError("Worker não ficou pronto a tempo")
+
+        logger.info("%s workers prontos", len(self._processes))
+
+    def dispatch(self, update: Dict, key: int) -> None:
+        """Envia uma atualização ao worker responsável pela chave (chat)"""
+        self.updates[key % len(self.updates)].put(update)
+        self.stats["dispatched"] += 1
+
+    def broadcast(self, message) -> None:
+        """Envia uma mensagem de controle a todos os workers"""
+        for queue in self.updates:
+            queue.put(message)
+
+    def stop(self) -> None:
+        """Encerra os workers (após tratarem o que já receberam) e o escritor"""
+        self.broadcast(None)
+        for process in self._processes:
+            process.join()
+
+        # Todas as escritas dos workers já estão na fila, antes desta marca
+        self.writes.put(None)
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+
+    def _write_loop(self) -> None:
+        """Aplica no banco, em ordem, as escritas enviadas pelos workers"""
+        while True:
+            item = self.writes.get()
+            if item is None:
+                return
+            self.apply(*item)
+
+    def apply(self, method: str, args: Tuple) -> None:
+        """Aplica uma escrita; mudanças de autorização recarregam os workers"""
+        if method == FORWARD_METRICS:
+            metrics.merge(*args)
+            return
+
+        try:
+            getattr(self.db, method)(*args)
+            self.stats["writes"] += 1
+        except Exception as e:
+            logger.error("Erro ao aplicar escrita %s: %s", method, e)
+            return
+
+        if method in AUTHORIZATION_WRITES:
+            self.broadcast(RELOAD_AUTHORIZED)
+
+
+async def forward_metrics(writes, interval: float = METRICS_FORWARD_INTERVAL):
+    """Envia as métricas do worker ao processo principal a cada `interval`
+    segundos e uma última vez ao ser cancelada"""
+    source = multiprocessing.current_process().name
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            writes.put((FORWARD_METRICS, (source, metrics.snapshot())))
+    finally:
+        writes.put((FORWARD_METRICS, (source, metrics.snapshot())))
+
+
+async def serve(bot: CEPzinho, updates, ready=None) -> None:
+    """Trata as atualizações recebidas pela fila `updates` até receber None"""
+    app = bot.app
+    async with app:
+        await bot._post_init(app)
+        await app.start()
+        forwarder = asyncio.create_task(forward_metrics(bot.db.writes))
+        if ready is not None:
+            ready.release()
+
+        while True:
+            item = await asyncio.to_thread(updates.get)
+            if item is None:
+                break
+            if item == RELOAD_AUTHORIZED:
+                bot.db._load_authorized_users()
+                continue
+            await app.update_queue.put(Update.de_json(item, app.bot))
+
+        # stop() trata as atualizações que ainda estiverem na fila
+        await app.stop()
+        await bot._post_shutdown(app)
+        forwarder.cancel()
+        await asyncio.gather(forwarder, return_exceptions=True)
+
+
+def run_worker(index: int, updates, writes, ready=None) -> None:
+    """Ponto de entrada de um processo worker"""
+    logger.info("Worker %s iniciado", index)
+    bot = CEPzinho(db=WorkerDatabase(writes), worker=True)
+    asyncio.run(serve(bot, updates, ready))
+
+
+class FrontBot:
+    def __init__(self, workers: int = BOT_WORKERS):
+        """Processo principal: recebe as atualizações e as distribui"""
+        self.pool = WorkerPool(workers)
+        self.archive = QueryArchive(self.pool.db)
+        self.metrics_server = MetricsServer()
+        self.app = (
+            Application.builder()
+            .token(TELEGRAM_TOKEN)
+            .base_url(TELEGRAM_API_URL)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
+        self.app.add_handler(TypeHandler(Update, self.dispatch))
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Repassa a atualização ao worker do seu chat"""
+        self.pool.dispatch(update.to_dict(), chat_key(update))
+
+    async def _post_init(self, application: Application) -> None:
+        """Sobe os workers antes de começar a receber atualizações"""
+        await asyncio.to_thread(self.pool.start)
+        self.metrics_server.start()
+        self.archive.schedule(application.job_queue)
+
+    async def _post_shutdown(self, application: Application) -> None:
+        """Encerra os workers e grava as escritas pendentes"""
+        await asyncio.to_thread(self.pool.stop)
+        self.pool.db.close()
+        self.metrics_server.stop()
+
+    def run(self) -> None:
+        """Inicia o processo principal em modo polling ou webhook (BOT_MODE)"""
+        logger.info(LOG_MESSAGES["bot_started"])
+        run_application(self.app)